@@ -0,0 +1,175 @@
+#!/usr/bin/python
+
+import asyncio
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import Tracing
+
+from daemon import QuinielaDaemon, createSheetsOp, createScraper,\
+        createScheduler, createCheckpoint, createResultsStore
+from Metrics import createMetrics
+from RateLimiter import createLimiter
+
+
+
+class SharedScraper():
+
+    """Thread safe wrapper of a QuinielaScraper shared by several daemons,
+    each football day page is fetched once per `maxAge` seconds no matter
+    how many daemons ask for it. Different football days are fetched at the
+    same time"""
+
+    def __init__(self, quiniScraper, maxAge):
+        """
+        :quiniScraper: QuinielaScraper instance
+        :maxAge: seconds during which fetched matches are reused
+
+        """
+        self.quiniScraper = quiniScraper
+        self.season = quiniScraper.season
+        self.maxAge = maxAge
+        self.lock = threading.Lock()
+        self.dayLocks = dict()
+        self.fetched = dict()
+
+
+    def fetchMatches(self, footballDay):
+        """Gets the matches of footballDay, fetching them only if they are
+        older than `maxAge`
+
+        :footballDay: number of football day
+        :returns: matches, see `QuinielaScraper.getMatches`
+
+        """
+        with self.lock:
+            dayLock = self.dayLocks.setdefault(footballDay, threading.Lock())
+
+        # Daemons asking for the same day wait for a single fetch, the ones
+        # asking for other days are not blocked
+        with dayLock:
+            fetchTime, matches = self.fetched.get(footballDay, (None, None))
+            if fetchTime is None or time.time() - fetchTime > self.maxAge:
+                matches = self.quiniScraper.fetchMatches(footballDay)
+                self.fetched[footballDay] = (time.time(), matches)
+
+        return [dict(match) for match in matches]
+
+
+
+class AsyncEngine():
+
+    """Drives the state machine of several spreadsheets from one process"""
+
+    def __init__(self, daemons, workers, errorWait):
+        """
+        :daemons: list of QuinielaDaemon
+        :workers: threads running the blocking Sheets and HTTP calls
+        :errorWait: seconds to wait before retrying a failed tick
+
+        """
+        self.daemons = daemons
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.errorWait = errorWait
+
+
+    async def runDaemon(self, daemon):
+        """Runs the ticks of a daemon, each one with its own timer
+
+        :daemon: QuinielaDaemon
+        :returns: None
+
+        """
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+        daemon.onWake = lambda: loop.call_soon_threadsafe(woken.set)
+        started = False
+        while True:
+            try:
+                if not started:
+                    await loop.run_in_executor(self.executor, daemon.start)
+                    started = True
+                waitTime = await loop.run_in_executor(self.executor,
+                        daemon.tick)
+            except Exception:
+                # A failing spreadsheet must not stop the others
+                Tracing.log('tick failed', daemon=daemon.name,
+                        error=traceback.format_exc())
+                waitTime = self.errorWait
+            with Tracing.span('sleep', daemon=daemon.name, wait=waitTime):
+                try:
+                    await asyncio.wait_for(woken.wait(), waitTime)
+                except asyncio.TimeoutError:
+                    pass
+            woken.clear()
+
+
+    async def run(self):
+        """Runs all the daemons concurrently
+        :returns: None
+
+        """
+        await asyncio.gather(*[self.runDaemon(daemon)
+            for daemon in self.daemons])
+
+
+
+def createDaemons(config):
+    """Creates a daemon for each spreadsheet in the configuration, entries
+    under `spreadsheets` override the keys of the main configuration
+
+    :config: configuration
+    :returns: list of QuinielaDaemon
+
+    """
+    metrics = createMetrics(config)
+    quiniScraper = SharedScraper(createScraper(config, metrics),
+            config.get('sharedMaxAge', config['periodCompleted'] / 2.0))
+
+    store = None
+    if config.get('backend') == 'memory':
+        from SheetsMemory import GridStore
+        store = GridStore(config['plantillaId'])
+
+    # The quota is shared by all the spreadsheets of the process
+    limiter = createLimiter(config)
+    resultsStore = createResultsStore(config)
+
+    daemons = []
+    for sheetConfig in config.get('spreadsheets', [{}]):
+        sheetConfig = dict(config, **sheetConfig)
+        if config.get('checkpointFile') and\
+                sheetConfig['checkpointFile'] == config['checkpointFile']:
+            # One checkpoint per spreadsheet
+            root, ext = os.path.splitext(config['checkpointFile'])
+            sheetConfig['checkpointFile'] = root + '_' +\
+                    sheetConfig.get('name', sheetConfig['spreadSheetId']) + ext
+        Tracing.log('creating sheets operator',
+                sheet=sheetConfig['spreadSheetId'])
+        daemon = QuinielaDaemon(quiniScraper,
+                createSheetsOp(sheetConfig, store, metrics, limiter),
+                sheetConfig['numDoubles'], sheetConfig,
+                createScheduler(sheetConfig), sheetConfig.get('historyFile'),
+                metrics, createCheckpoint(sheetConfig), resultsStore)
+        daemon.name = sheetConfig.get('name', sheetConfig['spreadSheetId'])
+        daemons.append(daemon)
+
+    return daemons
+
+
+
+if __name__ == '__main__':
+    fConf = open('config.json', 'r')
+    config = json.load(fConf)
+    Tracing.configureFrom(config)
+
+    daemons = createDaemons(config)
+    engine = AsyncEngine(daemons, config.get('workers', 2 * len(daemons)),
+            config.get('errorWait', config['periodFinished']))
+
+    Tracing.log('entering main loop')
+    asyncio.run(engine.run())
@@ -0,0 +1,154 @@
+#!/usr/bin/python
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from QuinielaScraper import QuinielaScraper
+from ResultsStore import ResultsStore
+from ScraperTransport import ScraperTransport
+
+
+class Throttle():
+
+    """Spaces the requests of all the threads at least `interval` seconds"""
+
+    def __init__(self, interval):
+        """
+        :interval: minimum seconds between two requests
+
+        """
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.nextTime = 0
+
+
+    def wait(self):
+        """Blocks until a new request is allowed
+        :returns: None
+
+        """
+        with self.lock:
+            now = time.time()
+            start = max(now, self.nextTime)
+            self.nextTime = start + self.interval
+        time.sleep(start - now)
+
+
+
+class Backfill():
+
+    """Scrapes whole seasons concurrently into a ResultsStore"""
+
+    def __init__(self, store, workers, interval, cacheDir, timeout,
+            parser='fast'):
+        """
+        :store: ResultsStore where the results are saved
+        :workers: number of concurrent downloads
+        :interval: minimum seconds between two requests to the site
+        :cacheDir: folder of the pages cache
+        :timeout: seconds to wait for the site
+        :parser: parser backend of the scrapers
+
+        """
+        self.store = store
+        self.workers = workers
+        self.throttle = Throttle(interval)
+        self.cacheDir = cacheDir
+        self.timeout = timeout
+        self.parser = parser
+        self.local = threading.local()
+
+
+    def fetch(self, season, footballDay):
+        """Fetches the matches of a football day, each thread has its own
+        HTTP session
+
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :returns: season, footballDay, matches, finished
+
+        """
+        if not hasattr(self.local, 'transport'):
+            self.local.transport = ScraperTransport(self.cacheDir, 10000,
+                    self.timeout)
+        quiniScraper = QuinielaScraper(season, self.local.transport,
+                self.parser)
+
+        self.throttle.wait()
+        matches = quiniScraper.fetchMatches(footballDay)
+
+        return season, footballDay, matches, quiniScraper.dayFinished()
+
+
+    def run(self, seasons, footballDays):
+        """Backfills the football days of the seasons, finished days already
+        stored are skipped
+
+        :seasons: list of seasons, e.g. ['2015_2016', '2016_2017']
+        :footballDays: football day numbers to fetch of each season
+        :returns: {'stored': --, 'skipped': --, 'failed': [(season, day)]}
+
+        """
+        tasks = []
+        skipped = 0
+        for season in seasons:
+            finished = self.store.finishedDays(season)
+            for footballDay in footballDays:
+                if footballDay in finished:
+                    skipped += 1
+                else:
+                    tasks.append((season, footballDay))
+
+        stored = 0
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = dict((executor.submit(self.fetch, season, day),
+                (season, day)) for season, day in tasks)
+            for future in as_completed(futures):
+                try:
+                    season, day, matches, finished = future.result()
+                except Exception as error:
+                    # Days not published yet or not existing in the season
+                    failed.append(futures[future])
+                    print('Failed ' + ' '.join(map(str, futures[future])) +
+                            ': ' + str(error))
+                    continue
+                self.store.saveFootballDay(season, day, matches, finished)
+                stored += 1
+
+        return {'stored': stored, 'skipped': skipped, 'failed': failed}
+
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(
+            description='Backfills quiniela seasons into a local store')
+    argParser.add_argument('seasons', nargs='+',
+            help='seasons to backfill, e.g. 2016_2017')
+    argParser.add_argument('--db', default='results.db',
+            help='SQLite database of the results')
+    argParser.add_argument('--first', type=int, default=1,
+            help='first football day')
+    argParser.add_argument('--last', type=int, default=65,
+            help='last football day')
+    argParser.add_argument('--workers', type=int, default=4,
+            help='concurrent downloads')
+    argParser.add_argument('--interval', type=float, default=1.0,
+            help='minimum seconds between requests to the site')
+    argParser.add_argument('--cache-dir', default='.cache',
+            help='folder of the pages cache')
+    argParser.add_argument('--timeout', type=float, default=10,
+            help='seconds to wait for the site')
+    args = argParser.parse_args()
+
+    store = ResultsStore(args.db)
+    backfill = Backfill(store, args.workers, args.interval, args.cache_dir,
+            args.timeout)
+    summary = backfill.run(args.seasons, range(args.first, args.last + 1))
+    store.close()
+
+    print('Stored ' + str(summary['stored']) + ', skipped ' +
+            str(summary['skipped']) + ', failed ' +
+            str(len(summary['failed'])))
@@ -0,0 +1,110 @@
+import numpy as np
+
+
+# Sheet mode value -> sign index, as in DoubleChooser.getDoubleCol
+MODE_INDEX = np.array([1, 0, 2])
+SIGNS = np.array(['1', 'X', '2'])
+
+
+class BatchDoubleChooser():
+
+    """Vectorized DoubleChooser, it selects the doubles of many groups or
+    scenarios in one call"""
+
+    def __init__(self, numDoubles, seed=None):
+        """
+        :numDoubles: number of doubles of each group
+        :seed: seed of the random tie-breaks
+
+        """
+        self.numDoubles = numDoubles
+        self.rng = np.random.default_rng(seed)
+
+
+    def difs(self, freqs):
+        """Obtains the difference between the two biggest frequencies
+
+        :freqs: (groups x 14 x 3) frequencies
+        :returns: (groups x 14) differences
+
+        """
+        ordered = np.sort(freqs, axis=2)
+        return ordered[:, :, 2] - ordered[:, :, 1]
+
+
+    def chooseDoubleRows(self, difs):
+        """Chooses the rows of the doubles, the ones with smaller
+        differences. Ties at the last difference taken are broken uniformly
+        at random among all the tied rows, as
+        `DoubleChooser.chooseDoubleRows` does, but with this chooser's
+        generator: without such ties both choose the same rows
+
+        :difs: (groups x 14) differences
+        :returns: (groups x numDoubles) indexes of the chosen rows
+
+        """
+        groups, rows = difs.shape
+
+        keys = self.rng.random((groups, rows))
+        order = np.lexsort((keys, difs), axis=-1)
+
+        return order[:, 0:self.numDoubles]
+
+
+    def tellDoubles(self, freqs, modes):
+        """Tells the doubles of every group
+
+        :freqs: (groups x 14 x 3) frequencies of each sign
+        :modes: (groups x 14) modes with the sheet encoding
+        :returns: (groups x 14) array with the double columns, e.g.
+                  [['X', '', '', '1', '2', ...], ...]
+
+        """
+        freqs = np.asarray(freqs, dtype=np.int64)
+        modes = np.asarray(modes, dtype=np.int64)
+        groups, rows, _ = freqs.shape
+
+        doubleRows = self.chooseDoubleRows(self.difs(freqs))
+
+        # Second sign: biggest frequency once the mode is discarded, the
+        # first sign in '1', 'X', '2' order on a tie as `Utils_.maximo`
+        masked = freqs.copy()
+        np.put_along_axis(masked, MODE_INDEX[modes][:, :, None], -1, axis=2)
+        second = np.argmax(masked, axis=2)
+
+        doubleCols = np.full((groups, rows), '', dtype='<U1')
+        groupIdx = np.arange(groups)[:, None]
+        doubleCols[groupIdx, doubleRows] = SIGNS[second[groupIdx,
+            doubleRows]]
+
+        return doubleCols
+
+
+
+if __name__ == '__main__':
+
+    # Testing
+
+    freqs = [
+    [0,2,4],
+    [3,2,1],
+    [4,2,0],
+    [2,4,0],
+    [6,0,0],
+    [3,1,2],
+    [4,1,1],
+    [2,1,3],
+    [6,0,0],
+    [6,0,0],
+    [3,2,1],
+    [5,1,0],
+    [4,1,1],
+    [6,0,0]
+    ]
+
+    mode = [2, 1, 1, 0, 1, 1, 1, 2, 1, 1, 1, 1, 1, 1]
+
+    batchChooser = BatchDoubleChooser(7, seed=0)
+    doubles = batchChooser.tellDoubles([freqs] * 3, [mode] * 3)
+
+    print(doubles)
@@ -0,0 +1,146 @@
+import numpy as np
+
+
+# Sign index -> sheet mode value, as in DoubleChooser.getDoubleCol
+MODE_VALUES = np.array([1, 0, 2])
+SIGNS = ['1', 'X', '2']
+SIGN_INDEX = {'1': 0, 'X': 1, '2': 2}
+# Goals of a team in the pleno al 15
+GOALS = {'0': 0, '1': 1, '2': 2, 'M': 3}
+
+EMPTY = -1
+INVALID = -2
+
+
+def encodeBet(bet, pleno=False):
+    """Encodes the bet of a cell
+
+    :bet: text of the cell or result, e.g. 'X', or '2-M' and '2--M' for
+          the pleno al 15
+    :pleno: True if the cell is the pleno al 15
+    :returns: sign index (0-2), local goals * 4 + visiting goals for the
+              pleno (0-15), EMPTY or INVALID
+
+    """
+    bet = bet.strip().upper()
+    if bet == u'':
+        return EMPTY
+    if not pleno:
+        return SIGN_INDEX.get(bet, INVALID)
+
+    # Results of the site separate the goals with '--'
+    goals = [goal for goal in bet.split('-') if goal]
+    if len(goals) != 2 or goals[0] not in GOALS or goals[1] not in GOALS:
+        return INVALID
+
+    return GOALS[goals[0]] * 4 + GOALS[goals[1]]
+
+
+
+class BetMatrix():
+
+    """Bets of a football day as an int8 array (participants x 15), the
+    first 14 columns hold sign indexes and the last one the pleno al 15,
+    see `encodeBet`"""
+
+    def __init__(self, names, bets):
+        """
+        :names: names of the participants
+        :bets: int8 array (participants x 15)
+
+        """
+        self.names = names
+        self.bets = bets
+
+
+    @classmethod
+    def fromColumns(cls, columns, people=None):
+        """Builds the matrix from the participant columns read in COLUMNS
+        order, each column has the 15 bets of a person and their name in
+        row 16
+
+        :columns: values of the range, trailing empty cells may be missing
+        :people: set of names to keep, all the named columns if None
+        :returns: BetMatrix
+
+        """
+        names = []
+        rows = []
+        for column in columns:
+            column = list(column) + [u''] * (16 - len(column))
+            name = column[15]
+            if not name or (people is not None and name not in people):
+                continue
+            names.append(name)
+            rows.append([encodeBet(bet) for bet in column[0:14]] +
+                    [encodeBet(column[14], pleno=True)])
+
+        bets = np.array(rows, dtype=np.int8).reshape(len(rows), 15)
+
+        return cls(names, bets)
+
+
+    def participants(self):
+        """Obtains the number of participants
+        :returns: int
+
+        """
+        return len(self.names)
+
+
+    def filled(self):
+        """Checks if every participant bet on the 15 matches
+        :returns: boolean
+
+        """
+        return bool((self.bets != EMPTY).all())
+
+
+    def freqs(self):
+        """Obtains the frequency of each sign in the first 14 matches
+        :returns: int array (14 x 3), columns in '1', 'X', '2' order
+
+        """
+        signs = self.bets[:, 0:14]
+        return np.stack([(signs == sign).sum(axis=0) for sign in range(3)],
+                axis=1)
+
+
+    def modes(self, freqs=None):
+        """Obtains the most voted sign of each match. Ties go to the sign
+        bet first in column order, as the MODE of the sheet returns the
+        first value it finds among the most frequent ones
+
+        :freqs: frequencies from `freqs`, computed if None
+        :returns: int array (14) with the sheet encoding (1, 0 or 2)
+
+        """
+        if freqs is None:
+            freqs = self.freqs()
+        freqs = np.asarray(freqs)
+
+        # First participant betting each sign, a last row betting all of
+        # them stands for nobody
+        signs = self.bets[:, 0:14]
+        bet = np.stack([signs == sign for sign in range(3)], axis=2)
+        bet = np.concatenate([bet, np.ones((1, 14, 3), dtype=bool)])
+        first = np.argmax(bet, axis=0)
+
+        tied = freqs == freqs.max(axis=1, keepdims=True)
+        return MODE_VALUES[np.argmin(np.where(tied, first, len(bet)),
+            axis=1)]
+
+
+    def gaps(self, freqs=None):
+        """Obtains the difference between the two most voted signs of each
+        match
+
+        :freqs: frequencies from `freqs`, computed if None
+        :returns: int array (14)
+
+        """
+        if freqs is None:
+            freqs = self.freqs()
+        ordered = np.sort(freqs, axis=1)
+
+        return ordered[:, 2] - ordered[:, 1]
@@ -0,0 +1,54 @@
+import json
+import os
+
+
+class Checkpoint():
+
+    """Local file with the last known state of a daemon, so it can resume
+    without discovering the state again"""
+
+    VERSION = 1
+
+    def __init__(self, path):
+        """
+        :path: path of the JSON checkpoint file
+
+        """
+        self.path = path
+
+
+    def load(self):
+        """Reads the checkpoint
+        :returns: checkpoint data, None if there is no valid checkpoint
+
+        """
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if not isinstance(data, dict) or data.get('version') != self.VERSION:
+            return None
+
+        return data
+
+
+    def save(self, data):
+        """Atomically writes the checkpoint, a crash while writing leaves
+        the previous one
+
+        :data: {'state': --, 'sheetId': --, 'sheetTitle': --,
+                'numFootballDay': --, 'newInState': --, 'lastResults': --,
+                'revision': --}
+        :returns: None
+
+        """
+        data = dict(data, version=self.VERSION)
+        tmpPath = self.path + '.tmp'
+        with open(tmpPath, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpPath, self.path)
+
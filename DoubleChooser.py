@@ -2,6 +2,9 @@ import random
 import copy
 import Utils_
 
+DoublesOptimizer = Utils_.LazyModule('DoublesOptimizer')
+
+
 class DoubleChooser():
 
     """Class to select the doubles of a football day"""
@@ -91,7 +94,7 @@ class DoubleChooser():
             # If remains less than rows with dif -> choose randomly
             if difsCount[dif] > self.numDoubles - len(chosenDoubles):
                 randEls = self.chooseRandomEls(
-                        difsPos[currIdx:currIdx+difsCount[dif]-1],
+                        difsPos[currIdx:currIdx+difsCount[dif]],
                         self.numDoubles - len(chosenDoubles))
                 chosenDoubles.extend(randEls)
             # Append all values of curr diff
@@ -127,7 +130,7 @@ class DoubleChooser():
                 elif selected == 1:
                     selected = 0
 
-                freqsCandidate = self.freqs[row]
+                freqsCandidate = list(self.freqs[row])
                 freqsCandidate[selected] = -1
                 _, secondMax = Utils_.maximo(freqsCandidate)
 
@@ -145,6 +148,15 @@ class DoubleChooser():
     
 
 
+    def numCells(self):
+        """Tells how many cells of the column of doubles the strategy fills
+
+        :returns: number of cells
+
+        """
+        return self.numDoubles
+
+
     def tellDoubles(self):
         """Tells the doubles associated to the freqs
 
@@ -182,6 +194,148 @@ class DoubleChooser():
 
 
 
+class RandomDoubleChooser(DoubleChooser):
+
+    """Selects the double rows at random, baseline for the strategies"""
+
+    def tellDoubles(self):
+        """Tells the doubles of random rows
+
+        :returns: list for the column of doubles, e.g:
+                  ['X', '', '', '1', '2', ... ]
+
+        """
+        doubleRows = random.sample(range(14), self.numDoubles)
+
+        return self.getDoubleCol(doubleRows)
+
+
+
+class SecondFreqDoubleChooser(DoubleChooser):
+
+    """Selects the rows whose second most voted sign has more votes"""
+
+    def tellDoubles(self):
+        """Tells the doubles of the rows with biggest second frequency,
+        ties are broken randomly
+
+        :returns: list for the column of doubles, e.g:
+                  ['X', '', '', '1', '2', ... ]
+
+        """
+        seconds = []
+        for matchFreqs in self.freqs:
+            seconds.append(sorted(matchFreqs)[1])
+
+        rows = list(range(14))
+        random.shuffle(rows)
+        rows.sort(key=lambda row: -seconds[row])
+
+        return self.getDoubleCol(rows[0:self.numDoubles])
+
+
+
+class TripleDoubleChooser(DoubleChooser):
+
+    """Trades each two doubles for a triple (3 columns instead of 4) in the
+    rows where the least voted sign has more votes"""
+
+    def numCells(self):
+        """Tells how many cells of the column of doubles the strategy fills,
+        one per triple plus the odd double left
+
+        :returns: number of cells
+
+        """
+        return self.numDoubles // 2 + self.numDoubles % 2
+
+
+    def tellDoubles(self):
+        """Tells the triples, a cell holds the two signs that are not the
+        mode, e.g. 'X2'. An odd double left is chosen as DoubleChooser does
+
+        :returns: list for the column of doubles, e.g:
+                  ['X2', '', '', '1', '1X', ... ]
+
+        """
+        modeIdx = {0: 1, 1: 0, 2: 2}
+        signs = ['1', 'X', '2']
+        numTriples = self.numDoubles // 2
+
+        thirds = []
+        for matchFreqs in self.freqs:
+            thirds.append(min(matchFreqs))
+
+        rows = list(range(14))
+        random.shuffle(rows)
+        rows.sort(key=lambda row: -thirds[row])
+        tripleRows = rows[0:numTriples]
+
+        doubleCol = ['' for row in range(14)]
+        if self.numDoubles % 2:
+            # Triple rows get a gap no other row can reach
+            freqs = [list(self.freqs[row]) if row not in tripleRows else
+                    [self.participants + 1, 0, 0] for row in range(14)]
+            chooser = DoubleChooser(freqs, self.modes, self.participants, 1)
+            doubleCol = chooser.tellDoubles()
+
+        for row in tripleRows:
+            mode = modeIdx[self.modes[row]]
+            doubleCol[row] = ''.join(signs[i] for i in range(3) if i != mode)
+
+        return doubleCol
+
+
+
+class OptimalDoubleChooser(DoubleChooser):
+
+    """Chooses the mix of doubles and triples covering the most votes with
+    at most the columns of `numDoubles` doubles, see DoublesOptimizer"""
+
+    def numCells(self):
+        """Tells how many cells of the column of doubles the strategy fills,
+        it depends on the votes but the doubles are deterministic
+
+        :returns: number of cells
+
+        """
+        return sum(1 for cell in self.tellDoubles() if cell != '')
+
+
+    def tellDoubles(self):
+        """Tells the doubles and triples, ties are broken with a fixed seed
+
+        :returns: list for the column of doubles, e.g:
+                  ['X2', '', '', '1', '2', ... ]
+
+        """
+        optimizer = DoublesOptimizer.DoublesOptimizer(2 ** self.numDoubles)
+
+        return optimizer.tellDoubles([self.freqs], [self.modes])[0].tolist()
+
+
+
+# Strategies selecting the doubles, they share the DoubleChooser interface
+CHOOSERS = {
+    'greedy': DoubleChooser,
+    'random': RandomDoubleChooser,
+    'second': SecondFreqDoubleChooser,
+    'triple': TripleDoubleChooser,
+    'optimal': OptimalDoubleChooser
+}
+
+
+def getChooser(name):
+    """Obtains the class of a doubles strategy
+
+    :name: name of the strategy in CHOOSERS
+    :returns: DoubleChooser class
+
+    """
+    return CHOOSERS[name]
+
+
+
 if __name__ == '__main__':
 
     # Testing
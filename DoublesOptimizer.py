@@ -0,0 +1,186 @@
+import math
+
+import numpy as np
+
+
+# Sheet mode value -> sign index, as in DoubleChooser.getDoubleCol
+MODE_INDEX = np.array([1, 0, 2])
+SIGNS = np.array(['1', 'X', '2'])
+
+# Bet of a match: the mode, a double or a triple
+SINGLE = 0
+DOUBLE = 1
+TRIPLE = 2
+
+# Scores are covered votes * SCALE + tie-break priority, the priorities of
+# the 14 matches added up stay below SCALE
+SCALE = 256
+
+
+class DoublesOptimizer():
+
+    """Chooses the doubles and triples of many groups maximizing the votes
+    covered by the group bet, i.e. its expected hits if each sign wins with
+    the share of votes it got, under a budget of 2^doubles * 3^triples
+    columns. It is solved exactly as a knapsack over the matches"""
+
+    def __init__(self, budget, seed=0):
+        """
+        :budget: maximum number of columns of the group bet
+        :seed: seed of the tie-breaks, the same seed gives the same choice
+
+        """
+        self.budget = budget
+        self.seed = seed
+        self.maxDoubles = int(math.floor(math.log(budget, 2) + 1e-9))
+        self.maxTriples = int(math.floor(math.log(budget, 3) + 1e-9))
+
+
+    def scores(self, freqs, modes):
+        """Obtains the score of betting each match as a single, a double or
+        a triple
+
+        :freqs: (groups x 14 x 3) frequencies
+        :modes: (groups x 14) modes with the sheet encoding
+        :returns: (groups x 14 x 3) int64 scores, (groups x 14) sign index
+                  of the second sign of each match
+
+        """
+        groups, rows, _ = freqs.shape
+        modeIdx = MODE_INDEX[modes]
+        modeFreqs = np.take_along_axis(freqs, modeIdx[:, :, None],
+                axis=2)[:, :, 0]
+
+        # Second sign: biggest frequency once the mode is discarded
+        masked = freqs.copy()
+        np.put_along_axis(masked, modeIdx[:, :, None], -1, axis=2)
+        second = np.argmax(masked, axis=2)
+        secondFreqs = np.take_along_axis(masked, second[:, :, None],
+                axis=2)[:, :, 0]
+
+        # Seeded ranks of the matches, upgrading higher ones wins a tie
+        rng = np.random.default_rng(self.seed)
+        priority = np.argsort(rng.random((groups, rows)), axis=1)
+
+        scores = np.empty((groups, rows, 3), dtype=np.int64)
+        scores[:, :, SINGLE] = modeFreqs * SCALE
+        scores[:, :, DOUBLE] = (modeFreqs + secondFreqs) * SCALE + priority
+        scores[:, :, TRIPLE] = freqs.sum(axis=2) * SCALE + priority
+
+        return scores, second
+
+
+    def solve(self, freqs, modes):
+        """Chooses the bet of each match, the best number of doubles and
+        triples for each group within the budget
+
+        :freqs: (groups x 14 x 3) frequencies
+        :modes: (groups x 14) modes with the sheet encoding
+        :returns: (groups x 14) array with SINGLE, DOUBLE or TRIPLE, and
+                  (groups x 14) sign index of the second sign of each match
+
+        """
+        freqs = np.asarray(freqs, dtype=np.int64)
+        modes = np.asarray(modes, dtype=np.int64)
+        groups, rows, _ = freqs.shape
+        scores, second = self.scores(freqs, modes)
+
+        # best[g, d, t]: best score of the matches so far with d doubles
+        # and t triples
+        numD, numT = self.maxDoubles + 1, self.maxTriples + 1
+        unreachable = np.iinfo(np.int64).min // 2
+        best = np.full((groups, numD, numT), unreachable, dtype=np.int64)
+        best[:, 0, 0] = 0
+        choices = np.zeros((rows, groups, numD, numT), dtype=np.int8)
+
+        for row in range(rows):
+            rowScores = scores[:, row, :, None, None]
+            new = best + rowScores[:, SINGLE]
+            choice = np.zeros(best.shape, dtype=np.int8)
+
+            double = np.full(best.shape, unreachable, dtype=np.int64)
+            double[:, 1:, :] = best[:, :-1, :] + rowScores[:, DOUBLE]
+            better = double > new
+            new[better] = double[better]
+            choice[better] = DOUBLE
+
+            triple = np.full(best.shape, unreachable, dtype=np.int64)
+            triple[:, :, 1:] = best[:, :, :-1] + rowScores[:, TRIPLE]
+            better = triple > new
+            new[better] = triple[better]
+            choice[better] = TRIPLE
+
+            best = np.maximum(new, unreachable)
+            choices[row] = choice
+
+        # Drop the combinations over the budget, ties go to fewer doubles
+        cost = (2 ** np.arange(numD))[:, None] * (3 ** np.arange(numT))
+        best[:, cost > self.budget] = unreachable
+        flat = np.argmax(best.reshape(groups, -1), axis=1)
+        doubles, triples = np.unravel_index(flat, (numD, numT))
+
+        bets = np.zeros((groups, rows), dtype=np.int8)
+        groupIdx = np.arange(groups)
+        for row in reversed(range(rows)):
+            choice = choices[row, groupIdx, doubles, triples]
+            bets[:, row] = choice
+            doubles = doubles - (choice == DOUBLE)
+            triples = triples - (choice == TRIPLE)
+
+        return bets, second
+
+
+    def tellDoubles(self, freqs, modes):
+        """Tells the doubles and triples of every group, a double cell holds
+        the second sign and a triple one the two signs that are not the
+        mode, as TripleDoubleChooser does
+
+        :freqs: (groups x 14 x 3) frequencies of each sign
+        :modes: (groups x 14) modes with the sheet encoding
+        :returns: (groups x 14) array with the double columns, e.g.
+                  [['X', '', 'X2', '1', '', ...], ...]
+
+        """
+        bets, second = self.solve(freqs, modes)
+        modeIdx = MODE_INDEX[np.asarray(modes, dtype=np.int64)]
+
+        # Signs that are not the mode in '1', 'X', '2' order
+        others = np.sort(np.stack([(modeIdx + 1) % 3, (modeIdx + 2) % 3],
+            axis=2), axis=2)
+        triples = np.char.add(SIGNS[others[:, :, 0]], SIGNS[others[:, :, 1]])
+
+        doubleCols = np.full(bets.shape, '', dtype='<U2')
+        doubleCols[bets == DOUBLE] = SIGNS[second][bets == DOUBLE]
+        doubleCols[bets == TRIPLE] = triples[bets == TRIPLE]
+
+        return doubleCols
+
+
+
+if __name__ == '__main__':
+
+    # Testing
+
+    freqs = [
+    [0,2,4],
+    [3,2,1],
+    [4,2,0],
+    [2,4,0],
+    [6,0,0],
+    [3,1,2],
+    [4,1,1],
+    [2,1,3],
+    [6,0,0],
+    [6,0,0],
+    [3,2,1],
+    [5,1,0],
+    [4,1,1],
+    [6,0,0]
+    ]
+
+    mode = [2, 1, 1, 0, 1, 1, 1, 2, 1, 1, 1, 1, 1, 1]
+
+    optimizer = DoublesOptimizer(2 ** 7, seed=0)
+    doubles = optimizer.tellDoubles([freqs] * 3, [mode] * 3)
+
+    print(doubles)
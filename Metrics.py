@@ -0,0 +1,244 @@
+import os
+import threading
+import time
+
+import Tracing
+
+
+# State of the daemon running in each thread, used to tag the requests
+local = threading.local()
+
+
+def setState(state):
+    """Tags the requests of the current thread with a daemon state
+
+    :state: 'NEW', 'COMPLETED', 'FINISHED' or None
+    :returns: None
+
+    """
+    local.state = state
+
+
+def getState():
+    """Obtains the daemon state of the current thread
+    :returns: state name, 'NONE' if there is no state
+
+    """
+    return getattr(local, 'state', None) or 'NONE'
+
+
+def errorStatus(error):
+    """Obtains the HTTP status of a failed request
+
+    :error: exception raised by the request
+    :returns: status as string, 'error' if the request got no response
+
+    """
+    # Google client and SheetsError expose `resp`, requests `response`
+    resp = getattr(error, 'resp', None)
+    if resp is not None and getattr(resp, 'status', None) is not None:
+        return str(resp.status)
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None):
+        return str(response.status_code)
+
+    return 'error'
+
+
+
+class Histogram():
+
+    """Cumulative histogram with Prometheus buckets"""
+
+    BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+    def __init__(self):
+        self.counts = [0 for bucket in self.BUCKETS]
+        self.count = 0
+        self.sum = 0.0
+
+
+    def observe(self, value):
+        """Adds a value to the histogram
+
+        :value: observed value
+        :returns: None
+
+        """
+        for i, bucket in enumerate(self.BUCKETS):
+            if value <= bucket:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+
+class Metrics():
+
+    """Registry with the calls, latencies, bytes and errors of the Sheets
+    API and the results site, per method and daemon state"""
+
+    def __init__(self, textfile=None):
+        """
+        :textfile: path of the Prometheus text file written by `flush`,
+                   None to not write it
+
+        """
+        self.textfile = textfile
+        self.lock = threading.Lock()
+        self.calls = dict()
+        self.latencies = dict()
+        self.bytes = dict()
+        self.errors = dict()
+
+
+    def observe(self, api, method, seconds, size, status=None):
+        """Records a request
+
+        :api: 'sheets' or 'scraper'
+        :method: method of the request, e.g. 'values.batchGet'
+        :seconds: latency of the request
+        :size: bytes of the response
+        :status: HTTP status as string if the request failed
+        :returns: None
+
+        """
+        key = (api, method, getState())
+        with self.lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+            if key not in self.latencies:
+                self.latencies[key] = Histogram()
+            self.latencies[key].observe(seconds)
+            self.bytes[key] = self.bytes.get(key, 0) + size
+            if status is not None:
+                errorKey = key + (status,)
+                self.errors[errorKey] = self.errors.get(errorKey, 0) + 1
+
+
+    def execute(self, method, request):
+        """Executes a Sheets API request recording it, the bytes of the
+        response are the ones the backend counted on the request (see
+        SheetsBackend), 0 if it did not count them
+
+        :method: method of the request, e.g. 'values.batchGet'
+        :request: request with an `execute()` method
+        :returns: response of the request
+
+        """
+        start = time.perf_counter()
+        try:
+            result = request.execute()
+        except Exception as error:
+            self.observe('sheets', method, time.perf_counter() - start, 0,
+                    errorStatus(error))
+            raise
+        self.observe('sheets', method, time.perf_counter() - start,
+                getattr(request, 'responseBytes', 0))
+
+        return result
+
+
+    def get(self, session, url, **kwargs):
+        """Performs a GET of the results site recording it, responses with
+        an error status are counted as errors
+
+        :session: requests session
+        :url: URL to get
+        :returns: response
+
+        """
+        start = time.perf_counter()
+        try:
+            response = session.get(url, **kwargs)
+        except Exception as error:
+            self.observe('scraper', 'get', time.perf_counter() - start, 0,
+                    errorStatus(error))
+            raise
+        status = str(response.status_code)\
+                if response.status_code >= 400 else None
+        self.observe('scraper', 'get', time.perf_counter() - start,
+                len(response.content), status)
+
+        return response
+
+
+    def render(self):
+        """Renders the metrics in the Prometheus text format
+        :returns: text
+
+        """
+        def labels(api, method, state, extra=''):
+            return '{api="' + api + '",method="' + method + '",state="' +\
+                    state + '"' + extra + '}'
+
+        lines = []
+        with self.lock:
+            lines.append('# TYPE quinielas_requests_total counter')
+            for key, calls in sorted(self.calls.items()):
+                lines.append('quinielas_requests_total' + labels(*key) +
+                        ' ' + str(calls))
+
+            lines.append('# TYPE quinielas_request_errors_total counter')
+            for key, errors in sorted(self.errors.items()):
+                lines.append('quinielas_request_errors_total' +
+                        labels(*key[0:3], extra=',status="' + key[3] + '"') +
+                        ' ' + str(errors))
+
+            lines.append('# TYPE quinielas_response_bytes_total counter')
+            for key, size in sorted(self.bytes.items()):
+                lines.append('quinielas_response_bytes_total' + labels(*key) +
+                        ' ' + str(size))
+
+            lines.append('# TYPE quinielas_request_seconds histogram')
+            for key, histogram in sorted(self.latencies.items()):
+                for bucket, count in zip(histogram.BUCKETS,
+                        histogram.counts):
+                    lines.append('quinielas_request_seconds_bucket' +
+                            labels(*key, extra=',le="' + str(bucket) + '"') +
+                            ' ' + str(count))
+                lines.append('quinielas_request_seconds_bucket' +
+                        labels(*key, extra=',le="+Inf"') + ' ' +
+                        str(histogram.count))
+                lines.append('quinielas_request_seconds_sum' + labels(*key) +
+                        ' ' + repr(histogram.sum))
+                lines.append('quinielas_request_seconds_count' +
+                        labels(*key) + ' ' + str(histogram.count))
+
+        return '\n'.join(lines) + '\n'
+
+
+    def flush(self):
+        """Writes the Prometheus text file atomically, for the textfile
+        collector of node_exporter
+        :returns: None
+
+        """
+        if not self.textfile:
+            return
+
+        tmpPath = self.textfile + '.tmp.' + str(threading.get_ident())
+        with open(tmpPath, 'w') as textF:
+            textF.write(self.render())
+        os.replace(tmpPath, self.textfile)
+
+
+
+def createMetrics(config):
+    """Creates the metrics of the configuration, serving them if
+    `metricsPort` is set
+
+    :config: configuration, with `metricsFile` and `metricsPort`
+    :returns: Metrics, None if none of the keys is set
+
+    """
+    if not config.get('metricsFile') and config.get('metricsPort') is None:
+        return None
+
+    metrics = Metrics(config.get('metricsFile'))
+    if config.get('metricsPort') is not None:
+        from MetricsServer import MetricsServer
+        server = MetricsServer(metrics, config.get('metricsHost',
+            '127.0.0.1'), config['metricsPort'])
+        Tracing.log('serving metrics', url=server.start())
+
+    return metrics
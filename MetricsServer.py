@@ -0,0 +1,56 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+
+    """Handler serving the metrics at /metrics"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        content = self.server.metrics.render().encode('utf8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+
+class MetricsServer(ThreadingHTTPServer):
+
+    """Local HTTP server exposing the metrics to Prometheus"""
+
+    daemon_threads = True
+
+    def __init__(self, metrics, host='127.0.0.1', port=0):
+        """
+        :metrics: Metrics instance
+        :host: address to listen
+        :port: port to listen, a free one if 0
+
+        """
+        ThreadingHTTPServer.__init__(self, (host, port), MetricsHandler)
+        self.metrics = metrics
+
+
+    def start(self):
+        """Serves the metrics in a background thread
+        :returns: URL of the metrics
+
+        """
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        return 'http://' + self.server_address[0] + ':' +\
+                str(self.server_address[1]) + '/metrics'
@@ -0,0 +1,111 @@
+import time
+from datetime import datetime
+
+
+class PollScheduler():
+
+    """Decides how long the daemon waits before next tick. It polls densely
+    while matches are being played, sleeps until next kickoff otherwise,
+    and backs off exponentially while checks keep giving the same answer"""
+
+    def __init__(self, periodLive, matchLength, backoffFactor, periodMax):
+        """
+        :periodLive: seconds between polls while a match is being played
+        :matchLength: seconds since kickoff a match is considered live
+        :backoffFactor: growth of the waiting time on each repeated answer
+        :periodMax: maximum seconds to wait
+
+        """
+        self.periodLive = periodLive
+        self.matchLength = matchLength
+        self.backoffFactor = backoffFactor
+        self.periodMax = periodMax
+        self.kickoffs = []
+        self.lastAnswers = dict()
+        self.repeated = dict()
+
+
+    def parseKickoff(self, kickoff):
+        """Translates an ISO kickoff date to a timestamp
+
+        :kickoff: ISO date, e.g. '2017-01-22T20:45:00+01:00'
+        :returns: seconds since epoch, None if it can't be parsed
+
+        """
+        try:
+            return datetime.fromisoformat(kickoff).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+
+    def setMatches(self, matches):
+        """Takes the kickoff times of the football day matches
+
+        :matches: matches as returned by `QuinielaScraper.getMatches`
+        :returns: None
+
+        """
+        kickoffs = [self.parseKickoff(match.get('kickoff'))
+                for match in matches]
+        self.kickoffs = sorted(kickoff for kickoff in kickoffs
+                if kickoff is not None)
+
+
+    def observe(self, key, answer):
+        """Records the answer of a check, repeated answers make the
+        waiting time grow. Switching to another check (i.e., the daemon
+        changed its state) starts again from the base period.
+
+        :key: name of the check, e.g. 'colsFilled'
+        :answer: value returned by the check
+        :returns: None
+
+        """
+        if key not in self.lastAnswers:
+            self.lastAnswers = dict()
+            self.repeated = dict()
+
+        if key in self.lastAnswers and self.lastAnswers[key] == answer:
+            self.repeated[key] += 1
+        else:
+            self.repeated[key] = 0
+        self.lastAnswers[key] = answer
+
+
+    def backoff(self, key, period):
+        """Obtains the waiting time of a check after backing off
+
+        :key: name of the check
+        :period: base period of the check
+        :returns: seconds
+
+        """
+        repeated = min(self.repeated.get(key, 0), 32)
+        return min(period * self.backoffFactor ** repeated,
+                max(period, self.periodMax))
+
+
+    def nextWait(self, key, period, live=False, now=None):
+        """Obtains the seconds to wait before next tick
+
+        :key: name of the check that decides the state transition
+        :period: base period of the current state
+        :live: True if the kickoff times apply to the current state
+        :now: current timestamp, current time if None
+        :returns: seconds
+
+        """
+        wait = self.backoff(key, period)
+        if not live or not self.kickoffs:
+            return wait
+
+        now = time.time() if now is None else now
+        for kickoff in self.kickoffs:
+            # Match being played
+            if kickoff <= now <= kickoff + self.matchLength:
+                return min(wait, self.periodLive)
+            # Do not sleep past next kickoff
+            if kickoff > now:
+                return max(0, min(wait, kickoff - now))
+
+        return wait
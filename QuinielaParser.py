@@ -0,0 +1,246 @@
+import os
+import sys
+
+
+class SoupParser():
+
+    """Reference parser of the AS quiniela page built on BeautifulSoup"""
+
+    def parsePleno15(self, soup):
+        """Obtains the pleno al 15 match
+
+        :soup: BeautifulSoup of the page
+        :returns: {
+                'local': R. Madrid,
+                'visiting': Barcelona,
+                'result': '0--M',
+                'kickoff': '2017-01-22T20:45:00+01:00' or ''
+                }
+
+        """
+        matchLoc = soup.select('table.pleno-15 tr')[1]
+        nameLoc = matchLoc.select('td.enfrentamientos')[0].a.span.text
+        resulLoc = matchLoc.select('td.quini')[0].select('span.signo-def')
+
+        matchVis = soup.select('table.pleno-15 tr')[2]
+        nameVis = matchVis.select('td.enfrentamientos')[0].a.span.text
+        resulVis = matchVis.select('td.quini')[0].select('span.signo-def')
+
+        resul = ''
+        if resulLoc:
+            resul = resulLoc[0].text + '--' + resulVis[0].text
+
+        kickoff = soup.select('table.pleno-15 td.fecha time')
+        kickoff = kickoff[0].get('datetime', '') if kickoff else ''
+
+        return {'local': nameLoc,
+                'visiting': nameVis,
+                'result': resul,
+                'kickoff': kickoff}
+
+
+    def parseMatch(self, soup, x):
+        """Obtains the match x within the parser
+
+        :soup: BeautifulSoup of the page
+        :x: number of the match
+        :returns: {
+                'local': R. Madrid,
+                'visiting': Valencia,
+                'result': 'x' or '0--M',
+                'kickoff': '2017-01-22T20:45:00+01:00' or ''
+                }
+
+        """
+        # Check if requested is pleno al 15
+        if x==15:
+            return self.parsePleno15(soup)
+
+        match = soup.select('table.tabla-quiniela tr')[x]
+        result = match.select('td.quini')[0].select('span.signo-def')
+        if not result:
+            result = ''
+        else:
+            result = result[0].text
+
+        kickoff = match.select('td.fecha time')
+        kickoff = kickoff[0].get('datetime', '') if kickoff else ''
+
+        return {'local': match.select('td')[1].a.span.text,
+                'visiting': match.select('td')[2].a.span.text,
+                'result': result,
+                'kickoff': kickoff}
+
+
+    def parse(self, html):
+        """Parses the 15 matches of a quiniela page
+
+        :html: text of the page
+        :returns: list with the 15 matches, see `parseMatch`
+
+        """
+        # Imported on first use, it is slow to import
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, "lxml")
+        matches = []
+        for i in range(15):
+            matches.append(self.parseMatch(soup, i+1))
+        soup.decompose()
+
+        return matches
+
+
+
+class LxmlParser():
+
+    """Fast parser of the AS quiniela page, it walks the quiniela and the
+    pleno al 15 tables once with lxml"""
+
+    QUINIELA = ('//table[contains(concat(" ", normalize-space(@class), " "),'
+            ' " tabla-quiniela ")]//tr')
+    PLENO = ('//table[contains(concat(" ", normalize-space(@class), " "),'
+            ' " pleno-15 ")]//tr')
+    QUINI = ('.//td[contains(concat(" ", normalize-space(@class), " "),'
+            ' " quini ")]')
+    SIGNODEF = ('.//span[contains(concat(" ", normalize-space(@class), " "),'
+            ' " signo-def ")]')
+    ENFRENTAMIENTOS = ('.//td[contains(concat(" ", normalize-space(@class),'
+            ' " "), " enfrentamientos ")]')
+    KICKOFF = ('.//td[contains(concat(" ", normalize-space(@class), " "),'
+            ' " fecha ")]//time/@datetime')
+
+
+    def teamName(self, td):
+        """Obtains the team name inside a cell
+
+        :td: cell element
+        :returns: team name
+
+        """
+        return td.find('.//a').find('.//span').text_content()
+
+
+    def result(self, row):
+        """Obtains the definitive sign of a row
+
+        :row: row element
+        :returns: sign or '' if there is no result
+
+        """
+        signs = row.xpath(self.QUINI)[0].xpath(self.SIGNODEF)
+        return signs[0].text_content() if signs else ''
+
+
+    def kickoff(self, element):
+        """Obtains the first kickoff time inside an element
+
+        :element: row or table element
+        :returns: ISO date or '' if not present
+
+        """
+        kickoff = element.xpath(self.KICKOFF)
+        return str(kickoff[0]) if kickoff else ''
+
+
+    def parse(self, html):
+        """Parses the 15 matches of a quiniela page
+
+        :html: text of the page
+        :returns: list with the 15 matches, see `SoupParser.parseMatch`
+
+        """
+        import lxml.html
+        doc = lxml.html.fromstring(html)
+        rows = doc.xpath(self.QUINIELA)
+        plenoRows = doc.xpath(self.PLENO)
+
+        matches = []
+        for row in rows[1:15]:
+            tds = row.findall('.//td')
+            matches.append({'local': self.teamName(tds[1]),
+                'visiting': self.teamName(tds[2]),
+                'result': self.result(row),
+                'kickoff': self.kickoff(row)})
+
+        rowLoc, rowVis = plenoRows[1], plenoRows[2]
+        resulLoc, resulVis = self.result(rowLoc), self.result(rowVis)
+        matches.append({
+            'local': self.teamName(rowLoc.xpath(self.ENFRENTAMIENTOS)[0]),
+            'visiting': self.teamName(rowVis.xpath(self.ENFRENTAMIENTOS)[0]),
+            'result': resulLoc + '--' + resulVis if resulLoc else '',
+            'kickoff': self.kickoff(rowLoc.getparent())})
+
+        # Free the DOM right away
+        del rows, plenoRows, rowLoc, rowVis
+        doc.getroottree().getroot().clear()
+
+        return matches
+
+
+
+class JsonParser():
+
+    """Parser of the results published as JSON by other providers, either a
+    list with the 15 matches or an object with them under `matches`"""
+
+    def parse(self, text):
+        """Parses the 15 matches of a JSON document
+
+        :text: text of the document
+        :returns: list with the 15 matches, see `SoupParser.parseMatch`
+
+        """
+        import json
+        doc = json.loads(text)
+        if isinstance(doc, dict):
+            doc = doc.get('matches', [])
+
+        return [{'local': match.get('local', ''),
+            'visiting': match.get('visiting', ''),
+            'result': match.get('result') or '',
+            'kickoff': match.get('kickoff') or ''} for match in doc]
+
+
+
+PARSERS = {
+    'soup': SoupParser,
+    'fast': LxmlParser,
+    'json': JsonParser
+}
+
+
+def getParser(name):
+    """Creates a parser backend
+
+    :name: 'soup' (reference), 'fast' or 'json'
+    :returns: parser instance
+
+    """
+    return PARSERS[name]()
+
+
+def compareBackends(html):
+    """Checks that the fast backend matches the reference one
+
+    :html: text of a quiniela page
+    :returns: list with the numbers of the mismatching matches
+
+    """
+    reference = SoupParser().parse(html)
+    fast = LxmlParser().parse(html)
+
+    return [i+1 for i in range(15) if reference[i] != fast[i]]
+
+
+
+if __name__ == '__main__':
+    # Check the backends against the recorded pages
+    fixtures = sys.argv[1] if len(sys.argv) > 1 else 'fixtures'
+    for name in sorted(os.listdir(fixtures)):
+        if not name.endswith('.html'):
+            continue
+        with open(os.path.join(fixtures, name), 'rb') as f:
+            html = f.read().decode('utf8')
+        mismatches = compareBackends(html)
+        print(name + ': ' + ('OK' if not mismatches else
+            'mismatches in ' + str(mismatches)))
@@ -1,23 +1,37 @@
-from bs4 import BeautifulSoup
-import requests
+import QuinielaParser
+import Tracing
+from ScraperTransport import ScraperTransport
 
 class QuinielaScraper:
     """Web scrapper to get quiniela results """
 
+    URL = 'http://resultados.as.com/quiniela/{season}/jornada_{footballDay}'
 
-    def __init__(self, season):
+
+    def __init__(self, season, transport=None, parser='fast', url=None,
+            events=None):
         """Creates the scraper
 
         :season: '2016_2017'
+        :transport: ScraperTransport used to download the pages, a default
+                    one is created if not provided
+        :parser: parser backend, 'fast', 'soup' (reference) or 'json'
+        :url: pattern of the football day URL with `{season}` and
+              `{footballDay}` fields, the AS page if None
+        :events: ResultEvents receiving each fetch of matches, None to not
+                 emit events
 
         """
         self.season = season
-        self.url = 'http://resultados.as.com/quiniela'
+        self.transport = transport if transport else ScraperTransport()
+        self.parser = QuinielaParser.getParser(parser)
+        self.url = url if url else self.URL
+        self.events = events
         self.lastDay = None
         self.matches = None
-        self.scraper = None
         self.currDay = None
-        pass
+        # Last parsed matches of each football day
+        self.parsed = dict()
 
 
     def getMatch(self, x):
@@ -42,78 +56,82 @@ class QuinielaScraper:
         return self.matches
 
 
-    def parsePleno15(self):
-        """Obtains the pleno al 15 match
-        :returns: {
-                'local': R. Madrid,
-                'visiting': Barcelona,
-                'result': '0--M'
-                }
+    def downloadMatches(self, footballDay):
+        """Downloads the matches of footballDay, the page is only parsed
+        again if it changed. It does not change the current day, so several
+        football days can be downloaded at the same time
+
+        :footballDay: number of football day
+        :returns: matches, see `getMatches`
 
         """
-        matchLoc = self.scraper.select('table.pleno-15 tr')[1]
-        nameLoc = matchLoc.select('td.enfrentamientos')[0].a.span.text
-        resulLoc = matchLoc.select('td.quini')[0].select('span.signo-def')
+        asQuiniela, notModified = self.transport.fetch(self.url.format(
+            season=self.season, footballDay=footballDay), self.season,
+            footballDay)
 
-        matchVis = self.scraper.select('table.pleno-15 tr')[2]
-        nameVis = matchVis.select('td.enfrentamientos')[0].a.span.text
-        resulVis = matchVis.select('td.quini')[0].select('span.signo-def')
+        # Same page already parsed
+        matches = self.parsed.get(footballDay)
+        if notModified and matches:
+            return matches
 
-        resul = ''
-        if resulLoc:
-            resul = resulLoc[0].text + '--' + resulVis[0].text
+        with Tracing.span('parse', jornada=footballDay):
+            matches = self.parser.parse(asQuiniela)
+        self.parsed[footballDay] = matches
 
-        return {'local': nameLoc,
-                'visiting': nameVis,
-                'result': resul}
+        # Finished days are served from cache from now on
+        if allResults(matches):
+            self.transport.markFinished(self.season, footballDay)
 
+        return matches
 
-    def parseMatch(self, x):
-        """Obtains the match x within the parser
 
-        :x: number of the match
-        :returns: {
-                'local': R. Madrid,
-                'visiting': Valencia,
-                'result': 'x' or '0--M'
-                }
+    def getFootballDay(self, footballDay):
+        """Gets matches of footballDay and stores it in the scraper
+
+        :footballDay: number of football day
+        :returns: None
 
         """
-        # Check if requested is pleno al 15
-        if x==15:
-            return self.parsePleno15()
+        self.matches = self.downloadMatches(footballDay)
+        self.currDay = footballDay
 
-        match = self.scraper.select('table.tabla-quiniela tr')[x]
-        result = match.select('td.quini')[0].select('span.signo-def')
-        if not result:
-            result = ''
-        else:
-            result = result[0].text
 
-        return {'local': match.select('td')[1].a.span.text,
-                'visiting': match.select('td')[2].a.span.text,
-                'result': result}
+    def fetchMatches(self, footballDay):
+        """Gets the matches of footballDay
 
+        :footballDay: number of football day
+        :returns: matches, see `getMatches`
 
-    def getFootballDay(self, footballDay):
-        """Gets matches of footballDay and stores it in the scraper
+        """
+        matches = self.downloadMatches(footballDay)
+        self.matches, self.currDay = matches, footballDay
+        if self.events is not None:
+            self.events.observe(self.season, footballDay, matches)
+
+        return matches
 
-        :footballDay: number of football day
-        :returns: None
+
+    def dayFinished(self):
+        """Checks if all the matches of the current day have a result
+        :returns: boolean
 
         """
-        self.currDay = footballDay
-        asQuiniela = requests.get(self.url + '/' + self.season +
-                '/jornada_' + str(footballDay))
-        asQuiniela = asQuiniela.text
-        self.scraper = BeautifulSoup(asQuiniela, "lxml")
+        return allResults(self.matches)
+
+
+
+def allResults(matches):
+    """Checks if all the matches have a result
+
+    :matches: matches, see `QuinielaScraper.getMatches`
+    :returns: boolean
 
+    """
+    finished = True
+    for match in matches:
+        finished = finished and match['result'] != ''
 
-        # Add all matches
-        self.matches = []
-        for i in range(15):
-            partido = self.parseMatch(i+1)
-            self.matches.append(partido)
+    return finished
 
 
 if __name__ == '__main__':
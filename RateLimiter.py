@@ -0,0 +1,279 @@
+import copy
+import fcntl
+import json
+import random
+import threading
+import time
+
+import Tracing
+from Metrics import errorStatus
+
+
+class TokenBucket():
+
+    """Thread safe token bucket pacing the requests to a per-minute quota"""
+
+    def __init__(self, perMinute, burst, clock=time.monotonic,
+            sleep=time.sleep):
+        """
+        :perMinute: tokens added each minute
+        :burst: maximum tokens stored
+        :clock: function returning the current time in seconds
+        :sleep: function waiting a number of seconds
+
+        """
+        self.rate = perMinute / 60.0
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.lastTime = clock()
+        self.lock = threading.Lock()
+
+
+    def refill(self, tokens, lastTime, now):
+        """Takes a token from the bucket, which may be left in debt
+
+        :tokens: tokens stored at `lastTime`
+        :lastTime: time of the last refill
+        :now: current time
+        :returns: (tokens left, seconds to wait for the token)
+
+        """
+        tokens = min(self.burst, tokens + max(0, now - lastTime) * self.rate)
+        # The token is reserved now, so waiting threads keep their turn
+        tokens -= 1
+        return tokens, -tokens / self.rate if tokens < 0 else 0
+
+
+    def take(self):
+        """Reserves a token
+        :returns: seconds to wait for it
+
+        """
+        with self.lock:
+            now = self.clock()
+            self.tokens, wait = self.refill(self.tokens, self.lastTime, now)
+            self.lastTime = now
+
+        return wait
+
+
+    def acquire(self):
+        """Takes a token, blocking until there is one
+        :returns: seconds waited
+
+        """
+        wait = self.take()
+        if wait > 0:
+            with Tracing.span('quota'):
+                self.sleep(wait)
+
+        return wait
+
+
+
+class FileTokenBucket(TokenBucket):
+
+    """Token bucket kept in a file, so the processes using the same file
+    share the quota. The file is locked while a token is taken."""
+
+    def __init__(self, path, perMinute, burst, clock=time.time,
+            sleep=time.sleep):
+        """
+        :path: file storing the tokens and the time of the last refill
+        :perMinute: tokens added each minute
+        :burst: maximum tokens stored
+        :clock: function returning the current time in seconds, it must be
+                the same for all the processes
+        :sleep: function waiting a number of seconds
+
+        """
+        TokenBucket.__init__(self, perMinute, burst, clock, sleep)
+        self.path = path
+
+
+    def take(self):
+        """Reserves a token of the file
+        :returns: seconds to wait for it
+
+        """
+        with self.lock, open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = json.loads(f.read())
+                tokens, lastTime = state['tokens'], state['lastTime']
+            except (ValueError, KeyError, TypeError):
+                tokens, lastTime = float(self.burst), self.clock()
+
+            now = self.clock()
+            tokens, wait = self.refill(tokens, lastTime, now)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps({'tokens': tokens, 'lastTime': now}))
+            f.flush()
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+        return wait
+
+
+
+class Flight():
+
+    """Read in progress that other threads can wait for"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+
+class RateLimiter():
+
+    """Client side limiter shared by the SheetsOperators of a process: paces
+    the requests with a token bucket, retries 429 and 5xx answers with
+    jittered exponential back-off and coalesces identical concurrent
+    reads"""
+
+    def __init__(self, perMinute=60, burst=10, retries=5, baseDelay=1,
+            maxDelay=64, bucket=None, sleep=time.sleep, rand=random):
+        """
+        :perMinute: requests allowed each minute
+        :burst: requests that can be sent at once
+        :retries: retries of a failed request before raising its error
+        :baseDelay: seconds to wait before the first retry
+        :maxDelay: maximum seconds to wait between two retries
+        :bucket: TokenBucket pacing the requests, a new one if None
+        :sleep: function waiting a number of seconds
+        :rand: random generator of the jitter
+
+        """
+        self.bucket = bucket or TokenBucket(perMinute, burst, sleep=sleep)
+        self.sleep = sleep
+        self.rand = rand
+        self.retries = retries
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self.lock = threading.Lock()
+        self.flights = dict()
+
+
+    def retryable(self, error):
+        """Tells if a failed request should be retried
+
+        :error: exception raised by the request
+        :returns: True for quota (429), server (5xx) and network errors
+
+        """
+        status = errorStatus(error)
+        if status == 'error':
+            return isinstance(error, OSError)
+
+        return status == '429' or status.startswith('5')
+
+
+    def delay(self, attempt):
+        """Obtains the seconds to wait before a retry, with full jitter
+
+        :attempt: number of the retry, starting at 0
+        :returns: seconds
+
+        """
+        return self.rand.uniform(0, min(self.maxDelay,
+            self.baseDelay * 2 ** attempt))
+
+
+    def send(self, run):
+        """Sends a request when the quota allows it, retrying it
+
+        :run: function sending the request
+        :returns: response of the request
+
+        """
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                return run()
+            except Exception as error:
+                if attempt >= self.retries or not self.retryable(error):
+                    raise
+                wait = self.delay(attempt)
+                Tracing.log('request failed, retrying',
+                        status=errorStatus(error), retryIn=round(wait, 2))
+                with Tracing.span('backoff', status=errorStatus(error)):
+                    self.sleep(wait)
+                attempt += 1
+
+
+    def call(self, run, key=None):
+        """Sends a request, reads with the same `key` running at the same
+        time are sent once and all the callers get its response
+
+        :run: function sending the request
+        :key: hashable identifying a read, None for writes
+        :returns: response of the request
+
+        """
+        if key is None:
+            return self.send(run)
+
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = Flight()
+                self.flights[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = self.send(run)
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+        return copy.deepcopy(flight.result)
+
+
+
+limiters = dict()
+limitersLock = threading.Lock()
+
+
+def createLimiter(config):
+    """Obtains the rate limiter of the configuration. The quota belongs to
+    the API project, so every operator of the process gets the same
+    limiter, and with `quotaFile` the processes using that file share the
+    token bucket.
+
+    :config: configuration, with `quotaPerMinute`, `quotaBurst`,
+             `retries`, `retryDelay`, `retryMaxDelay` and `quotaFile`
+    :returns: RateLimiter
+
+    """
+    quotaFile = config.get('quotaFile')
+    with limitersLock:
+        if quotaFile not in limiters:
+            perMinute = config.get('quotaPerMinute', 60)
+            burst = config.get('quotaBurst', 10)
+            bucket = None
+            if quotaFile:
+                bucket = FileTokenBucket(quotaFile, perMinute, burst)
+            limiters[quotaFile] = RateLimiter(perMinute, burst,
+                    config.get('retries', 5),
+                    config.get('retryDelay', 1),
+                    config.get('retryMaxDelay', 64),
+                    bucket)
+
+        return limiters[quotaFile]
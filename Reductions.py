@@ -0,0 +1,236 @@
+import itertools
+import math
+
+import numpy as np
+
+from BetMatrix import MODE_VALUES, SIGNS, SIGN_INDEX
+
+
+MATCHES = 14
+# Weight of each match in a packed column, the first match is the least
+# significant base-3 digit
+POW3 = 3 ** np.arange(MATCHES, dtype=np.int32)
+# Masks of the signs of a match, a bit per sign index
+ALL_SIGNS = 0b111
+# Maximum number of entries of the neighbours array built by greedyCover
+MAX_REACH = 1 << 24
+
+
+def pack(columns):
+    """Packs columns of signs as base-3 integers, 3^14 fits in an int32
+
+    :columns: int array (columns x 14) with sign indexes (0-2)
+    :returns: int32 array (columns)
+
+    """
+    columns = np.asarray(columns, dtype=np.int32).reshape(-1, MATCHES)
+    return columns.dot(POW3).astype(np.int32)
+
+
+def unpack(codes):
+    """Unpacks base-3 integers to columns of signs
+
+    :codes: int array (columns)
+    :returns: int8 array (columns x 14) with sign indexes (0-2)
+
+    """
+    codes = np.asarray(codes, dtype=np.int32).reshape(-1, 1)
+    return ((codes // POW3) % 3).astype(np.int8)
+
+
+def systemMasks(modes, doubleCol):
+    """Obtains the signs bet on each match by the group: the mode plus the
+    doubles or triples of the cell
+
+    :modes: modes of the 14 matches with the sheet encoding
+    :doubleCol: column of doubles, e.g. ['X', '', 'X2', ...]
+    :returns: int array (14) with a bit per sign index
+
+    """
+    doubleCol = list(doubleCol) + [u''] * (MATCHES - len(doubleCol))
+    # The mode encoding swaps '1' and 'X', so it is its own inverse
+    masks = 1 << MODE_VALUES[np.asarray(modes)]
+    for row, cell in enumerate(doubleCol[0:MATCHES]):
+        for sign in cell.upper():
+            if sign in SIGN_INDEX:
+                masks[row] |= 1 << SIGN_INDEX[sign]
+
+    return masks
+
+
+def systemSize(masks):
+    """Obtains the number of columns of a system
+
+    :masks: int array (14) with a bit per sign index
+    :returns: number of columns
+
+    """
+    size = 1
+    for mask in masks:
+        size *= bin(int(mask)).count('1')
+
+    return size
+
+
+def expand(masks):
+    """Lists every column of a system, i.e. the cartesian product of the
+    signs of each match
+
+    :masks: int array (14) with a bit per sign index
+    :returns: sorted int32 array with the packed columns
+
+    """
+    codes = np.zeros(1, dtype=np.int32)
+    for match in range(MATCHES):
+        signs = np.array([sign for sign in range(3)
+            if masks[match] >> sign & 1], dtype=np.int32)
+        codes = (codes[:, None] + signs[None, :] * POW3[match]).ravel()
+
+    return np.sort(codes)
+
+
+def outcomes(masks, failures=0):
+    """Lists the results of the 14 matches with at most `failures` of them
+    outside the signs of the system
+
+    :masks: int array (14) with a bit per sign index
+    :failures: maximum number of matches missed by the system
+    :returns: sorted int32 array with the packed results
+
+    """
+    masks = np.asarray(masks)
+    missable = [match for match in range(MATCHES)
+            if masks[match] != ALL_SIGNS]
+    parts = [expand(masks)]
+    for n in range(1, failures + 1):
+        for missed in itertools.combinations(missable, n):
+            masks_ = masks.copy()
+            masks_[list(missed)] = ALL_SIGNS & ~masks_[list(missed)]
+            parts.append(expand(masks_))
+
+    return np.unique(np.concatenate(parts))
+
+
+def bestHits(columns, results, chunk=1 << 22):
+    """Obtains the hits of the best column for each result
+
+    :columns: packed columns bet
+    :results: packed results
+    :chunk: maximum number of compared signs held in memory at once
+    :returns: int array with the hits of each result
+
+    """
+    columns = unpack(columns)
+    results = unpack(results)
+    step = max(1, chunk // (MATCHES * max(1, len(columns))))
+
+    best = np.zeros(len(results), dtype=np.int8)
+    for start in range(0, len(results), step):
+        block = results[start:start + step]
+        hits = (block[:, None, :] == columns[None, :, :]).sum(axis=2)
+        best[start:start + step] = hits.max(axis=1)
+
+    return best
+
+
+def coverage(columns, results, hits=13):
+    """Obtains the share of results where some column gets `hits` or more
+
+    :columns: packed columns bet
+    :results: packed results
+    :hits: hits to reach
+    :returns: float between 0 and 1
+
+    """
+    return float((bestHits(columns, results) >= hits).mean())
+
+
+def guaranteedHits(columns, results):
+    """Obtains the hits some column gets whatever the result is
+
+    :columns: packed columns bet
+    :results: packed results
+    :returns: int
+
+    """
+    return int(bestHits(columns, results).min())
+
+
+def neighbours(codes, masks, radius):
+    """Finds the columns of a system that differ from each column in at
+    most `radius` matches
+
+    :codes: sorted packed columns of the system, see `expand`
+    :masks: int array (14) with a bit per sign index
+    :radius: maximum number of different matches
+    :returns: int array (columns x neighbours) with indexes in `codes`,
+              -1 pads the columns with fewer neighbours. The first one is
+              the column itself
+
+    """
+    digits = unpack(codes).astype(np.int32)
+    found = [np.arange(len(codes))]
+    for n in range(1, radius + 1):
+        for matches in itertools.combinations(range(MATCHES), n):
+            matches = list(matches)
+            for shifts in itertools.product((1, 2), repeat=n):
+                changed = (digits[:, matches] + shifts) % 3
+                allowed = ((masks[matches] >> changed) & 1).all(axis=1)
+                moved = codes + ((changed - digits[:, matches]) *
+                        POW3[matches]).sum(axis=1)
+                found.append(np.where(allowed,
+                    np.searchsorted(codes, moved), -1))
+
+    return np.stack(found, axis=1)
+
+
+def greedyCover(masks, hits=13, budget=None):
+    """Searches a small set of columns of the system so that, if every
+    result falls inside the system, some column gets `hits` or more. Each
+    step takes the column reaching the most uncovered results. Systems whose
+    neighbours would take more than MAX_REACH entries raise a ValueError
+
+    :masks: int array (14) with a bit per sign index
+    :hits: hits to guarantee
+    :budget: maximum number of columns, None to cover the whole system
+    :returns: int32 array with the packed columns, in the order they were
+              chosen
+
+    """
+    masks = np.asarray(masks)
+    radius = MATCHES - hits
+    width = sum(math.comb(MATCHES, n) * 2 ** n for n in range(radius + 1))
+    size = systemSize(masks)
+    if size * width > MAX_REACH:
+        raise ValueError('System of ' + str(size) +
+                ' columns too big to reduce to ' + str(hits) + ' hits')
+
+    codes = expand(masks)
+    reach = neighbours(codes, masks, radius)
+    valid = reach >= 0
+
+    covered = np.zeros(len(codes), dtype=bool)
+    gains = valid.sum(axis=1)
+    chosen = []
+    while not covered.all() and (budget is None or len(chosen) < budget):
+        best = int(np.argmax(gains))
+        reached = reach[best][valid[best]]
+        reached = reached[~covered[reached]]
+        covered[reached] = True
+        # Reaching is symmetric, so the columns reaching the new covered
+        # results are their own neighbours
+        losers = reach[reached][valid[reached]]
+        np.subtract.at(gains, losers, 1)
+        chosen.append(codes[best])
+
+    return np.array(chosen, dtype=np.int32)
+
+
+def toSigns(codes):
+    """Translates packed columns to the signs of their 14 matches
+
+    :codes: packed columns
+    :returns: a list per column, e.g. [['1', 'X', ...], ['1', '2', ...]]
+
+    """
+    return [[SIGNS[sign] for sign in column] for column in unpack(codes)]
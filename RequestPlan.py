@@ -0,0 +1,82 @@
+import Utils_
+
+
+class RequestPlan():
+
+    """Structural and value edits collected to be sent in a single
+    spreadsheets batchUpdate, which applies all of them or none"""
+
+    def __init__(self):
+        self.requests = []
+
+
+    def __len__(self):
+        return len(self.requests)
+
+
+    def deleteSheet(self, sheetId):
+        """Adds the deletion of a sheet
+
+        :sheetId: ID of the sheet
+        :returns: None
+
+        """
+        self.requests.append({'deleteSheet': {'sheetId': sheetId}})
+
+
+    def duplicateSheet(self, sourceSheetId, newSheetId, newSheetName):
+        """Adds the copy of a sheet with a given ID and title, so no rename
+        is needed afterwards
+
+        :sourceSheetId: ID of the sheet to copy
+        :newSheetId: ID of the new sheet
+        :newSheetName: title of the new sheet
+        :returns: None
+
+        """
+        self.requests.append({'duplicateSheet': {
+            'sourceSheetId': sourceSheetId,
+            'newSheetId': newSheetId,
+            'newSheetName': newSheetName
+        }})
+
+
+    def updateValues(self, sheetId, cells, rows):
+        """Adds the write of values, only `userEnteredValue` is touched so
+        the format of the cells is kept
+
+        :sheetId: ID of the sheet
+        :cells: cells range without sheet name, e.g. 'A1:B15'
+        :rows: matrix with values in row order
+        :returns: None
+
+        """
+        c0, r0, _, _ = Utils_.parseA1(cells)
+        rowData = []
+        for row in rows:
+            values = []
+            for value in row:
+                if isinstance(value, bool):
+                    entered = {'boolValue': value}
+                elif isinstance(value, (int, float)):
+                    entered = {'numberValue': value}
+                else:
+                    entered = {'stringValue': value}
+                values.append({'userEnteredValue': entered})
+            rowData.append({'values': values})
+
+        self.requests.append({'updateCells': {
+            'rows': rowData,
+            'fields': 'userEnteredValue',
+            'start': {'sheetId': sheetId, 'rowIndex': r0,
+                'columnIndex': c0}
+        }})
+
+
+    def body(self):
+        """Obtains the body of the batchUpdate, the response only has the
+        replies
+        :returns: body
+
+        """
+        return {'requests': self.requests}
@@ -0,0 +1,189 @@
+#!/usr/bin/python
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+
+RESULT_SET = 'result_set'
+RESULT_CHANGED = 'result_changed'
+MATCH_FINISHED = 'match_finished'
+PLENO_CHANGED = 'pleno_changed'
+
+
+class ResultEvents():
+
+    """Diffs each poll of a football day against the previous one and
+    appends the changes as events to a JSONL file, one per line, that other
+    processes can tail with `follow`"""
+
+    def __init__(self, path, matchLength=7200, clock=time.time):
+        """
+        :path: path of the JSONL events file, it is only appended to
+        :matchLength: seconds since kickoff after which a match with result
+                      is finished
+        :clock: function returning the current timestamp
+
+        """
+        self.path = path
+        self.matchLength = matchLength
+        self.clock = clock
+        self.results = dict()
+        self.finished = set()
+        self.load()
+
+
+    def load(self):
+        """Rebuilds the last known results from the events file, so a
+        restart does not emit the same events again
+        :returns: None
+
+        """
+        for _, event in follow(self.path, wait=False):
+            key = (event['season'], event['jornada'])
+            match = event['match'] - 1
+            if event['type'] == MATCH_FINISHED:
+                self.finished.add(key + (match,))
+            else:
+                results = self.results.setdefault(key, [u''] * 15)
+                results[match] = event['result']
+
+
+    def kickoffTime(self, kickoff):
+        """Translates an ISO kickoff date to a timestamp
+
+        :kickoff: ISO date, e.g. '2017-01-22T20:45:00+01:00'
+        :returns: seconds since epoch, None if it can't be parsed
+
+        """
+        try:
+            return datetime.fromisoformat(kickoff).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+
+    def diff(self, season, footballDay, matches):
+        """Obtains the events between the last known results of a football
+        day and `matches`, and takes them as the last known ones
+
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :matches: matches, see `QuinielaScraper.getMatches`
+        :returns: list of events, e.g. {'type': 'result_set',
+                  'season': '2016_2017', 'jornada': 22, 'match': 3,
+                  'local': --, 'visiting': --, 'result': 'X',
+                  'previous': '', 'time': --}
+
+        """
+        key = (season, footballDay)
+        results = self.results.setdefault(key, [u''] * 15)
+        now = self.clock()
+
+        events = []
+        for i, match in enumerate(matches[0:15]):
+            result, previous = match['result'], results[i]
+            types = []
+            if i == 14:
+                if result != previous:
+                    types.append(PLENO_CHANGED)
+            elif result and not previous:
+                types.append(RESULT_SET)
+            elif result != previous:
+                types.append(RESULT_CHANGED)
+
+            # Results are kept live during the match, so it is finished
+            # once its time is over
+            kickoff = self.kickoffTime(match.get('kickoff'))
+            if result and key + (i,) not in self.finished and\
+                    (kickoff is None or now >= kickoff + self.matchLength):
+                types.append(MATCH_FINISHED)
+                self.finished.add(key + (i,))
+
+            for type_ in types:
+                events.append({'type': type_, 'season': season,
+                    'jornada': footballDay, 'match': i + 1,
+                    'local': match['local'], 'visiting': match['visiting'],
+                    'result': result, 'previous': previous, 'time': now})
+            results[i] = result
+
+        return events
+
+
+    def observe(self, season, footballDay, matches):
+        """Appends the events of a poll to the events file
+
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :matches: matches, see `QuinielaScraper.getMatches`
+        :returns: list of events, see `diff`
+
+        """
+        events = self.diff(season, footballDay, matches)
+        if events:
+            # A single write of whole lines, so readers never see half an
+            # event from another writer
+            data = ''.join(json.dumps(event) + '\n' for event in events)
+            with open(self.path, 'a') as f:
+                f.write(data)
+
+        return events
+
+
+
+def follow(path, offset=0, wait=True, interval=1):
+    """Reads the events of a file from `offset`, waiting for new ones like
+    `tail -f` does
+
+    :path: path of the JSONL events file
+    :offset: byte offset to start from, 0 for the first event
+    :wait: keep waiting for new events, otherwise stop at the end
+    :interval: seconds between checks for new events
+    :returns: generator of (offset after the event, event)
+
+    """
+    # Bytes read after the last whole event, still being written
+    pending = b''
+    while True:
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset + len(pending))
+                pending += f.read()
+        except (IOError, OSError):
+            pass
+
+        while b'\n' in pending:
+            line, pending = pending.split(b'\n', 1)
+            offset += len(line) + 1
+            if line:
+                yield offset, json.loads(line.decode('utf8'))
+
+        if not wait:
+            return
+        time.sleep(interval)
+
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(
+            description='Prints the result events as they are appended')
+    argParser.add_argument('events', help='JSONL events file')
+    argParser.add_argument('--offset', type=int, default=None,
+            help='byte offset to start from, the end of the file if not '
+            'given')
+    argParser.add_argument('--types', nargs='+', default=None,
+            choices=[RESULT_SET, RESULT_CHANGED, MATCH_FINISHED,
+                PLENO_CHANGED])
+    args = argParser.parse_args()
+
+    offset = args.offset
+    if offset is None:
+        offset = os.path.getsize(args.events) if\
+                os.path.exists(args.events) else 0
+
+    for _, event in follow(args.events, offset):
+        if args.types is None or event['type'] in args.types:
+            print(json.dumps(event))
+            sys.stdout.flush()
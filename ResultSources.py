@@ -0,0 +1,283 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from QuinielaScraper import QuinielaScraper
+from ScraperTransport import ScraperTransport
+import Tracing
+import Utils_
+
+BetMatrix = Utils_.LazyModule('BetMatrix')
+
+
+class SourcesError(Exception):
+
+    """No result source answered with a valid set of matches"""
+
+
+
+def validMatches(matches):
+    """Checks that a set of matches is complete and well formed
+
+    :matches: matches, see `QuinielaScraper.getMatches`
+    :returns: boolean
+
+    """
+    if not matches or len(matches) != 15:
+        return False
+
+    for i, match in enumerate(matches):
+        if not match.get('local') or not match.get('visiting'):
+            return False
+        if BetMatrix.encodeBet(match.get('result', ''), pleno=i == 14) ==\
+                BetMatrix.INVALID:
+            return False
+
+    return True
+
+
+def consistentMatches(matches, last):
+    """Checks that a set of matches can follow the last accepted one of the
+    same football day: same teams and no result cleared, so sources lagging
+    behind are not taken
+
+    :matches: matches, see `QuinielaScraper.getMatches`
+    :last: matches accepted before, None if there are none
+    :returns: boolean
+
+    """
+    if last is None:
+        return True
+
+    for match, lastMatch in zip(matches, last):
+        if (match['local'], match['visiting']) !=\
+                (lastMatch['local'], lastMatch['visiting']):
+            return False
+        if lastMatch['result'] and not match['result']:
+            return False
+
+    return True
+
+
+
+class HedgedScraper():
+
+    """Fetches the matches from several sources, with the interface of a
+    QuinielaScraper. The source with the lowest average latency is asked
+    first, and if it has not answered after `hedgeDelay` seconds (or it
+    fails) the next one is asked too. The first valid answer wins"""
+
+    def __init__(self, season, sources, hedgeDelay=1, alpha=0.3,
+            events=None):
+        """
+        :season: '2016_2017'
+        :sources: list of (name, scraper, timeout), each scraper offers
+                  `fetchMatches(footballDay)` like QuinielaScraper and is
+                  given up after `timeout` seconds
+        :hedgeDelay: seconds to wait for a source before asking the next
+        :alpha: weight of the last latency in the moving average
+        :events: ResultEvents receiving the winning matches, None to not
+                 emit events
+
+        """
+        self.season = season
+        self.sources = sources
+        self.hedgeDelay = hedgeDelay
+        self.alpha = alpha
+        self.events = events
+        self.latency = dict()
+        self.inflight = dict()
+        # Last accepted matches of each football day
+        self.last = dict()
+        self.winner = None
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=len(sources))
+
+
+    def record(self, name, seconds):
+        """Adds a latency to the moving average of a source
+
+        :name: name of the source
+        :seconds: latency, the timeout of the source if it failed
+        :returns: None
+
+        """
+        with self.lock:
+            if name not in self.latency:
+                self.latency[name] = seconds
+            else:
+                self.latency[name] += self.alpha *\
+                        (seconds - self.latency[name])
+
+
+    def order(self):
+        """Sorts the sources by their average latency, the ones never asked
+        go first so they get measured
+        :returns: list of (name, scraper, timeout)
+
+        """
+        with self.lock:
+            return sorted(self.sources,
+                    key=lambda source: self.latency.get(source[0], 0))
+
+
+    def submit(self, source, footballDay):
+        """Asks a source for the matches in the background, a source still
+        busy with the same football day is not asked twice
+
+        :source: (name, scraper, timeout)
+        :footballDay: number of football day
+        :returns: future of the matches
+
+        """
+        name, scraper, timeout = source
+        with self.lock:
+            future = self.inflight.get((name, footballDay))
+            if future is not None and not future.done():
+                return future
+
+            start = time.monotonic()
+            future = self.executor.submit(self.fetchSource, name, scraper,
+                    footballDay, Tracing.current())
+            self.inflight[(name, footballDay)] = future
+
+        def done(future):
+            seconds = time.monotonic() - start
+            failed = future.exception() is not None
+            self.record(name, max(seconds, timeout) if failed else seconds)
+        future.add_done_callback(done)
+
+        return future
+
+
+    def fetchSource(self, name, scraper, footballDay, trace):
+        """Fetches the matches of a source, its spans are reported to the
+        tick that asked for them. Wrong answers fail like errors do, so they
+        are recorded once as failures
+
+        :name: name of the source
+        :scraper: scraper of the source
+        :footballDay: number of football day
+        :trace: TickTrace of the tick asking, None if it is not traced
+        :returns: matches, see `QuinielaScraper.getMatches`
+
+        """
+        Tracing.attach(trace)
+        try:
+            with Tracing.span('source', source=name):
+                matches = scraper.fetchMatches(footballDay)
+        finally:
+            Tracing.attach(None)
+
+        if not validMatches(matches):
+            raise SourcesError('Invalid matches of football day ' +
+                    str(footballDay) + ' from ' + name)
+
+        return matches
+
+
+    def fetchMatches(self, footballDay):
+        """Gets the matches of footballDay from the first source answering a
+        valid set consistent with the last one. If every source answered a
+        set that is valid but not consistent (e.g. a match was replaced),
+        the first of them is taken
+
+        :footballDay: number of football day
+        :returns: matches, see `QuinielaScraper.getMatches`
+
+        """
+        last = self.last.get(footballDay)
+
+        order = self.order()
+        pending = dict()
+        fallback = None
+        hedgeAt = 0
+        while True:
+            now = time.monotonic()
+            if order and (not pending or now >= hedgeAt):
+                source = order.pop(0)
+                future = self.submit(source, footballDay)
+                pending[future] = (source, now + source[2])
+                hedgeAt = now + self.hedgeDelay
+                continue
+
+            # Sources over their timeout are given up
+            for future, (_, deadline) in list(pending.items()):
+                if deadline <= now:
+                    del pending[future]
+            if not pending:
+                if order:
+                    continue
+                break
+
+            until = min(deadline for _, deadline in pending.values())
+            if order:
+                until = min(until, hedgeAt)
+            done, _ = wait(list(pending), timeout=max(0, until - now),
+                    return_when=FIRST_COMPLETED)
+
+            for future in done:
+                (name, _, _), _ = pending.pop(future)
+                if future.exception() is not None:
+                    # Errors and wrong answers, ask the next source now
+                    hedgeAt = now
+                    continue
+                matches = future.result()
+                if consistentMatches(matches, last):
+                    return self.accept(name, footballDay, matches)
+                elif fallback is None:
+                    fallback = (name, matches)
+
+        if fallback is None:
+            raise SourcesError('No valid matches of football day ' +
+                    str(footballDay) + ' from ' +
+                    ', '.join(source[0] for source in self.sources))
+
+        return self.accept(fallback[0], footballDay, fallback[1])
+
+
+    def accept(self, name, footballDay, matches):
+        """Takes the matches of a source as the last ones of the day
+
+        :name: name of the source
+        :footballDay: number of football day
+        :matches: matches, see `QuinielaScraper.getMatches`
+        :returns: a copy of the matches
+
+        """
+        matches = [dict(match) for match in matches]
+        self.last[footballDay] = matches
+        self.winner = name
+        if self.events is not None:
+            self.events.observe(self.season, footballDay, matches)
+
+        return [dict(match) for match in matches]
+
+
+
+def createSources(config, metrics=None):
+    """Creates the scrapers of the `sources` of the configuration, each one
+    with its own cache folder inside `cacheDir`
+
+    :config: configuration with a `sources` list of {'name': --, 'url': --,
+             'parser': --, 'timeout': --}
+    :metrics: Metrics recording the requests to the sources
+    :returns: list of (name, scraper, timeout)
+
+    """
+    sources = []
+    for source in config['sources']:
+        timeout = source.get('timeout', config.get('httpTimeout', 10))
+        transport = ScraperTransport(
+                os.path.join(config.get('cacheDir', '.cache'),
+                    source['name']),
+                config.get('cacheEntries', 200),
+                timeout,
+                metrics,
+                config.get('finishedTtl', 3600))
+        scraper = QuinielaScraper(config.get('season', '2016_2017'),
+                transport, source.get('parser', 'fast'), source.get('url'))
+        sources.append((source['name'], scraper, timeout))
+
+    return sources
@@ -0,0 +1,280 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class ResultsStore():
+
+    """Local SQLite store with the historical quiniela results"""
+
+    SCHEMA = [
+        '''CREATE TABLE IF NOT EXISTS jornadas (
+            season TEXT NOT NULL,
+            jornada INTEGER NOT NULL,
+            finished INTEGER NOT NULL,
+            fetched REAL NOT NULL,
+            PRIMARY KEY (season, jornada))''',
+        '''CREATE TABLE IF NOT EXISTS matches (
+            season TEXT NOT NULL,
+            jornada INTEGER NOT NULL,
+            num INTEGER NOT NULL,
+            local TEXT NOT NULL,
+            visiting TEXT NOT NULL,
+            result TEXT NOT NULL,
+            kickoff TEXT NOT NULL,
+            PRIMARY KEY (season, jornada, num))''',
+        # The queries filter by the leading columns of the primary key,
+        # the indexes of earlier stores are not used
+        'DROP INDEX IF EXISTS matches_season',
+        'DROP INDEX IF EXISTS matches_jornada',
+        'DROP INDEX IF EXISTS matches_local',
+        'DROP INDEX IF EXISTS matches_visiting',
+        '''CREATE TABLE IF NOT EXISTS scores (
+            pool TEXT NOT NULL,
+            season TEXT NOT NULL,
+            jornada INTEGER NOT NULL,
+            participant TEXT NOT NULL,
+            hits INTEGER NOT NULL,
+            pleno INTEGER NOT NULL,
+            PRIMARY KEY (pool, season, jornada, participant))''',
+        '''CREATE INDEX IF NOT EXISTS scores_participant ON scores
+            (pool, season, participant)''',
+        # Votes the doubles of a football day were chosen from, freqs and
+        # modes as JSON
+        '''CREATE TABLE IF NOT EXISTS votes (
+            pool TEXT NOT NULL,
+            season TEXT NOT NULL,
+            jornada INTEGER NOT NULL,
+            participants INTEGER NOT NULL,
+            freqs TEXT NOT NULL,
+            modes TEXT NOT NULL,
+            PRIMARY KEY (pool, season, jornada))''',
+    ]
+
+    # Participant name of the group bet in the scores
+    GROUP = '*'
+
+
+    def __init__(self, path):
+        """
+        :path: path of the SQLite database
+
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            for statement in self.SCHEMA:
+                self.conn.execute(statement)
+
+
+    def close(self):
+        """Closes the database
+        :returns: None
+
+        """
+        self.conn.close()
+
+
+    def saveFootballDay(self, season, footballDay, matches, finished):
+        """Stores the matches of a football day, replacing previous ones
+
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :matches: matches as returned by `QuinielaScraper.getMatches`
+        :finished: True if all the matches have a result
+        :returns: None
+
+        """
+        rows = [(season, footballDay, i+1, match['local'],
+            match['visiting'], match['result'], match.get('kickoff', ''))
+            for i, match in enumerate(matches)]
+
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM matches WHERE season = ? AND '
+                    'jornada = ?', (season, footballDay))
+            self.conn.executemany('INSERT INTO matches VALUES '
+                    '(?, ?, ?, ?, ?, ?, ?)', rows)
+            self.conn.execute('INSERT OR REPLACE INTO jornadas VALUES '
+                    '(?, ?, ?, ?)', (season, footballDay, int(finished),
+                        time.time()))
+
+
+    def finishedDays(self, season):
+        """Obtains the finished football days stored for a season
+
+        :season: '2016_2017'
+        :returns: set with the football day numbers
+
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT jornada FROM jornadas WHERE '
+                    'season = ? AND finished = 1', (season,)).fetchall()
+
+        return set(row[0] for row in rows)
+
+
+    def getMatches(self, season, footballDay):
+        """Obtains the stored matches of a football day
+
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :returns: matches as returned by `QuinielaScraper.getMatches`, an
+                  empty list if the day is not stored
+
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT local, visiting, result, '
+                    'kickoff FROM matches WHERE season = ? AND jornada = ? '
+                    'ORDER BY num', (season, footballDay)).fetchall()
+
+        return [{'local': local, 'visiting': visiting, 'result': result,
+            'kickoff': kickoff} for local, visiting, result, kickoff in rows]
+
+
+    def teamMatches(self, team, season=None):
+        """Obtains the stored matches played by a team
+
+        :team: team name
+        :season: '2016_2017', all the seasons if None
+        :returns: list of (season, jornada, num, local, visiting, result)
+
+        """
+        query = ('SELECT season, jornada, num, local, visiting, result '
+                'FROM matches WHERE (local = ? OR visiting = ?)')
+        params = [team, team]
+        if season is not None:
+            query += ' AND season = ?'
+            params.append(season)
+
+        with self.lock:
+            return self.conn.execute(query + ' ORDER BY season, jornada, num',
+                    params).fetchall()
+
+
+    def saveScores(self, pool, season, footballDay, scores):
+        """Stores the scores of a football day, replacing previous ones
+
+        :pool: name of the group of participants, e.g. the spreadsheet
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :scores: {participant: (hits, pleno al 15 hit)}, see
+                 `Scorer.scores`
+        :returns: None
+
+        """
+        rows = [(pool, season, footballDay, participant, hits, int(pleno))
+                for participant, (hits, pleno) in scores.items()]
+
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM scores WHERE pool = ? AND '
+                    'season = ? AND jornada = ?', (pool, season, footballDay))
+            self.conn.executemany('INSERT INTO scores VALUES '
+                    '(?, ?, ?, ?, ?, ?)', rows)
+
+
+    def saveVotes(self, pool, season, footballDay, participants, freqs,
+            modes):
+        """Stores the votes the doubles of a football day were chosen from,
+        replacing previous ones
+
+        :pool: name of the group of participants, e.g. the spreadsheet
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :participants: number of participants
+        :freqs: frequencies of each match
+        :modes: modes of each match with the sheet encoding
+        :returns: None
+
+        """
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO votes VALUES '
+                    '(?, ?, ?, ?, ?, ?)', (pool, season, footballDay,
+                        participants, json.dumps(freqs), json.dumps(modes)))
+
+
+    def votedDays(self, pool=None, season=None):
+        """Obtains the stored votes of the football days
+
+        :pool: name of the group of participants, all of them if None
+        :season: '2016_2017', all the seasons if None
+        :returns: list of {'pool', 'season', 'jornada', 'participants',
+                  'freqs', 'modes'}, as the records of the history file
+
+        """
+        query = ('SELECT pool, season, jornada, participants, freqs, modes '
+                'FROM votes WHERE 1 = 1')
+        params = []
+        if pool is not None:
+            query += ' AND pool = ?'
+            params.append(pool)
+        if season is not None:
+            query += ' AND season = ?'
+            params.append(season)
+
+        with self.lock:
+            rows = self.conn.execute(query + ' ORDER BY pool, season, '
+                    'jornada', params).fetchall()
+
+        return [{'pool': pool_, 'season': season_, 'jornada': jornada,
+            'participants': participants, 'freqs': json.loads(freqs),
+            'modes': json.loads(modes)}
+            for pool_, season_, jornada, participants, freqs, modes in rows]
+
+
+    def leaderboard(self, pool, season, lastFootballDay=None):
+        """Obtains the standings of the participants of a season, the group
+        bet is left out
+
+        :pool: name of the group of participants
+        :season: '2016_2017'
+        :lastFootballDay: standings after this football day, all the stored
+                          ones if None
+        :returns: list of (participant, hits, plenos, football days) sorted
+                  by hits
+
+        """
+        query = ('SELECT participant, SUM(hits), SUM(pleno), COUNT(*) FROM '
+                'scores WHERE pool = ? AND season = ? AND participant != ?')
+        params = [pool, season, self.GROUP]
+        if lastFootballDay is not None:
+            query += ' AND jornada <= ?'
+            params.append(lastFootballDay)
+
+        with self.lock:
+            return self.conn.execute(query + ' GROUP BY participant ORDER '
+                    'BY SUM(hits) DESC, SUM(pleno) DESC, participant',
+                    params).fetchall()
+
+
+    def footballDayScores(self, pool, season, footballDay):
+        """Obtains the scores of a football day
+
+        :pool: name of the group of participants
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :returns: list of (participant, hits, pleno) sorted by hits
+
+        """
+        with self.lock:
+            return self.conn.execute('SELECT participant, hits, pleno FROM '
+                    'scores WHERE pool = ? AND season = ? AND jornada = ? '
+                    'ORDER BY hits DESC, pleno DESC, participant',
+                    (pool, season, footballDay)).fetchall()
+
+
+    def participantScores(self, pool, season, participant):
+        """Obtains the scores of a participant along a season
+
+        :pool: name of the group of participants
+        :season: '2016_2017'
+        :participant: name of the participant
+        :returns: list of (jornada, hits, pleno)
+
+        """
+        with self.lock:
+            return self.conn.execute('SELECT jornada, hits, pleno FROM '
+                    'scores WHERE pool = ? AND season = ? AND participant = '
+                    '? ORDER BY jornada', (pool, season,
+                        participant)).fetchall()
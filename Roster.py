@@ -0,0 +1,108 @@
+import codecs
+import os
+import threading
+import time
+
+
+class Roster():
+
+    """Names of the people playing, read from the people file only when it
+    changes"""
+
+    def __init__(self, path):
+        """
+        :path: TXT file with a person name in each line
+
+        """
+        self.path = path
+        self.names = frozenset()
+        self.stamp = None
+        self.lock = threading.Lock()
+        self.callbacks = []
+        self.refresh()
+
+
+    def subscribe(self, callback):
+        """Registers a function called when the names change
+
+        :callback: function receiving the new set of names
+        :returns: None
+
+        """
+        self.callbacks.append(callback)
+
+
+    def read(self):
+        """Reads the names of the file
+        :returns: frozenset with the names
+
+        """
+        with codecs.open(self.path, 'r', encoding='utf8') as f:
+            lines = f.read().splitlines()
+
+        return frozenset(line for line in lines if line)
+
+
+    def refresh(self):
+        """Reloads the file if its modification time or size changed, the
+        subscribers are notified if the names are different
+        :returns: True if the names changed
+
+        """
+        with self.lock:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp == self.stamp:
+                return False
+            names = self.read()
+            self.stamp = stamp
+            changed = names != self.names
+            self.names = names
+
+        if changed:
+            for callback in self.callbacks:
+                callback(names)
+
+        return changed
+
+
+    def run(self, interval):
+        """Refreshes the roster when the file changes, using inotify if
+        `inotify_simple` is installed and checking its modification time
+        every `interval` seconds otherwise
+
+        :interval: seconds between checks
+        :returns: None
+
+        """
+        try:
+            from inotify_simple import INotify, flags
+            inotify = INotify()
+            # Editors replace the file, so its folder is watched
+            inotify.add_watch(os.path.dirname(os.path.abspath(self.path)),
+                    flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+        except (ImportError, OSError):
+            inotify = None
+
+        while True:
+            if inotify is not None:
+                inotify.read(timeout=int(interval * 1000))
+            else:
+                time.sleep(interval)
+            try:
+                self.refresh()
+            except OSError:
+                # File being replaced, the old names are kept
+                pass
+
+
+    def watch(self, interval=5):
+        """Refreshes the roster in a background thread, see `run`
+
+        :interval: seconds between checks
+        :returns: None
+
+        """
+        thread = threading.Thread(target=self.run, args=(interval,))
+        thread.daemon = True
+        thread.start()
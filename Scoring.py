@@ -0,0 +1,91 @@
+import numpy as np
+
+from BetMatrix import EMPTY, MODE_VALUES, SIGN_INDEX, encodeBet
+
+
+def encodeResults(results):
+    """Encodes the results of a football day like the bets
+
+    :results: 15 results as in `QuinielaScraper.getMatches`, e.g.
+              ['1', 'X', '', ..., '2--M']
+    :returns: int8 array (15), EMPTY for the matches without result
+
+    """
+    results = list(results) + [u''] * (15 - len(results))
+    return np.array([encodeBet(result) for result in results[0:14]] +
+            [encodeBet(results[14], pleno=True)], dtype=np.int8)
+
+
+
+class Scorer():
+
+    """Hits of the participants and of the group bet in a football day,
+    recomputed only for the matches whose result changed"""
+
+    def __init__(self, betMatrix, modes, doubleCol):
+        """
+        :betMatrix: BetMatrix with the bets of the participants
+        :modes: modes of the 14 matches with the sheet encoding
+        :doubleCol: column of doubles, e.g. ['X', '', '1X', ...]
+
+        """
+        self.betMatrix = betMatrix
+        doubleCol = list(doubleCol) + [u''] * (14 - len(doubleCol))
+
+        # Signs covered by the group bet: the mode plus the doubles
+        self.groupSigns = np.zeros((14, 3), dtype=bool)
+        # The mode encoding swaps '1' and 'X', so it is its own inverse
+        modeSigns = MODE_VALUES[np.asarray(modes)]
+        self.groupSigns[np.arange(14), modeSigns] = True
+        for row, cell in enumerate(doubleCol[0:14]):
+            for sign in cell.upper():
+                if sign in SIGN_INDEX:
+                    self.groupSigns[row, SIGN_INDEX[sign]] = True
+
+        self.results = np.full(15, EMPTY, dtype=np.int8)
+        self.hits = np.zeros((betMatrix.participants(), 15), dtype=bool)
+        self.groupHits = np.zeros(14, dtype=bool)
+
+
+    def update(self, results):
+        """Takes the latest results, only the matches whose result changed
+        are compared against the bets
+
+        :results: results as in `QuinielaScraper.getMatches`
+        :returns: array with the indexes of the changed matches
+
+        """
+        encoded = encodeResults(results)
+        changed = np.nonzero(encoded != self.results)[0]
+        if not changed.size:
+            return changed
+
+        known = encoded[changed] >= 0
+        self.hits[:, changed] = (self.betMatrix.bets[:, changed] ==
+                encoded[changed]) & known
+
+        matches = changed[changed < 14]
+        signs = encoded[matches]
+        self.groupHits[matches] = (signs >= 0) &\
+                self.groupSigns[matches, np.maximum(signs, 0)]
+        self.results = encoded
+
+        return changed
+
+
+    def scores(self):
+        """Obtains the score of each participant
+        :returns: {name: (hits in the 14 matches, pleno al 15 hit)}
+
+        """
+        hits = self.hits[:, 0:14].sum(axis=1)
+        return dict((name, (int(hits[i]), bool(self.hits[i, 14])))
+                for i, name in enumerate(self.betMatrix.names))
+
+
+    def groupScore(self):
+        """Obtains the hits of the group bet in the 14 matches
+        :returns: int
+
+        """
+        return int(self.groupHits.sum())
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+
+import Tracing
+
+
+class ScraperTransport():
+
+    """Keep-alive HTTP transport with conditional GETs and an on-disk cache
+    of the quiniela pages"""
+
+    def __init__(self, cacheDir='.cache', maxEntries=200, timeout=10,
+            metrics=None, finishedTtl=3600):
+        """
+        :cacheDir: folder where the pages are cached
+        :maxEntries: maximum number of pages kept in the cache
+        :timeout: seconds to wait for the connection and for the response
+        :metrics: Metrics recording the requests, None to not record
+        :finishedTtl: seconds a finished football day is served from the
+                      cache before it is revalidated, results can still be
+                      corrected
+
+        """
+        self.cacheDir = cacheDir
+        self.maxEntries = maxEntries
+        self.timeout = timeout
+        self.metrics = metrics
+        self.finishedTtl = finishedTtl
+        self.session = None
+
+        if not os.path.exists(self.cacheDir):
+            os.makedirs(self.cacheDir, exist_ok=True)
+
+
+    def getSession(self):
+        """Obtains the keep-alive session, created on the first request
+        since requests is slow to import
+        :returns: requests.Session
+
+        """
+        if self.session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self.session = session
+
+        return self.session
+
+
+    def cachePath(self, season, footballDay):
+        """Obtains the cache path prefix for a football day
+
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :returns: path without extension
+
+        """
+        return os.path.join(self.cacheDir,
+                season + '_jornada_' + str(footballDay))
+
+
+    def readCache(self, season, footballDay):
+        """Reads a cached page and its metadata
+
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :returns: text, metadata - None, None if not cached
+
+        """
+        path = self.cachePath(season, footballDay)
+        try:
+            with open(path + '.json', 'r') as fMeta:
+                meta = json.load(fMeta)
+            with open(path + '.html', 'rb') as fHtml:
+                text = fHtml.read().decode('utf8')
+        except (IOError, OSError, ValueError):
+            return None, None
+
+        return text, meta
+
+
+    def writeFile(self, path, data):
+        """Atomically writes `data` bytes to `path`
+
+        :path: file path
+        :data: bytes to write
+        :returns: None
+
+        """
+        tmpPath = path + '.tmp'
+        with open(tmpPath, 'wb') as f:
+            f.write(data)
+        os.replace(tmpPath, path)
+
+
+    def writeCache(self, season, footballDay, text, meta):
+        """Stores a page and its metadata in the cache
+
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :text: page contents
+        :meta: {'etag': --, 'lastModified': --, 'finished': --}
+        :returns: None
+
+        """
+        path = self.cachePath(season, footballDay)
+        if text is not None:
+            self.writeFile(path + '.html', text.encode('utf8'))
+        self.writeFile(path + '.json', json.dumps(meta).encode('utf8'))
+        self.evict()
+
+
+    def entryTime(self, name):
+        """Obtains when a cache entry was last written
+
+        :name: name of the entry without extension
+        :returns: modification time, 0 if removed meanwhile
+
+        """
+        try:
+            return os.path.getmtime(os.path.join(self.cacheDir,
+                name + '.json'))
+        except OSError:
+            return 0
+
+
+    def evict(self):
+        """Removes the least recently written pages beyond `maxEntries`
+        :returns: None
+
+        """
+        entries = [name[0:-5] for name in os.listdir(self.cacheDir)
+                if name.endswith('.json')]
+        if len(entries) <= self.maxEntries:
+            return
+
+        entries.sort(key=lambda name: self.entryTime(name))
+        for name in entries[0:len(entries) - self.maxEntries]:
+            for ext in ['.json', '.html']:
+                try:
+                    os.remove(os.path.join(self.cacheDir, name + ext))
+                except OSError:
+                    pass
+
+
+    def markFinished(self, season, footballDay):
+        """Marks a cached football day as finished, so it is only
+        revalidated once per `finishedTtl` seconds
+
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :returns: None
+
+        """
+        text, meta = self.readCache(season, footballDay)
+        if meta is not None and not meta.get('finished'):
+            meta['finished'] = True
+            meta['checked'] = time.time()
+            self.writeCache(season, footballDay, None, meta)
+
+
+    def fetch(self, url, season, footballDay):
+        """Obtains the page of a football day, revalidating the cached copy
+
+        :url: URL of the football day page
+        :season: '2016_2017'
+        :footballDay: number of football day
+        :returns: text, notModified - notModified is True if the page is
+                  the same than the last time it was fetched
+
+        """
+        text, meta = self.readCache(season, footballDay)
+        finished = meta is not None and meta.get('finished', False)
+        if finished and time.time() - meta.get('checked', 0) <\
+                self.finishedTtl:
+            if self.metrics is not None:
+                self.metrics.observe('scraper', 'cache', 0, len(text))
+            return text, True
+
+        headers = dict()
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('lastModified'):
+                headers['If-Modified-Since'] = meta['lastModified']
+
+        with Tracing.span('scrape', url=url) as span:
+            if self.metrics is None:
+                response = self.getSession().get(url, headers=headers,
+                        timeout=self.timeout)
+            else:
+                response = self.metrics.get(self.getSession(), url,
+                        headers=headers, timeout=self.timeout)
+            span.set(status=response.status_code)
+        if response.status_code == 304 and text is not None:
+            if finished:
+                meta['checked'] = time.time()
+                self.writeCache(season, footballDay, None, meta)
+            return text, True
+        response.raise_for_status()
+
+        # Servers without validators resend the same page, a changed page of
+        # a finished day is a correction
+        notModified = response.text == text
+        meta = {
+            'etag': response.headers.get('ETag'),
+            'lastModified': response.headers.get('Last-Modified'),
+            'finished': finished and notModified,
+            'checked': time.time()
+        }
+        self.writeCache(season, footballDay,
+                None if notModified else response.text, meta)
+
+        return response.text, notModified
@@ -0,0 +1,148 @@
+import Utils_
+
+
+class SheetSnapshot():
+
+    """Values of a football day sheet fetched with a single batchGet"""
+
+    # Ranges read by the state machine on each tick
+    RANGES = ['A1:B15', 'E1:E15', 'R1:R14']
+    # Participant columns, with the bets in rows 1-15 and the name in row
+    # 16: the first people take F:M and the rest the columns from S on, as
+    # N:R hold the formulas and the doubles
+    PARTICIPANT_BLOCKS = [('F', 8), ('S', None)]
+    PARTICIPANTS_ROWS = 16
+
+
+    def __init__(self, sheetTitle, valueRanges, participantRanges=()):
+        """
+        :sheetTitle: title of the sheet the snapshot belongs to
+        :valueRanges: `valueRanges` of a batchGet response for `RANGES`
+                      followed by `participantRanges`, requested in COLUMNS
+                      order
+        :participantRanges: chunks of participant columns, see
+                            `participantRanges`
+
+        """
+        self.sheetTitle = sheetTitle
+        self.blocks = []
+
+        ranges = self.RANGES + list(participantRanges)
+        for cells, valueRange in zip(ranges, valueRanges):
+            bounds = Utils_.parseA1(cells)
+            self.blocks.append((bounds, valueRange.get('values', [])))
+
+
+    @classmethod
+    def participantRanges(cls, columnCount, chunkColumns, people=None):
+        """Splits the participant columns of a sheet in chunks, each one
+        requested as a range of the same batchGet
+
+        :columnCount: number of columns of the sheet
+        :chunkColumns: maximum number of columns of a chunk
+        :people: number of people playing, the columns from S on are only
+                 requested for the people not fitting in F:M. All the
+                 columns of the sheet if None
+        :returns: list of ranges, e.g. ['F1:M16', 'S1:AR16', 'AS1:BR16']
+
+        """
+        ranges = []
+        fixed = 0
+        for first, size in cls.PARTICIPANT_BLOCKS:
+            start = Utils_.colToIndex(first)
+            if size is not None:
+                end = start + size
+                fixed += size
+            elif people is not None:
+                end = start + max(0, people - fixed)
+            else:
+                end = columnCount
+            end = min(end, columnCount)
+
+            for col0 in range(start, end, chunkColumns):
+                col1 = min(col0 + chunkColumns, end) - 1
+                ranges.append(Utils_.indexToCol(col0) + '1:' +
+                        Utils_.indexToCol(col1) + str(cls.PARTICIPANTS_ROWS))
+
+        return ranges
+
+
+    def participantColumns(self):
+        """Obtains the participant columns of the snapshot, each one with
+        the cells trimmed by the API filled back
+
+        :returns: list of columns with 16 cells, the name is the last one
+
+        """
+        columns = []
+        for _, blockCols in self.blocks[len(self.RANGES):]:
+            for column in blockCols:
+                columns.append(list(column) + [u''] *
+                        (self.PARTICIPANTS_ROWS - len(column)))
+
+        return columns
+
+
+    @classmethod
+    def covers(cls, cells):
+        """Checks if the fixed snapshot ranges contain `cells`
+
+        :cells: cells range without sheet name, e.g. 'E1:E15'
+        :returns: boolean
+
+        """
+        return cls.findBlock(cells, [(Utils_.parseA1(range_), None)
+            for range_ in cls.RANGES]) is not None
+
+
+    @staticmethod
+    def findBlock(cells, blocks):
+        """Finds the block containing `cells`
+
+        :cells: cells range without sheet name
+        :blocks: list of ((col0, row0, col1, row1), values)
+        :returns: the block or None
+
+        """
+        c0, r0, c1, r1 = Utils_.parseA1(cells)
+        for block in blocks:
+            bc0, br0, bc1, br1 = block[0]
+            if bc0 <= c0 and c1 <= bc1 and br0 <= r0 and r1 <= br1:
+                return block
+
+        return None
+
+
+    def getRange(self, cells, mode):
+        """Obtains the values in `cells` as `valuesGetRange` would do
+
+        :cells: cells range without sheet name
+        :mode: 'ROWS' or 'COLUMNS'
+        :returns: matrix with the values, None if not in the snapshot
+
+        """
+        block = self.findBlock(cells, self.blocks)
+        if not block:
+            return None
+
+        (bc0, br0, _, _), blockCols = block
+        c0, r0, c1, r1 = Utils_.parseA1(cells)
+
+        # Cut the columns, filling the cells trimmed by the API
+        cols = []
+        for col in range(c0 - bc0, c1 - bc0 + 1):
+            blockCol = blockCols[col] if col < len(blockCols) else []
+            cells_ = blockCol[r0 - br0:r1 - br0 + 1]
+            cols.append(cells_ + [u''] * (r1 - r0 + 1 - len(cells_)))
+
+        values = cols if mode == 'COLUMNS' else [list(row) for row in
+                zip(*cols)]
+
+        # Trim empty trailing cells as the API does
+        for line in values:
+            while line and line[-1] == u'':
+                line.pop()
+        while values and not values[-1]:
+            values.pop()
+
+        return values
@@ -0,0 +1,327 @@
+import json
+import os
+from urllib.parse import quote, urlencode
+
+import Tracing
+
+
+class SheetsError(Exception):
+
+    """Error answered by a Sheets backend, it exposes the HTTP status as
+    `resp.status` like the errors of the Google API client"""
+
+    class Response():
+        def __init__(self, status):
+            self.status = status
+
+
+    def __init__(self, status, message):
+        """
+        :status: HTTP status code
+        :message: error message
+
+        """
+        Exception.__init__(self, str(status) + ': ' + message)
+        self.resp = SheetsError.Response(status)
+        self.message = message
+
+
+
+class GoogleBackend():
+
+    """Backend talking to the Google Sheets API"""
+
+    DISCOVERY_URL = ('https://sheets.googleapis.com/$discovery/rest?'
+            'version=v4')
+
+    def __init__(self, secretFile, credentials, appName, discoveryFile=None):
+        """
+        :secretFile: secretFile path
+        :credentials: credentials folder path
+        :appName: application name
+        :discoveryFile: path of the cached discovery document of the API,
+                        inside the credentials folder if None
+
+        """
+        self.secretFile = secretFile
+        self.credentials = credentials
+        self.appName = appName
+        self.discoveryFile = discoveryFile or os.path.join(credentials,
+                'sheets.googleapis.com-v4-discovery.json')
+
+
+    def discoveryDocument(self, http):
+        """Obtains the discovery document of the API, it is only
+        downloaded if there is no cached copy
+
+        :http: httplib2.Http to download the document
+        :returns: text of the document
+
+        """
+        try:
+            with open(self.discoveryFile, 'r') as f:
+                return f.read()
+        except (IOError, OSError):
+            pass
+
+        response, content = http.request(self.DISCOVERY_URL)
+        if response.status != 200:
+            raise SheetsError(response.status,
+                    'Cannot download the discovery document')
+        document = content.decode('utf8')
+        json.loads(document)
+
+        tmpPath = self.discoveryFile + '.tmp'
+        with open(tmpPath, 'w') as f:
+            f.write(document)
+        os.replace(tmpPath, self.discoveryFile)
+
+        return document
+
+
+    def build(self):
+        """Builds the Google sheets API service
+        :returns: service with the `spreadsheets()` resource
+
+        """
+        import httplib2
+        from apiclient import discovery
+        from oauth2client import client
+        from oauth2client import tools
+        from oauth2client.file import Storage
+
+        # Get credentials
+        credential_dir = self.credentials
+        if not os.path.exists(credential_dir):
+            os.makedirs(credential_dir)
+        credential_path = os.path.join(credential_dir,
+                                   'sheets.googleapis.com-python-quickstart.json')
+
+        store = Storage(credential_path)
+        credentials = store.get()
+        if not credentials or credentials.invalid:
+            flow = client.flow_from_clientsecrets(self.secretFile, 'https://www.googleapis.com/auth/spreadsheets')
+            flow.user_agent = self.appName
+            credentials = tools.run_flow(flow, store)
+            Tracing.log('storing credentials', path=credential_path)
+
+
+        # Get service, from the cached discovery document
+        http = credentials.authorize(httplib2.Http())
+        return discovery.build_from_document(
+                self.discoveryDocument(httplib2.Http()), http=http,
+                requestBuilder=countingRequest())
+
+
+
+def countingRequest():
+    """Creates the request class of the Google API client that keeps the
+    bytes of its response in `responseBytes`, for the metrics
+    :returns: HttpRequest subclass
+
+    """
+    from apiclient.http import HttpRequest
+
+    class CountingRequest(HttpRequest):
+        def __init__(self, *args, **kwargs):
+            HttpRequest.__init__(self, *args, **kwargs)
+            self.responseBytes = 0
+            postproc = self.postproc
+
+            def count(resp, content):
+                self.responseBytes = len(content)
+                return postproc(resp, content)
+            self.postproc = count
+
+    return CountingRequest
+
+
+
+class MemoryBackend():
+
+    """Backend keeping the spreadsheets in memory, for tests and
+    benchmarks. SheetsMemory is only imported when it is used"""
+
+    def __init__(self, store=None):
+        """
+        :store: GridStore shared by the services, a new one if None
+
+        """
+        from SheetsMemory import GridStore
+
+        self.store = store if store is not None else GridStore()
+
+
+    def build(self):
+        """Builds an in-memory service
+        :returns: MemorySheetsService
+
+        """
+        from SheetsMemory import MemorySheetsService
+
+        return MemorySheetsService(self.store)
+
+
+
+class HttpRequest():
+
+    """Request to a Sheets API emulator, it runs when executed and keeps the
+    bytes of its response in `responseBytes`"""
+
+    def __init__(self, url, body=None, timeout=10):
+        """
+        :url: URL of the request
+        :body: JSON body, the request is a GET if None
+        :timeout: seconds to wait for the connection and for the response
+
+        """
+        self.url = url
+        self.body = body
+        self.timeout = timeout
+        self.responseBytes = 0
+
+
+    def execute(self):
+        """Runs the request
+        :returns: response of the request
+
+        """
+        from urllib.error import HTTPError
+        from urllib.request import Request, urlopen
+
+        data = None
+        headers = {}
+        if self.body is not None:
+            data = json.dumps(self.body).encode('utf8')
+            headers['Content-Type'] = 'application/json'
+
+        try:
+            response = urlopen(Request(self.url, data, headers),
+                    timeout=self.timeout)
+        except HTTPError as error:
+            content = error.read().decode('utf8')
+            try:
+                message = json.loads(content)['error']['message']
+            except (ValueError, KeyError):
+                message = content
+            raise SheetsError(error.code, message)
+
+        content = response.read()
+        self.responseBytes = len(content)
+
+        return json.loads(content.decode('utf8'))
+
+
+
+class HttpSheetsService():
+
+    """`spreadsheets()` resource talking to a Sheets API emulator"""
+
+    def __init__(self, url, timeout=10):
+        """
+        :url: base URL of the emulator, e.g. 'http://127.0.0.1:8099'
+        :timeout: seconds to wait for each request
+
+        """
+        self.url = url.rstrip('/') + '/v4/spreadsheets/'
+        self.timeout = timeout
+
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return HttpValues(self.url, self.timeout)
+
+    def sheets(self):
+        return self
+
+    def get(self, spreadsheetId, **kwargs):
+        query = '?includeGridData=true' if kwargs.get('includeGridData')\
+                else ''
+        return HttpRequest(self.url + quote(spreadsheetId, safe='') + query,
+                None, self.timeout)
+
+    def batchUpdate(self, spreadsheetId, body):
+        return HttpRequest(self.url + quote(spreadsheetId, safe='') +
+                ':batchUpdate', body, self.timeout)
+
+    def copyTo(self, spreadsheetId, sheetId, body):
+        return HttpRequest(self.url + quote(spreadsheetId, safe='') +
+                '/sheets/' + str(sheetId) + ':copyTo', body, self.timeout)
+
+
+
+class HttpValues():
+
+    """`spreadsheets().values()` resource talking to a Sheets API
+    emulator"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+
+    def get(self, spreadsheetId, range, majorDimension='ROWS'):
+        return HttpRequest(self.url + quote(spreadsheetId, safe='') +
+                '/values/' + quote(range, safe='') + '?' +
+                urlencode({'majorDimension': majorDimension}), None,
+                self.timeout)
+
+
+    def batchGet(self, spreadsheetId, ranges, majorDimension='ROWS'):
+        return HttpRequest(self.url + quote(spreadsheetId, safe='') +
+                '/values:batchGet?' + urlencode([('ranges', range_)
+                    for range_ in ranges] +
+                    [('majorDimension', majorDimension)]), None,
+                self.timeout)
+
+
+    def batchUpdate(self, spreadsheetId, body):
+        return HttpRequest(self.url + quote(spreadsheetId, safe='') +
+                '/values:batchUpdate', body, self.timeout)
+
+
+
+class HttpBackend():
+
+    """Backend talking to a local Sheets API emulator, see SheetsServer"""
+
+    def __init__(self, url, timeout=10):
+        """
+        :url: base URL of the emulator, e.g. 'http://127.0.0.1:8099'
+        :timeout: seconds to wait for each request
+
+        """
+        self.url = url
+        self.timeout = timeout
+
+
+    def build(self):
+        """Builds a service for the emulator
+        :returns: HttpSheetsService
+
+        """
+        return HttpSheetsService(self.url, self.timeout)
+
+
+
+def createBackend(config, store=None):
+    """Creates the backend selected in the configuration
+
+    :config: configuration, `backend` is 'google' (default), 'memory' or
+             'http' (with `backendUrl`, and `httpTimeout` seconds per
+             request)
+    :store: GridStore for the memory backend
+    :returns: backend instance
+
+    """
+    backend = config.get('backend', 'google')
+    if backend == 'memory':
+        return MemoryBackend(store)
+    if backend == 'http':
+        return HttpBackend(config['backendUrl'],
+                config.get('httpTimeout', 10))
+
+    return GoogleBackend(config['secretFile'], config['credentials'],
+            config['appName'], config.get('discoveryFile'))
@@ -0,0 +1,473 @@
+import copy
+import json
+import threading
+from collections import Counter
+
+import Utils_
+from SheetsBackend import SheetsError
+
+
+class GridSpreadsheet():
+
+    """Spreadsheet kept in memory, values are stored in a grid per sheet"""
+
+    def __init__(self):
+        self.sheetList = []
+        self.nextSheetId = 1000
+        self.lock = threading.RLock()
+
+
+    def addSheet(self, title, sheetId=None, columnCount=26, rowCount=1000):
+        """Adds an empty sheet
+
+        :title: title of the sheet
+        :sheetId: ID of the sheet, a new one if None
+        :columnCount: number of columns of the sheet
+        :rowCount: number of rows of the sheet
+        :returns: ID of the sheet
+
+        """
+        with self.lock:
+            if sheetId is None:
+                sheetId = self.nextSheetId
+                self.nextSheetId += 1
+            self.sheetList.append({
+                'properties': {
+                    'sheetId': sheetId,
+                    'title': title,
+                    'index': len(self.sheetList),
+                    'gridProperties': {'rowCount': rowCount,
+                        'columnCount': columnCount}
+                },
+                'cells': dict()
+            })
+
+        return sheetId
+
+
+    def findSheet(self, title=None, sheetId=None):
+        """Finds a sheet by title or ID
+
+        :title: title of the sheet
+        :sheetId: ID of the sheet
+        :returns: the sheet
+
+        """
+        for sheet in self.sheetList:
+            properties = sheet['properties']
+            if properties['title'] == title or\
+                    properties['sheetId'] == sheetId:
+                return sheet
+        raise SheetsError(400, 'Unable to parse range or find sheet: ' +
+                str(title if title is not None else sheetId))
+
+
+    def readRange(self, range_, mode):
+        """Reads a range as the values API does
+
+        :range_: A1 range with sheet name
+        :mode: 'ROWS' or 'COLUMNS'
+        :returns: matrix of values with trailing empty cells trimmed
+
+        """
+        sheetTitle, cells = Utils_.splitRange(range_)
+        with self.lock:
+            grid = self.findSheet(title=sheetTitle)['cells']
+            c0, r0, c1, r1 = Utils_.parseA1(cells)
+
+            if mode == 'COLUMNS':
+                values = [[grid.get((col, row), u'')
+                    for row in range(r0, r1+1)] for col in range(c0, c1+1)]
+            else:
+                values = [[grid.get((col, row), u'')
+                    for col in range(c0, c1+1)] for row in range(r0, r1+1)]
+
+        for line in values:
+            while line and line[-1] == u'':
+                line.pop()
+        while values and not values[-1]:
+            values.pop()
+
+        return values
+
+
+    def writeRange(self, range_, values):
+        """Writes values in row order starting at the range origin
+
+        :range_: A1 range with sheet name
+        :values: matrix with values in row order
+        :returns: number of updated cells
+
+        """
+        sheetTitle, cells = Utils_.splitRange(range_)
+        c0, r0, _, _ = Utils_.parseA1(cells)
+
+        updated = 0
+        with self.lock:
+            grid = self.findSheet(title=sheetTitle)['cells']
+            for i, row in enumerate(values):
+                for j, value in enumerate(row):
+                    grid[(c0 + j, r0 + i)] = u'' if value is None else\
+                        str(value)
+                    updated += 1
+
+        return updated
+
+
+    def get(self, withGrid=False):
+        """Builds the spreadsheet representation returned by the API
+
+        :withGrid: include the values of the sheets
+        :returns: {'sheets': [...]}
+
+        """
+        sheets = []
+        with self.lock:
+            for sheet in self.sheetList:
+                sheet_ = {'properties': copy.deepcopy(sheet['properties'])}
+                if withGrid:
+                    sheet_['data'] = [{'rowData': [
+                        {'values': [{'formattedValue': value}]}
+                        for _, value in sorted(sheet['cells'].items())]}]
+                sheets.append(sheet_)
+
+        return {'sheets': sheets}
+
+
+    def duplicateSheet(self, request):
+        """Runs a duplicateSheet request
+
+        :request: {'sourceSheetId': --, 'newSheetId': --,
+                   'newSheetName': --}
+        :returns: properties of the new sheet
+
+        """
+        source = self.findSheet(sheetId=request['sourceSheetId'])
+        title = request.get('newSheetName',
+                'Copy of ' + source['properties']['title'])
+        for sheet in self.sheetList:
+            if sheet['properties']['title'] == title:
+                raise SheetsError(400, 'A sheet with the name "' + title +
+                        '" already exists')
+            if sheet['properties']['sheetId'] == request.get('newSheetId'):
+                raise SheetsError(400, 'A sheet with the id ' +
+                        str(request['newSheetId']) + ' already exists')
+
+        grid = source['properties']['gridProperties']
+        newId = self.addSheet(title, request.get('newSheetId'),
+                grid['columnCount'], grid['rowCount'])
+        newSheet = self.findSheet(sheetId=newId)
+        newSheet['cells'] = dict(source['cells'])
+
+        return copy.deepcopy(newSheet['properties'])
+
+
+    def updateCells(self, request):
+        """Runs an updateCells request writing `userEnteredValue` from a
+        start coordinate
+
+        :request: {'rows': --, 'fields': 'userEnteredValue', 'start':
+                   {'sheetId': --, 'rowIndex': --, 'columnIndex': --}}
+        :returns: None
+
+        """
+        if request.get('fields') != 'userEnteredValue':
+            raise SheetsError(400, 'Unsupported fields: ' +
+                    str(request.get('fields')))
+
+        start = request['start']
+        grid = self.findSheet(sheetId=start['sheetId'])['cells']
+        r0 = start.get('rowIndex', 0)
+        c0 = start.get('columnIndex', 0)
+        for i, row in enumerate(request.get('rows', [])):
+            for j, cell in enumerate(row.get('values', [])):
+                entered = cell.get('userEnteredValue', {})
+                value = u''
+                if 'boolValue' in entered:
+                    value = 'TRUE' if entered['boolValue'] else 'FALSE'
+                for key in ('stringValue', 'numberValue', 'formulaValue'):
+                    if key in entered:
+                        value = str(entered[key])
+                grid[(c0 + j, r0 + i)] = value
+
+
+    def batchUpdate(self, body):
+        """Runs the requests of a spreadsheets batchUpdate, if one of them
+        fails none is applied
+
+        :body: body of the batchUpdate
+        :returns: response
+
+        """
+        with self.lock:
+            backup = copy.deepcopy(self.sheetList)
+            try:
+                replies = self.runRequests(body.get('requests', []))
+            except SheetsError:
+                self.sheetList = backup
+                raise
+
+        response = {'replies': replies}
+        if body.get('includeSpreadsheetInResponse'):
+            response['updatedSpreadsheet'] = self.get(
+                    body.get('responseIncludeGridData', False))
+
+        return response
+
+
+    def runRequests(self, requests):
+        """Runs the requests of a batchUpdate in order
+
+        :requests: list of requests
+        :returns: list of replies
+
+        """
+        replies = []
+        with self.lock:
+            for request in requests:
+                if 'deleteSheet' in request:
+                    sheet = self.findSheet(
+                            sheetId=request['deleteSheet']['sheetId'])
+                    self.sheetList.remove(sheet)
+                    replies.append({})
+                elif 'updateSheetProperties' in request:
+                    update = request['updateSheetProperties']
+                    properties = update['properties']
+                    sheet = self.findSheet(sheetId=properties['sheetId'])
+                    for field in update['fields'].split(','):
+                        sheet['properties'][field] = properties[field]
+                    replies.append({})
+                elif 'duplicateSheet' in request:
+                    replies.append({'duplicateSheet': {'properties':
+                        self.duplicateSheet(request['duplicateSheet'])}})
+                elif 'updateCells' in request:
+                    self.updateCells(request['updateCells'])
+                    replies.append({})
+                else:
+                    raise SheetsError(400, 'Unsupported request: ' +
+                            ', '.join(request))
+
+        return replies
+
+
+    def copyTo(self, sheetId):
+        """Copies a sheet within the spreadsheet
+
+        :sheetId: ID of the sheet to copy
+        :returns: properties of the new sheet
+
+        """
+        with self.lock:
+            source = self.findSheet(sheetId=sheetId)
+            grid = source['properties']['gridProperties']
+            newId = self.addSheet('Copy of ' + source['properties']['title'],
+                    None, grid['columnCount'], grid['rowCount'])
+            newSheet = self.findSheet(sheetId=newId)
+            newSheet['cells'] = dict(source['cells'])
+
+            return copy.deepcopy(newSheet['properties'])
+
+
+    def valuesGet(self, range_, mode):
+        """Runs a values get
+
+        :range_: A1 range with sheet name
+        :mode: 'ROWS' or 'COLUMNS'
+        :returns: response
+
+        """
+        return {'range': range_, 'majorDimension': mode,
+                'values': self.readRange(range_, mode)}
+
+
+    def valuesBatchGet(self, ranges, mode):
+        """Runs a values batchGet
+
+        :ranges: A1 ranges with sheet name
+        :mode: 'ROWS' or 'COLUMNS'
+        :returns: response
+
+        """
+        return {'valueRanges': [self.valuesGet(range_, mode)
+            for range_ in ranges]}
+
+
+    def valuesBatchUpdate(self, body):
+        """Runs a values batchUpdate
+
+        :body: body of the batchUpdate
+        :returns: response
+
+        """
+        return {'totalUpdatedCells': sum(self.writeRange(data['range'],
+            data['values']) for data in body['data'])}
+
+
+
+class GridStore():
+
+    """Set of in-memory spreadsheets"""
+
+    def __init__(self, plantillaId=None, columnCount=26):
+        """
+        :plantillaId: ID of an empty `plantilla` sheet added to every new
+                      spreadsheet, no sheet is added if None
+        :columnCount: number of columns of `plantilla`
+
+        """
+        self.spreadsheets = dict()
+        self.plantillaId = plantillaId
+        self.columnCount = columnCount
+        self.lock = threading.Lock()
+
+
+    def spreadsheet(self, spreadsheetId):
+        """Obtains a spreadsheet, creating it if it does not exist
+
+        :spreadsheetId: ID of the spreadsheet
+        :returns: GridSpreadsheet
+
+        """
+        with self.lock:
+            if spreadsheetId not in self.spreadsheets:
+                spreadsheet = GridSpreadsheet()
+                if self.plantillaId is not None:
+                    spreadsheet.addSheet('plantilla', self.plantillaId,
+                            self.columnCount)
+                self.spreadsheets[spreadsheetId] = spreadsheet
+
+            return self.spreadsheets[spreadsheetId]
+
+
+
+class MemoryRequest():
+
+    """Request of the in-memory service, it runs when executed like the
+    requests built by the Google API client and keeps the bytes of its
+    response in `responseBytes`"""
+
+    def __init__(self, service, method, body, handler):
+        """
+        :service: MemorySheetsService that accounts the request
+        :method: name of the API method, e.g. 'values.batchGet'
+        :body: parameters and body of the request
+        :handler: function producing the response
+
+        """
+        self.service = service
+        self.method = method
+        self.body = body
+        self.handler = handler
+        self.responseBytes = 0
+
+
+    def execute(self):
+        """Runs the request
+        :returns: response of the request
+
+        """
+        response = self.handler()
+        self.responseBytes = self.service.account(self.method, self.body,
+                response)
+
+        return response
+
+
+
+class MemorySheetsService():
+
+    """In-process stand-in of the Google sheets v4 `spreadsheets()`
+    resource over a GridStore, every call is accounted"""
+
+    def __init__(self, store):
+        """
+        :store: GridStore with the spreadsheets
+
+        """
+        self.store = store
+        self.calls = Counter()
+        self.bytesSent = 0
+        self.bytesReceived = 0
+
+
+    def account(self, method, body, response):
+        """Accounts a call and its size
+
+        :method: name of the API method
+        :body: parameters and body of the request
+        :response: response of the request
+        :returns: bytes of the response
+
+        """
+        size = len(json.dumps(response))
+        self.calls[method] += 1
+        self.bytesSent += len(json.dumps(body))
+        self.bytesReceived += size
+
+        return size
+
+
+    def stats(self):
+        """Obtains the accounted calls
+        :returns: {'calls': {method: count}, 'bytesSent': --,
+                   'bytesReceived': --}
+
+        """
+        return {'calls': dict(self.calls), 'bytesSent': self.bytesSent,
+                'bytesReceived': self.bytesReceived}
+
+
+    # spreadsheets() resource
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return MemoryValues(self)
+
+    def sheets(self):
+        return self
+
+    def get(self, spreadsheetId, **kwargs):
+        spreadsheet = self.store.spreadsheet(spreadsheetId)
+        return MemoryRequest(self, 'get', kwargs,
+                lambda: spreadsheet.get(kwargs.get('includeGridData', False)))
+
+    def batchUpdate(self, spreadsheetId, body):
+        spreadsheet = self.store.spreadsheet(spreadsheetId)
+        return MemoryRequest(self, 'batchUpdate', body,
+                lambda: spreadsheet.batchUpdate(body))
+
+    def copyTo(self, spreadsheetId, sheetId, body):
+        spreadsheet = self.store.spreadsheet(spreadsheetId)
+        return MemoryRequest(self, 'sheets.copyTo', body,
+                lambda: spreadsheet.copyTo(sheetId))
+
+
+
+class MemoryValues():
+
+    """`spreadsheets().values()` resource of the in-memory service"""
+
+    def __init__(self, service):
+        self.service = service
+
+
+    def get(self, spreadsheetId, range, majorDimension='ROWS'):
+        spreadsheet = self.service.store.spreadsheet(spreadsheetId)
+        return MemoryRequest(self.service, 'values.get',
+                {'range': range, 'majorDimension': majorDimension},
+                lambda: spreadsheet.valuesGet(range, majorDimension))
+
+
+    def batchGet(self, spreadsheetId, ranges, majorDimension='ROWS'):
+        spreadsheet = self.service.store.spreadsheet(spreadsheetId)
+        return MemoryRequest(self.service, 'values.batchGet',
+                {'ranges': ranges, 'majorDimension': majorDimension},
+                lambda: spreadsheet.valuesBatchGet(ranges, majorDimension))
+
+
+    def batchUpdate(self, spreadsheetId, body):
+        spreadsheet = self.service.store.spreadsheet(spreadsheetId)
+        return MemoryRequest(self.service, 'values.batchUpdate', body,
+                lambda: spreadsheet.valuesBatchUpdate(body))
@@ -1,16 +1,20 @@
 from __future__ import print_function
-import httplib2
 import os
-import codecs
+import random
 import re
+import hashlib
+import json
 import Utils_
+import Tracing
 
 from DoubleChooser import DoubleChooser
+from Roster import Roster
+from SheetSnapshot import SheetSnapshot
+from SheetsBackend import GoogleBackend
 
-from apiclient import discovery
-from oauth2client import client
-from oauth2client import tools
-from oauth2client.file import Storage
+BetMatrix = Utils_.LazyModule('BetMatrix')
+Reductions = Utils_.LazyModule('Reductions')
+Scoring = Utils_.LazyModule('Scoring')
 
 
 
@@ -18,7 +22,10 @@ class SheetsOperator():
     """Class with operations for google sheets"""
 
     def __init__(self, secretFile, credentials, spreadSheetId, plantillaId,
-            appName, people):
+            appName, people, backend=None, chooser=DoubleChooser,
+            metrics=None, limiter=None, chunkColumns=26, reductionHits=None,
+            reductionBudget=None, reductionStart='F18',
+            reductionMaxColumns=4096):
         """Inits a SheetsOperator
         :secretFile: secretFile path
         :credentials: credentials folder path
@@ -27,6 +34,21 @@ class SheetsOperator():
         :appName: application name
         :people: TXT file with the people playing this footballDay, this file
                  should have a person name in each line
+        :backend: backend building the sheets service (see SheetsBackend),
+                  the Google one if None
+        :chooser: DoubleChooser class selecting the doubles
+        :metrics: Metrics recording the API requests, None to not record
+        :limiter: RateLimiter pacing and retrying the API requests, which
+                  are sent directly if None
+        :chunkColumns: maximum number of participant columns requested in
+                       each range of the tick batchGet
+        :reductionHits: hits guaranteed by the reduced columns written with
+                        the doubles, None to not write them
+        :reductionBudget: maximum number of reduced columns, None for no
+                          limit
+        :reductionStart: top left cell of the reduced columns
+        :reductionMaxColumns: biggest system that is reduced, None for no
+                              limit
         """
         self.secretFile = secretFile
         self.credentials = credentials
@@ -34,56 +56,76 @@ class SheetsOperator():
         self.plantillaId = plantillaId
         self.service = None
         self.appName = appName
+        self.backend = backend
+        self.chooser = chooser
+        self.metrics = metrics
+        self.limiter = limiter
         self.peopleF = people
-        self.people = []
+        self.chunkColumns = chunkColumns
+        self.reductionHits = reductionHits
+        self.reductionBudget = reductionBudget
+        self.reductionStart = reductionStart
+        self.reductionMaxColumns = reductionMaxColumns
+        self.roster = Roster(people)
+        self.people = self.roster.names
+        self.sheets = None
+        self.columnCounts = dict()
+        self.plantillaColumns = None
+        self.snapshots = dict()
+        self.written = dict()
 
         self.readPeople()
+        # New people may come with new columns in the sheets
+        self.roster.subscribe(lambda names: self.columnCounts.clear())
 
 
-        
+
+    def execute(self, method, request, readKey=None):
+        """Executes a request of the sheets service through the rate
+        limiter, recording each attempt in the metrics
+
+        :method: method of the request, e.g. 'values.batchGet'
+        :request: request of the service
+        :readKey: tuple with the parameters of a read, identical concurrent
+                  reads are coalesced. None for writes
+        :returns: response of the request
+
+        """
+        if self.metrics is None:
+            run = request.execute
+        else:
+            run = lambda: self.metrics.execute(method, request)
+
+        with Tracing.span('sheets', method=method):
+            if self.limiter is None:
+                return run()
+
+            key = None
+            if readKey is not None:
+                key = (self.spreadsheetId, method) + readKey
+
+            return self.limiter.call(run, key)
+
 
     def readPeople(self):
-        """Reads the people names in the file and store them in class
+        """Refreshes the set of people names, the file is only read if it
+        changed
         :returns: None
 
         """
-        self.people = []
-
-        f = codecs.open(self.peopleF, 'r', encoding='utf8')
-        line = f.readline()
-        while line:
-            self.people.append(line[0:-1])
-            line = f.readline()
+        self.roster.refresh()
+        self.people = self.roster.names
 
 
     def startService(self):
-        """Starts the Google sheets API service
+        """Starts the sheets API service of the backend
         :returns: None
 
         """
-        
-        # Get credentials
-        credential_dir = self.credentials
-        if not os.path.exists(credential_dir):
-            os.makedirs(credential_dir)
-        credential_path = os.path.join(credential_dir,
-                                   'sheets.googleapis.com-python-quickstart.json')
-
-        store = Storage(credential_path)
-        credentials = store.get()
-        if not credentials or credentials.invalid:
-            flow = client.flow_from_clientsecrets(self.secretFile, 'https://www.googleapis.com/auth/spreadsheets')
-            flow.user_agent = self.appName
-            credentials = tools.run_flow(flow, store)
-            print('Storing credentials to ' + credential_path)
-
-        
-        # Get service
-        http = credentials.authorize(httplib2.Http())
-        discoveryUrl = ('https://sheets.googleapis.com/$discovery/rest?'
-                        'version=v4')
-        self.service = discovery.build('sheets', 'v4', http=http,
-                                  discoveryServiceUrl=discoveryUrl)
+        if self.backend is None:
+            self.backend = GoogleBackend(self.secretFile, self.credentials,
+                    self.appName)
+        self.service = self.backend.build()
 
 
     def deleteSheet(self, sheetId):
@@ -100,8 +142,46 @@ class SheetsOperator():
                 }
             }]
         }
-        self.service.spreadsheets().batchUpdate(
-                spreadsheetId=self.spreadsheetId, body=body).execute()
+        self.execute('spreadsheets.batchUpdate',
+                self.service.spreadsheets().batchUpdate(
+                    spreadsheetId=self.spreadsheetId, body=body))
+        self.invalidate()
+
+
+    def invalidate(self, sheetTitle=None):
+        """Drops the cached sheets and snapshots, so next reads go to the API
+
+        :sheetTitle: title of the sheet whose snapshot is dropped, if None
+                     the sheets list and all the snapshots are dropped
+        :returns: None
+
+        """
+        if sheetTitle is None:
+            self.sheets = None
+            self.snapshots = dict()
+        else:
+            self.snapshots.pop(sheetTitle, None)
+
+
+    def getSnapshot(self, sheetTitle):
+        """Obtains the snapshot of a sheet, fetching it in a single
+        batchGet if it is not cached since last invalidate
+
+        :sheetTitle: title of the sheet
+        :returns: SheetSnapshot
+
+        """
+        if sheetTitle not in self.snapshots:
+            participantRanges = SheetSnapshot.participantRanges(
+                    self.columnCount(sheetTitle), self.chunkColumns,
+                    len(self.people))
+            ranges = [sheetTitle + '!' + range_ for range_ in
+                    SheetSnapshot.RANGES + participantRanges]
+            valueRanges = self.valuesBatchGet(ranges, 'COLUMNS')
+            self.snapshots[sheetTitle] = SheetSnapshot(sheetTitle,
+                    valueRanges, participantRanges)
+
+        return self.snapshots[sheetTitle]
 
 
     def getSheets(self):
@@ -116,11 +196,48 @@ class SheetsOperator():
             ]
 
         """
-        result = self.service.spreadsheets().get(
-                spreadsheetId=self.spreadsheetId).execute()
-        sheets = result.get("sheets", [])
+        if self.sheets is None:
+            result = self.execute('spreadsheets.get',
+                    self.service.spreadsheets().get(
+                        spreadsheetId=self.spreadsheetId,
+                        fields='sheets.properties'), ())
+            self.sheets = result.get("sheets", [])
+            for sheet in self.sheets:
+                properties = sheet['properties']
+                columns = properties.get('gridProperties', {}).get(
+                        'columnCount', 0)
+                self.columnCounts[properties['title']] = columns
+                if properties['sheetId'] == self.plantillaId:
+                    self.plantillaColumns = columns
+
+        return self.sheets
+
+
+    def columnCount(self, sheetTitle):
+        """Obtains the number of columns of a sheet, it is kept across
+        invalidations as the sheets only grow when people are added
+
+        :sheetTitle: title of the sheet
+        :returns: number of columns
+
+        """
+        if sheetTitle not in self.columnCounts:
+            self.sheets = None
+            self.getSheets()
+
+        return self.columnCounts.get(sheetTitle, 0)
+
+    def sheetsRevision(self):
+        """Obtains a revision of the sheets of the spreadsheet, it changes
+        when a sheet is created, deleted or renamed
+        :returns: hexadecimal digest
+
+        """
+        sheets = sorted((sheet['properties']['sheetId'],
+            sheet['properties']['title']) for sheet in self.getSheets())
+
+        return hashlib.sha1(json.dumps(sheets).encode('utf8')).hexdigest()
 
-        return sheets
 
     def checkBornFootballDay(self):
         """Determines if people have created a new sheet to be filled
@@ -186,7 +303,10 @@ class SheetsOperator():
         body = {
             "destinationSpreadsheetId": self.spreadsheetId,
         }
-        result = self.service.spreadsheets().sheets().copyTo(spreadsheetId=self.spreadsheetId, sheetId=self.plantillaId, body=body).execute()
+        result = self.execute('sheets.copyTo',
+                self.service.spreadsheets().sheets().copyTo(
+                    spreadsheetId=self.spreadsheetId,
+                    sheetId=self.plantillaId, body=body))
         createdSheetId = result.get('sheetId', [])
 
 
@@ -204,17 +324,95 @@ class SheetsOperator():
                     "fields": "title"
                 }
             }
-          ],
-          "includeSpreadsheetInResponse": True,
-          "responseIncludeGridData": True,
+          ]
         }
-        result = self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheetId, body=body).execute()
+        result = self.execute('spreadsheets.batchUpdate',
+                self.service.spreadsheets().batchUpdate(
+                    spreadsheetId=self.spreadsheetId, body=body))
         updatedSheet = result.get('replies', [])
+        self.invalidate()
+        self.written.pop(title, None)
         # createdSheetName = updatedSheet['addSheet']['properties']['title']
 
         return createdSheetId, title
 
 
+    def newSheetId(self):
+        """Chooses an ID for a new sheet, different from the known ones
+        :returns: sheet ID
+
+        """
+        used = set()
+        if self.sheets is not None:
+            used = set(sheet['properties']['sheetId'] for sheet in
+                    self.sheets)
+
+        sheetId = random.randint(1, 2**31 - 1)
+        while sheetId in used:
+            sheetId = random.randint(1, 2**31 - 1)
+
+        return sheetId
+
+
+    def planFootballDay(self, plan, footballDay, bornSheetId):
+        """Adds to a plan the replacement of the sheet created by the
+        people with a copy of plantilla for the football day
+
+        :plan: RequestPlan
+        :footballDay: number of football day
+        :bornSheetId: ID of the sheet entitled with the football day number
+        :returns: sheetId, sheetTitle of the football day sheet
+
+        """
+        sheetId = self.newSheetId()
+        title = "Jornada " + str(footballDay)
+        plan.deleteSheet(bornSheetId)
+        plan.duplicateSheet(self.plantillaId, sheetId, title)
+
+        # The copy has the columns of plantilla
+        if self.plantillaColumns is not None:
+            self.columnCounts[title] = self.plantillaColumns
+
+        return sheetId, title
+
+
+    def planMatches(self, plan, matches, sheetId, sheetTitle):
+        """Adds to a plan the matches of a new football day sheet
+
+        :plan: RequestPlan
+        :matches: matches, see `fillMatches`
+        :sheetId: ID of the sheet
+        :sheetTitle: title of the sheet
+        :returns: None
+
+        """
+        matchRows = []
+        for match in matches:
+            matchRows.append([match['local'], match['visiting']])
+
+        plan.updateValues(sheetId, "A1:B15", matchRows)
+        self.written.pop(sheetTitle, None)
+        self.setWritten(sheetTitle, "A1:B15", matchRows)
+
+
+    def sendPlan(self, plan):
+        """Sends the requests of a plan in one batchUpdate
+
+        :plan: RequestPlan
+        :returns: replies of the requests
+
+        """
+        if not len(plan):
+            return []
+
+        result = self.execute('spreadsheets.batchUpdate',
+                self.service.spreadsheets().batchUpdate(
+                    spreadsheetId=self.spreadsheetId, body=plan.body()))
+        self.invalidate()
+
+        return result.get('replies', [])
+
+
     def footballDayFinished(self, sheetTitle):
         """Checks if the football day in `sheetTitle` has finished
 
@@ -231,9 +429,9 @@ class SheetsOperator():
         results = results[0]
         # Not all matches finished
         i = 0
-        someEmpty = False
+        someEmpty = len(results) < 15
         while not someEmpty and i < len(results):
-            someEmpty = results[i]
+            someEmpty = results[i] == u''
             i += 1
 
         return not someEmpty
@@ -246,22 +444,106 @@ class SheetsOperator():
         :range: range to be updated
         :returns: the result of the request
 
+        """
+        return self.valuesBatchUpdate([(range_, values)])
+
+
+    def valuesBatchUpdate(self, data):
+        """Updates several ranges of values in a single request
+
+        :data: list of (range_, values) tuples
+        :returns: the result of the request
+
         """
         bodyUp = {
             'valueInputOption': "USER_ENTERED",
-            'data': [
-                {
-                    'range': range_,
-                    'values': values
-                }
-            ]
+            'data': [{'range': range_, 'values': values}
+                for range_, values in data]
         }
 
-        result = self.service.spreadsheets().values().batchUpdate(spreadsheetId=self.spreadsheetId, body=bodyUp).execute()
+        result = self.execute('values.batchUpdate',
+                self.service.spreadsheets().values().batchUpdate(
+                    spreadsheetId=self.spreadsheetId, body=bodyUp))
+        for range_, _ in data:
+            self.invalidate(Utils_.splitRange(range_)[0])
 
         return result
 
 
+    def setWritten(self, sheetTitle, cells, rows):
+        """Takes `rows` as the last written values of a range, e.g. the
+        ones of a checkpoint, so valuesDeltaUpdate skips them
+
+        :sheetTitle: title of the sheet
+        :cells: cells range without sheet name, e.g. 'E1:E15'
+        :rows: matrix with values in row order
+        :returns: None
+
+        """
+        c0, r0, _, _ = Utils_.parseA1(cells)
+        written = self.written.setdefault(sheetTitle, dict())
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                written[(c0 + j, r0 + i)] = value
+
+
+    def valuesDeltaUpdate(self, sheetTitle, cells, rows):
+        """Writes only the cells of `rows` whose value differs from the
+        current one: the one in the fetched snapshot of the sheet, or the
+        last written one if the snapshot was dropped after a write.
+
+        :sheetTitle: title of the sheet
+        :cells: cells range without sheet name, e.g. 'E1:E15'
+        :rows: matrix with values in row order
+        :returns: number of cells written
+
+        """
+        c0, r0, c1, r1 = Utils_.parseA1(cells)
+        written = self.written.setdefault(sheetTitle, dict())
+
+        # The snapshot supersedes the written values, e.g. if someone edited
+        # the sheet since they were written
+        snapshot = self.snapshots.get(sheetTitle)
+        current = snapshot.getRange(cells, 'ROWS') if snapshot else None
+        if current is not None:
+            for i in range(r1 - r0 + 1):
+                row = current[i] if i < len(current) else []
+                for j in range(c1 - c0 + 1):
+                    written[(c0 + j, r0 + i)] = row[j] if j < len(row) else\
+                            u''
+
+        # Group changed cells in vertical runs of each column
+        changed = sorted((c0 + j, r0 + i)
+                for i, row in enumerate(rows)
+                for j, value in enumerate(row)
+                if written.get((c0 + j, r0 + i), u'') != value)
+        runs = []
+        for col, row in changed:
+            value = rows[row - r0][col - c0]
+            if runs and runs[-1][0] == col and\
+                    runs[-1][1] + len(runs[-1][2]) == row:
+                runs[-1][2].append([value])
+            else:
+                runs.append((col, row, [[value]]))
+
+        if not runs:
+            return 0
+
+        data = []
+        for col, row, values in runs:
+            range_ = sheetTitle + '!' + Utils_.indexToCol(col) + str(row + 1)
+            if len(values) > 1:
+                range_ += ':' + Utils_.indexToCol(col) +\
+                        str(row + len(values))
+            data.append((range_, values))
+        self.valuesBatchUpdate(data)
+
+        for col, row in changed:
+            written[(col, row)] = rows[row - r0][col - c0]
+
+        return len(changed)
+
+
     def valuesGetRange(self, range_, mode):
         """Obtains the values in a range_
         the range of values will be provided in `mode` order
@@ -273,35 +555,54 @@ class SheetsOperator():
         :returns: matrix with values in row order
 
         """
-
-        result = self.service.spreadsheets().values().get(spreadsheetId=self.spreadsheetId, range=range_, majorDimension=mode).execute()
+        # Answer from the tick snapshot if it holds the range
+        sheetTitle, cells = Utils_.splitRange(range_)
+        if sheetTitle and (SheetSnapshot.covers(cells) or
+                sheetTitle in self.snapshots):
+            values = self.getSnapshot(sheetTitle).getRange(cells, mode)
+            if values is not None:
+                return values
+
+        result = self.execute('values.get',
+                self.service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheetId, range=range_,
+                    majorDimension=mode), (range_, mode))
         return result.get('values', [])
-        
+
+
+    def valuesBatchGet(self, ranges, mode):
+        """Obtains the values of several ranges in a single request
+
+        :ranges: list of ranges to obtain
+        :mode: 'ROWS' or 'COLUMNS'
+        :returns: list of valueRanges, in the same order than `ranges`
+
+        """
+        result = self.execute('values.batchGet',
+                self.service.spreadsheets().values().batchGet(
+                    spreadsheetId=self.spreadsheetId, ranges=ranges,
+                    majorDimension=mode), (tuple(ranges), mode))
+
+        return result.get('valueRanges', [])
+
 
     def colsFilled(self, sheetName):
-        """Checks if all the people have filled their columns
+        """Checks if all the people have filled their columns, the columns
+        are found by the names in row 16 of F:M and of the columns from S
+        on
         :sheetName: name of the sheet to get values from
         :returns: boolean
 
         """
+        self.readPeople() # Refresh who's playing
+        snapshot = self.getSnapshot(sheetName)
 
+        # Stop on the first person with an empty cell
+        for personCol in snapshot.participantColumns():
+            if personCol[15] in self.people and u'' in personCol[0:15]:
+                return False
 
-        self.readPeople() # Refresh who's playing
-        range_ = sheetName + "!F1:M16"
-        peopleCols = self.valuesGetRange(range_, 'COLUMNS')
-        allFilled = True
-        i = 0
-        while allFilled and i < len(peopleCols):
-            personCol = peopleCols[i]
-            person = personCol[15]
-            if person in self.people:
-                pMatches = personCol[0:-1]
-                allFilled = allFilled and reduce(
-                        lambda x,y: x!=u'' and y!=u'',
-                        pMatches)
-            i += 1
-        
-        return allFilled
+        return True
 
     def fillMatches(self, matches, sheetTitle):
         """Fills a new sheet with the football matches
@@ -323,8 +624,7 @@ class SheetsOperator():
         for match in matches:
             matchRows.append([match['local'], match['visiting']])
 
-        range_ = sheetTitle + "!A1:B15"
-        self.valuesUpdate(matchRows, range_)
+        self.valuesDeltaUpdate(sheetTitle, "A1:B15", matchRows)
 
 
     def fillResults(self, matches, sheetTitle):
@@ -346,62 +646,145 @@ class SheetsOperator():
         for match in matches:
             results.append([match['result']])
 
-        range_ = sheetTitle + "!E1:E15"
-        self.valuesUpdate(results, range_)
+        self.valuesDeltaUpdate(sheetTitle, "E1:E15", results)
 
 
     def doublesFilled(self, sheetTitle, numDoubles):
         """Checks if the doubles column is filled in the football day
-           associated to the sheet with name `sheetTitle`
+           associated to the sheet with name `sheetTitle`. The strategies
+           fill a different number of cells (e.g. a triple takes the
+           columns of two doubles), so the filled cells are compared with
+           the ones the chooser fills for the bets of the sheet
 
         :sheetTitle: title of the sheet
         :numDoubles: number of doubles to be filled
         :returns: boolean
 
         """
+        if numDoubles == 0:
+            return True
+
+        betMatrix = self.getBetMatrix(sheetTitle)
+        freqs = betMatrix.freqs()
+        chooser = self.chooser(freqs.tolist(),
+                betMatrix.modes(freqs).tolist(), betMatrix.participants(),
+                numDoubles)
+
         doubles = self.valuesGetRange(sheetTitle + "!R1:R14", "COLUMNS")
-        if not doubles:
-            return False
-        doubles = doubles[0]
-        filledDoubles = 0
-        for double in doubles:
-            filledDoubles += 1 if double != u'' else 0
+        filled = 0
+        if doubles:
+            filled = sum(1 for double in doubles[0] if double != u'')
+
+        return filled >= chooser.numCells()
+
+
+    def getBetMatrix(self, sheetName):
+        """Obtains the bets of the people playing
+
+        :sheetName: name of the sheet
+        :returns: BetMatrix
+
+        """
+        self.readPeople()
+        peopleCols = self.getSnapshot(sheetName).participantColumns()
 
-        return filledDoubles == numDoubles
+        return BetMatrix.BetMatrix.fromColumns(peopleCols, self.people)
+
+
+    def getScorer(self, sheetName):
+        """Obtains the scorer of the bets and the doubles of a completed
+        football day, both ranges are in the tick snapshot
+
+        :sheetName: name of the sheet
+        :returns: Scorer
+
+        """
+        betMatrix = self.getBetMatrix(sheetName)
+        doubles = self.valuesGetRange(sheetName + "!R1:R14", "COLUMNS")
+        doubleCol = doubles[0] if doubles else []
+
+        return Scoring.Scorer(betMatrix, betMatrix.modes(), doubleCol)
 
 
     def fillDoubles(self, sheetName, numDoubles):
-        """Fills the doubles of a completed football day
+        """Fills the doubles of a completed football day, frequencies and
+        modes are computed from the bets, the sheet formulas are only
+        displayed
 
         :sheetName: name of the sheet
         :numDoubles: obtains the number of doubles
-        :returns: None
+        :returns: frequencies and modes the doubles were chosen from
 
         """
-        
-        freqs = self.valuesGetRange(sheetName + "!O1:Q14", "ROWS")
-        modes = self.valuesGetRange(sheetName + "!N1:N14", "COLUMNS")
-        modes = modes[0]
-
-        # Convert values to integers
-        freqsInt = []
-        modesInt = [int(mode) for mode in modes]
-        for freqs_ in freqs:
-            row = []
-            for freq in freqs_:
-                row.append(int(freq))
-            freqsInt.append(row)
+        betMatrix = self.getBetMatrix(sheetName)
+        freqs = betMatrix.freqs()
+        freqsInt = freqs.tolist()
+        modesInt = betMatrix.modes(freqs).tolist()
 
         # Obtain the doubles
-        doubleChooser = DoubleChooser(freqsInt, modesInt,
-                len(self.people), numDoubles)
+        doubleChooser = self.chooser(freqsInt, modesInt,
+                betMatrix.participants(), numDoubles)
         doubles = doubleChooser.tellDoubles()
 
         # Encapsulate each value in a list
         doubles_ = []
         for double in doubles:
             doubles_.append([double])
-        self.valuesUpdate(doubles_, sheetName + "!R1:R14")
+        data = [(sheetName + "!R1:R14", doubles_)]
+        if self.reductionHits is not None:
+            reduction = self.reductionRange(sheetName, modesInt, doubles,
+                    self.reductionStart)
+            if reduction is not None:
+                data.append(reduction)
+        self.valuesBatchUpdate(data)
+
+        return freqsInt, modesInt
+
+
+    def reductionRange(self, sheetName, modes, doubles, start='F18'):
+        """Reduces the system of the modes plus the doubles or triples to
+        the columns guaranteeing `reductionHits` if every result falls
+        inside it, see `Reductions.greedyCover`. Nothing is written if the
+        system has more than `reductionMaxColumns` columns or the target
+        cells hold other values, e.g. notes of the people
+
+        :sheetName: name of the sheet
+        :modes: modes of the 14 matches with the sheet encoding
+        :doubles: column of doubles, e.g. ['X', '', 'X2', ...]
+        :start: top left cell of the reduced columns, each one is written
+                in a row from it
+        :returns: (range_, values) to be written, None to skip them
+
+        """
+        masks = Reductions.systemMasks(modes, doubles)
+        size = Reductions.systemSize(masks)
+        if self.reductionMaxColumns is not None and\
+                size > self.reductionMaxColumns:
+            Tracing.log('system too big to reduce', sheet=sheetName,
+                    columns=size)
+            return None
+        try:
+            codes = Reductions.greedyCover(masks, self.reductionHits,
+                    self.reductionBudget)
+        except ValueError as error:
+            Tracing.log('system too big to reduce', sheet=sheetName,
+                    columns=size, error=str(error))
+            return None
+        rows = Reductions.toSigns(codes)
+
+        c0, r0, _, _ = Utils_.parseA1(start)
+        range_ = sheetName + '!' + start + ':' +\
+                Utils_.indexToCol(c0 + Reductions.MATCHES - 1) +\
+                str(r0 + max(len(rows), 1))
+
+        # A restart writes the same columns again
+        current = self.valuesGetRange(range_, 'ROWS')
+        if any(current) and current != rows:
+            Tracing.log('reduction cells not empty', sheet=sheetName,
+                    range=range_)
+            return None
+
+        return range_, rows
 
 
 
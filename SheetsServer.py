@@ -0,0 +1,194 @@
+#!/usr/bin/python
+
+import argparse
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+from SheetsMemory import GridStore, SheetsError
+
+
+class SheetsHandler(BaseHTTPRequestHandler):
+
+    """Handler emulating the v4 endpoints used by SheetsOperator"""
+
+    ROUTES = [
+        ('GET', r'^/v4/spreadsheets/([^/:]+)$', 'get'),
+        ('POST', r'^/v4/spreadsheets/([^/:]+):batchUpdate$', 'batchUpdate'),
+        ('GET', r'^/v4/spreadsheets/([^/:]+)/values:batchGet$',
+            'valuesBatchGet'),
+        ('POST', r'^/v4/spreadsheets/([^/:]+)/values:batchUpdate$',
+            'valuesBatchUpdate'),
+        ('GET', r'^/v4/spreadsheets/([^/:]+)/values/(.+)$', 'valuesGet'),
+        ('POST', r'^/v4/spreadsheets/([^/:]+)/sheets/(\d+):copyTo$',
+            'copyTo'),
+    ]
+
+    protocol_version = 'HTTP/1.1'
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+    def reply(self, status, body):
+        """Sends a JSON response
+
+        :status: HTTP status code
+        :body: JSON serializable body
+        :returns: None
+
+        """
+        data = json.dumps(body).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+    def handle_request(self, verb):
+        """Routes a request to the store
+
+        :verb: 'GET' or 'POST'
+        :returns: None
+
+        """
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length).decode('utf8'))\
+                if length else {}
+
+        server = self.server
+        time.sleep(server.latency)
+        try:
+            server.checkQuota()
+            for verb_, pattern, method in self.ROUTES:
+                match = re.match(pattern, url.path)
+                if verb_ == verb and match:
+                    break
+            else:
+                raise SheetsError(404, 'Not found: ' + url.path)
+
+            spreadsheet = server.store.spreadsheet(unquote(match.group(1)))
+            mode = query.get('majorDimension', ['ROWS'])[0]
+            if method == 'get':
+                withGrid = query.get('includeGridData', ['false'])[0]
+                response = spreadsheet.get(withGrid == 'true')
+            elif method == 'batchUpdate':
+                response = spreadsheet.batchUpdate(body)
+            elif method == 'valuesBatchGet':
+                response = spreadsheet.valuesBatchGet(
+                        query.get('ranges', []), mode)
+            elif method == 'valuesBatchUpdate':
+                response = spreadsheet.valuesBatchUpdate(body)
+            elif method == 'valuesGet':
+                response = spreadsheet.valuesGet(unquote(match.group(2)),
+                        mode)
+            else:
+                response = spreadsheet.copyTo(int(match.group(2)))
+        except SheetsError as error:
+            self.reply(error.resp.status, {'error': {
+                'code': error.resp.status, 'message': error.message}})
+            return
+
+        self.reply(200, response)
+
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+
+
+class SheetsServer(ThreadingHTTPServer):
+
+    """Local HTTP server emulating the Sheets v4 API over a GridStore"""
+
+    daemon_threads = True
+
+
+    def __init__(self, store, host='127.0.0.1', port=0, latency=0,
+            quotaPerMinute=None):
+        """
+        :store: GridStore with the spreadsheets
+        :host: address to listen at
+        :port: port to listen at, a free one if 0
+        :latency: seconds added to every request
+        :quotaPerMinute: requests accepted per minute, beyond it requests
+                         are answered with 429. No limit if None
+
+        """
+        ThreadingHTTPServer.__init__(self, (host, port), SheetsHandler)
+        self.store = store
+        self.latency = latency
+        self.quotaPerMinute = quotaPerMinute
+        self.requests = deque()
+        self.quotaLock = threading.Lock()
+
+
+    def url(self):
+        """Obtains the base URL of the server
+        :returns: 'http://host:port'
+
+        """
+        return 'http://' + self.server_address[0] + ':' +\
+                str(self.server_address[1])
+
+
+    def checkQuota(self):
+        """Accounts a request in the per minute quota
+        :returns: None, raises a SheetsError if the quota is exceeded
+
+        """
+        if self.quotaPerMinute is None:
+            return
+
+        with self.quotaLock:
+            now = time.time()
+            while self.requests and self.requests[0] < now - 60:
+                self.requests.popleft()
+            if len(self.requests) >= self.quotaPerMinute:
+                raise SheetsError(429, 'Quota exceeded for quota metric '
+                        '\'Read requests\' per minute')
+            self.requests.append(now)
+
+
+    def start(self):
+        """Serves the requests in a background thread
+        :returns: base URL of the server
+
+        """
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        return self.url()
+
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(
+            description='Local emulator of the Google Sheets v4 API')
+    argParser.add_argument('--host', default='127.0.0.1')
+    argParser.add_argument('--port', type=int, default=8099)
+    argParser.add_argument('--latency', type=float, default=0,
+            help='seconds added to every request')
+    argParser.add_argument('--quota', type=int, default=None,
+            help='requests per minute before answering 429')
+    argParser.add_argument('--plantilla', type=int, default=None,
+            help='ID of the plantilla sheet added to new spreadsheets')
+    args = argParser.parse_args()
+
+    server = SheetsServer(GridStore(args.plantilla), args.host, args.port,
+            args.latency, args.quota)
+    print('Serving Sheets API at ' + server.url())
+    server.serve_forever()
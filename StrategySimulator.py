@@ -0,0 +1,241 @@
+#!/usr/bin/python
+
+import argparse
+import copy
+import json
+import multiprocessing
+import random
+from collections import Counter
+
+from DoubleChooser import CHOOSERS, getChooser
+from ResultsStore import ResultsStore
+
+
+# Sheet mode value -> sign, as in DoubleChooser.getDoubleCol
+MODE_SIGNS = {0: 'X', 1: '1', 2: '2'}
+
+
+def readHistory(path):
+    """Reads the football days recorded by the daemon
+
+    :path: JSON lines file, see `QuinielaDaemon.recordHistory`
+    :returns: list of {'season', 'jornada', 'participants', 'freqs',
+              'modes'}
+
+    """
+    history = []
+    with open(path, 'r') as historyF:
+        for line in historyF:
+            if line.strip():
+                history.append(json.loads(line))
+
+    return history
+
+
+def countHits(modes, doubleCol, results):
+    """Counts the hits of the bet for the first 14 matches, a match is hit
+    if its result is the mode sign or one of the signs of its cell
+
+    :modes: modes of each match
+    :doubleCol: column of doubles, e.g. ['X', '', '1X', ...]
+    :results: results of each match, e.g. ['1', 'X', ...]
+    :returns: number of hits
+
+    """
+    hits = 0
+    for row in range(14):
+        if results[row] == MODE_SIGNS[modes[row]] or\
+                results[row] in doubleCol[row]:
+            hits += 1
+
+    return hits
+
+
+def countColumns(doubleCol):
+    """Counts the columns a bet spends, a cell with one sign is a double and
+    a cell with two signs a triple
+
+    :doubleCol: column of doubles, e.g. ['X', '', '1X', ...]
+    :returns: number of columns
+
+    """
+    columns = 1
+    for cell in doubleCol[0:14]:
+        columns *= len(cell) + 1
+
+    return columns
+
+
+def simulate(task):
+    """Replays a football day with a strategy several times, each trial
+    breaks the ties randomly
+
+    :task: (strategy, record, results, numDoubles, seed, trials)
+    :returns: (strategy, Counter with the number of trials of each hits
+              count, columns spent by all the trials)
+
+    """
+    strategy, record, results, numDoubles, seed, trials = task
+    random.seed(seed)
+    chooserClass = getChooser(strategy)
+
+    hitsCount = Counter()
+    columns = 0
+    for trial in range(trials):
+        # Choosers may modify the frequencies
+        chooser = chooserClass(copy.deepcopy(record['freqs']),
+                list(record['modes']), record['participants'], numDoubles)
+        doubleCol = chooser.tellDoubles()
+        hitsCount[countHits(record['modes'], doubleCol, results)] += 1
+        columns += countColumns(doubleCol)
+
+    return strategy, hitsCount, columns
+
+
+
+class StrategySimulator():
+
+    """Monte Carlo comparison of the doubles strategies over past football
+    days"""
+
+    def __init__(self, store, numDoubles, trials, workers=None, seed=0,
+            chunk=250):
+        """
+        :store: ResultsStore with the real results
+        :numDoubles: number of doubles of the strategies
+        :trials: randomized trials of each strategy and football day
+        :workers: processes of the pool, one per core if None
+        :seed: seed of the trials
+        :chunk: maximum trials of a pool task
+
+        """
+        self.store = store
+        self.numDoubles = numDoubles
+        self.trials = trials
+        self.workers = workers or multiprocessing.cpu_count()
+        self.seed = seed
+        self.chunk = chunk
+
+
+    def getResults(self, record):
+        """Obtains the results of the first 14 matches of a football day
+
+        :record: history record of the football day
+        :returns: list with 14 signs, None if the day is not fully stored
+
+        """
+        matches = self.store.getMatches(record['season'], record['jornada'])
+        results = [match['result'] for match in matches[0:14]]
+        if len(results) < 14 or any(result not in ('1', 'X', '2')
+                for result in results):
+            return None
+
+        return results
+
+
+    def tasks(self, history, strategies):
+        """Splits the trials in pool tasks
+
+        :history: history records
+        :strategies: names of the strategies
+        :returns: (list of tasks for `simulate`, number of days replayed)
+
+        """
+        tasks = []
+        days = 0
+        for record in history:
+            results = self.getResults(record)
+            if results is None:
+                continue
+            days += 1
+            for strategy in strategies:
+                done = 0
+                while done < self.trials:
+                    trials = min(self.chunk, self.trials - done)
+                    tasks.append((strategy, record, results, self.numDoubles,
+                        self.seed + len(tasks), trials))
+                    done += trials
+
+        return tasks, days
+
+
+    def run(self, history, strategies):
+        """Simulates the strategies over the recorded football days
+
+        :history: history records, see `readHistory` and
+                  `ResultsStore.votedDays`
+        :strategies: names of the strategies
+        :returns: {'days': --, 'strategies': {strategy: {'hits': {hits:
+                  trials}, 'mean': --, 'columns': --, 'hitsPerColumn': --,
+                  'trials': --}}}, where columns is the mean of columns
+                  spent by a trial
+
+        """
+        tasks, days = self.tasks(history, strategies)
+        hitsCounts = dict((strategy, Counter()) for strategy in strategies)
+        columns = Counter()
+
+        pool = multiprocessing.Pool(self.workers)
+        try:
+            for strategy, hitsCount, taskColumns in\
+                    pool.imap_unordered(simulate, tasks):
+                hitsCounts[strategy].update(hitsCount)
+                columns[strategy] += taskColumns
+        finally:
+            pool.close()
+            pool.join()
+
+        report = {'days': days, 'strategies': dict()}
+        for strategy, hitsCount in hitsCounts.items():
+            trials = sum(hitsCount.values())
+            hits = sum(hits * count for hits, count in hitsCount.items())
+            report['strategies'][strategy] = {
+                'hits': dict(sorted(hitsCount.items())),
+                'mean': hits / trials if trials else None,
+                'columns': columns[strategy] / trials if trials else None,
+                'hitsPerColumn': hits / columns[strategy] if trials else
+                        None,
+                'trials': trials
+            }
+
+        return report
+
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(
+            description='Compares the doubles strategies on past football '
+            'days')
+    argParser.add_argument('history', nargs='?', default=None,
+            help='history file written by the daemon (historyFile), the '
+            'votes of the results store are replayed if not given')
+    argParser.add_argument('--db', default='results.db',
+            help='SQLite database of the results, see Backfill')
+    argParser.add_argument('--pool', default=None,
+            help='pool of the votes replayed from the store, all if not '
+            'given')
+    argParser.add_argument('--season', default=None,
+            help='season of the votes replayed from the store, all if not '
+            'given')
+    argParser.add_argument('--strategies', nargs='+',
+            default=sorted(CHOOSERS), choices=sorted(CHOOSERS))
+    argParser.add_argument('--doubles', type=int, default=7,
+            help='number of doubles')
+    argParser.add_argument('--trials', type=int, default=1000,
+            help='trials of each strategy and football day')
+    argParser.add_argument('--workers', type=int, default=None,
+            help='processes, one per core by default')
+    argParser.add_argument('--seed', type=int, default=0)
+    args = argParser.parse_args()
+
+    store = ResultsStore(args.db)
+    simulator = StrategySimulator(store, args.doubles, args.trials,
+            args.workers, args.seed)
+    if args.history:
+        history = readHistory(args.history)
+    else:
+        history = store.votedDays(args.pool, args.season)
+    report = simulator.run(history, args.strategies)
+    store.close()
+
+    print(json.dumps(report, indent=2, sort_keys=True))
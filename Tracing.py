@@ -0,0 +1,338 @@
+import collections
+import json
+import queue
+import signal
+import sys
+import threading
+import time
+
+
+# Tick being traced in each thread
+local = threading.local()
+
+
+
+class NoopSpan():
+
+    """Span returned while tracing is disabled, it does nothing"""
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, excType, exc, tb):
+        return False
+
+
+    def set(self, **fields):
+        pass
+
+
+NOOP = NoopSpan()
+
+
+
+class Span():
+
+    """Timed section of a tick, e.g. a Sheets call"""
+
+    def __init__(self, tracer, name, fields):
+        """
+        :tracer: Tracer the span is reported to
+        :name: name of the span, e.g. 'sheets'
+        :fields: attributes of the span, e.g. {'method': 'values.get'}
+
+        """
+        self.tracer = tracer
+        self.tick = getattr(local, 'tick', None)
+        self.record = dict(fields, name=name)
+
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, excType, exc, tb):
+        end = time.perf_counter()
+        self.record['seconds'] = end - self.start
+        if excType is not None:
+            self.record['error'] = excType.__name__
+
+        # Spans of other threads may outlive the tick, e.g. a slow source
+        if self.tick is not None and not self.tick.done:
+            self.record['start'] = self.start - self.tick.start
+            self.tick.spans.append(self.record)
+        else:
+            self.tracer.write(dict(self.record, event='span'))
+        return False
+
+
+    def set(self, **fields):
+        """Adds attributes to the span
+
+        :fields: attributes, e.g. {'status': 200}
+        :returns: None
+
+        """
+        self.record.update(fields)
+
+
+
+class TickTrace():
+
+    """Spans of a tick of a daemon, reported as a single record when the
+    tick ends"""
+
+    def __init__(self, tracer, fields):
+        """
+        :tracer: Tracer the tick is reported to
+        :fields: identifiers of the tick, e.g. {'daemon': --, 'state': --}
+
+        """
+        self.tracer = tracer
+        self.fields = fields
+        self.spans = []
+        self.previous = None
+        self.done = False
+
+
+    def __enter__(self):
+        self.previous = getattr(local, 'tick', None)
+        local.tick = self
+        self.start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, excType, exc, tb):
+        seconds = time.perf_counter() - self.start
+        local.tick = self.previous
+        self.done = True
+
+        # Wall time of the tick per span name, the rest is local work.
+        # Spans of other threads run at the same time, so they overlap
+        breakdown = dict()
+        for span in self.spans:
+            breakdown[span['name']] = breakdown.get(span['name'], 0) +\
+                    span['seconds']
+        breakdown['other'] = max(0, seconds - sum(breakdown.values()))
+
+        record = dict(self.fields, event='tick', seconds=seconds,
+                breakdown=breakdown, spans=self.spans)
+        if excType is not None:
+            record['error'] = excType.__name__
+        self.tracer.finish(record)
+        return False
+
+
+    def set(self, **fields):
+        """Adds identifiers to the tick, e.g. the state it ended in
+
+        :fields: identifiers
+        :returns: None
+
+        """
+        self.fields.update(fields)
+
+
+
+class Tracer():
+
+    """Writes the log messages as JSON lines and, if enabled, the spans of
+    each tick. The last ticks are kept in memory to be dumped on demand by a
+    background thread, see `requestDump`"""
+
+    def __init__(self, stream=None, enabled=False, ringSize=100,
+            dumpFile=None):
+        """
+        :stream: file the records are written to, stdout if None
+        :enabled: record the spans and ticks
+        :ringSize: number of ticks kept in memory
+        :dumpFile: file the kept ticks are appended to by `dump`, stderr if
+                   None
+
+        """
+        self.stream = stream
+        self.enabled = enabled
+        self.ring = collections.deque(maxlen=ringSize)
+        self.dumpFile = dumpFile
+        self.lock = threading.Lock()
+        # SimpleQueue.put is reentrant, so it is safe in a signal handler
+        self.dumps = queue.SimpleQueue()
+        self.dumper = None
+
+
+    def write(self, record):
+        """Writes a record as a JSON line
+
+        :record: dictionary
+        :returns: None
+
+        """
+        record = dict(record, time=time.time())
+        line = json.dumps(record, default=str) + '\n'
+        stream = self.stream if self.stream is not None else sys.stdout
+        with self.lock:
+            stream.write(line)
+            stream.flush()
+
+
+    def finish(self, record):
+        """Writes the record of a finished tick and keeps it in the ring
+
+        :record: tick record
+        :returns: None
+
+        """
+        with self.lock:
+            self.ring.append(record)
+        self.write(record)
+
+
+    def requestDump(self, signum=None, frame=None):
+        """Asks the dumper thread to write the ticks kept in memory. It is
+        the signal handler: it runs between any two bytecodes of the main
+        thread, e.g. while `write` holds the lock, so it takes no lock and
+        does no I/O
+
+        :signum: signal received, if any
+        :frame: current stack frame
+        :returns: None
+
+        """
+        self.dumps.put(signum)
+
+
+    def startDumper(self):
+        """Starts the thread writing the dumps requested with
+        `requestDump`
+        :returns: None
+
+        """
+        def run():
+            while True:
+                self.dumps.get()
+                self.dump()
+
+        self.dumper = threading.Thread(target=run, name='trace-dumper',
+                daemon=True)
+        self.dumper.start()
+
+
+    def dump(self):
+        """Writes the ticks kept in memory
+        :returns: None
+
+        """
+        with self.lock:
+            ticks = list(self.ring)
+        lines = ''.join(json.dumps(tick, default=str) + '\n'
+                for tick in ticks)
+        if self.dumpFile:
+            with open(self.dumpFile, 'a') as f:
+                f.write(lines)
+        else:
+            sys.stderr.write(lines)
+            sys.stderr.flush()
+
+
+# Tracer of the process, it only logs until `configure` enables it
+tracer = Tracer()
+
+
+def configure(enabled=True, ringSize=100, dumpFile=None, stream=None,
+        dumpSignal=None):
+    """Sets up the tracer of the process
+
+    :enabled: record the spans and ticks
+    :ringSize: number of ticks kept in memory
+    :dumpFile: file the kept ticks are dumped to, stderr if None
+    :stream: file the records are written to, stdout if None
+    :dumpSignal: signal dumping the kept ticks, e.g. signal.SIGUSR1. It
+                 must be called from the main thread to set it
+    :returns: Tracer
+
+    """
+    global tracer
+    tracer = Tracer(stream, enabled, ringSize, dumpFile)
+    if dumpSignal is not None:
+        tracer.startDumper()
+        signal.signal(dumpSignal, tracer.requestDump)
+
+    return tracer
+
+
+def configureFrom(config):
+    """Sets up the tracer from the configuration keys `tracing`,
+    `traceRing` and `traceDump`, the ticks are dumped on SIGUSR1
+
+    :config: configuration
+    :returns: Tracer
+
+    """
+    return configure(config.get('tracing', False),
+            config.get('traceRing', 100), config.get('traceDump'),
+            dumpSignal=getattr(signal, 'SIGUSR1', None))
+
+
+def log(msg, **fields):
+    """Writes a log message with the identifiers of the current tick
+
+    :msg: message
+    :fields: other fields of the record, e.g. {'state': 'NEW'}. None
+             values are left out
+    :returns: None
+
+    """
+    tick = getattr(local, 'tick', None)
+    record = dict(tick.fields) if tick is not None else dict()
+    record.update((key, value) for key, value in fields.items()
+            if value is not None)
+    record.update(event='log', msg=msg)
+    tracer.write(record)
+
+
+def span(name, **fields):
+    """Times a section of the current tick, to be used with `with`
+
+    :name: name of the span, e.g. 'scrape'
+    :fields: attributes of the span
+    :returns: context manager, a shared one doing nothing if disabled
+
+    """
+    if not tracer.enabled:
+        return NOOP
+    return Span(tracer, name, fields)
+
+
+def tick(**fields):
+    """Traces a tick, its spans are reported with it when it ends
+
+    :fields: identifiers of the tick, e.g. {'daemon': --, 'state': --}.
+             None values are left out
+    :returns: context manager, a shared one doing nothing if disabled
+
+    """
+    if not tracer.enabled:
+        return NOOP
+    return TickTrace(tracer, dict((key, value)
+        for key, value in fields.items() if value is not None))
+
+
+def current():
+    """Obtains the tick traced by the current thread
+    :returns: TickTrace, None if there is none
+
+    """
+    return getattr(local, 'tick', None)
+
+
+def attach(tick):
+    """Makes another thread report its spans to a tick, e.g. a download
+    started by the tick
+
+    :tick: TickTrace from `current`, None to detach
+    :returns: None
+
+    """
+    local.tick = tick
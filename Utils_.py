@@ -1,3 +1,7 @@
+import importlib
+import re
+
+
 def maximo(arr):
     """It gets the maximum value and its index
 
@@ -34,3 +38,87 @@ def minimo(arr):
     return minVal, minIdx
 
 
+
+
+def colToIndex(col):
+    """Translates a column letter to its index
+
+    :col: column letters, e.g. 'A', 'M', 'AB'
+    :returns: zero based index of the column
+
+    """
+    idx = 0
+    for char in col.upper():
+        idx = idx * 26 + (ord(char) - ord('A') + 1)
+
+    return idx - 1
+
+
+def indexToCol(idx):
+    """Translates a column index to its letters
+
+    :idx: zero based index of the column
+    :returns: column letters, e.g. 'A', 'M', 'AB'
+
+    """
+    col = ''
+    idx += 1
+    while idx > 0:
+        idx, rem = divmod(idx - 1, 26)
+        col = chr(ord('A') + rem) + col
+
+    return col
+
+
+def splitRange(range_):
+    """Splits an A1 range into its sheet name and its cells
+
+    :range_: A1 range, e.g. 'Jornada 22!E1:E15'
+    :returns: sheet name (None if not present), cells range
+
+    """
+    if '!' not in range_:
+        return None, range_
+    sheetName, cells = range_.rsplit('!', 1)
+
+    return sheetName.strip("'"), cells
+
+
+def parseA1(cells):
+    """Parses the cells of an A1 range
+
+    :cells: cells range without sheet name, e.g. 'F1:M16' or 'R1'
+    :returns: (col0, row0, col1, row1) zero based and inclusive
+
+    """
+    bounds = []
+    for cell in cells.split(':'):
+        match = re.match(r'^([A-Za-z]+)(\d+)$', cell)
+        bounds.append((colToIndex(match.group(1)), int(match.group(2)) - 1))
+    if len(bounds) == 1:
+        bounds.append(bounds[0])
+
+    return bounds[0][0], bounds[0][1], bounds[1][0], bounds[1][1]
+
+
+
+class LazyModule():
+
+    """Module imported the first time one of its attributes is used, for the
+    modules loading numpy, which is slow to import. The daemon only needs
+    them once the bets are read"""
+
+    def __init__(self, name):
+        """
+        :name: name of the module, e.g. 'BetMatrix'
+
+        """
+        self.name = name
+        self.module = None
+
+
+    def __getattr__(self, attr):
+        if self.module is None:
+            self.module = importlib.import_module(self.name)
+
+        return getattr(self.module, attr)
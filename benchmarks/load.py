@@ -0,0 +1,148 @@
+#!/usr/bin/python
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+from QuinielaScraper import QuinielaScraper
+from SheetsOperator import SheetsOperator
+from SheetsBackend import MemoryBackend, HttpBackend
+from SheetsMemory import GridStore
+from SheetsServer import SheetsServer
+from daemon import QuinielaDaemon, State
+from run import FixtureTransport, readFixtures, fillBets
+
+
+def createGroups(store, backend, numGroups, people, pages):
+    """Creates the spreadsheets and daemons of the simulated groups
+
+    :store: GridStore holding the spreadsheets
+    :backend: backend used by the sheets operators
+    :numGroups: number of groups
+    :people: path of the people file
+    :pages: {name: html}
+    :returns: list of QuinielaDaemon
+
+    """
+    periods = {'periodNew': 0, 'periodCompleted': 0, 'periodFinished': 0}
+    daemons = []
+    for i in range(numGroups):
+        spreadsheetId = 'group' + str(i)
+        store.spreadsheet(spreadsheetId).addSheet('22')
+        sheetsOp = SheetsOperator(None, None, spreadsheetId, 0, 'load',
+                people, backend)
+        sheetsOp.startService()
+        transport = FixtureTransport({22: [pages['jornada_23.html'],
+            pages['jornada_23.html'], pages['jornada_22.html']]})
+        quiniDaemon = QuinielaDaemon(
+                QuinielaScraper('2016_2017', transport, 'fast'),
+                sheetsOp, 7, periods)
+        quiniDaemon.name = spreadsheetId
+        daemons.append(quiniDaemon)
+
+    return daemons
+
+
+def runGroup(quiniDaemon, spreadsheet, people, maxTicks, seed):
+    """Drives a group from its new sheet to FINISHED
+
+    :quiniDaemon: QuinielaDaemon of the group
+    :spreadsheet: GridSpreadsheet of the group
+    :people: names of the participants
+    :maxTicks: maximum ticks to run
+    :seed: seed of the simulated bets
+    :returns: {'ticks': --, 'errors': --, 'finished': --}
+
+    """
+    rnd = random.Random(seed)
+    ticks, errors, filled, started = 0, 0, False, False
+    while ticks < maxTicks and quiniDaemon.currSt != State.FINISHED:
+        ticks += 1
+        try:
+            if not started:
+                quiniDaemon.start()
+                started = True
+            quiniDaemon.tick()
+        except Exception:
+            errors += 1
+            continue
+        if quiniDaemon.currSt == State.NEW and not filled and\
+                not quiniDaemon.newInState:
+            fillBets(spreadsheet, quiniDaemon.sheetTitle, people, rnd)
+            filled = True
+
+    return {'ticks': ticks, 'errors': errors,
+            'finished': quiniDaemon.currSt == State.FINISHED}
+
+
+
+if __name__ == '__main__':
+    here = os.path.dirname(os.path.abspath(__file__))
+    argParser = argparse.ArgumentParser(
+            description='Runs many simulated groups without network')
+    argParser.add_argument('--groups', type=int, default=100)
+    argParser.add_argument('--workers', type=int, default=8)
+    argParser.add_argument('--backend', choices=['memory', 'http'],
+            default='memory')
+    argParser.add_argument('--latency', type=float, default=0,
+            help='seconds added to every request of the http backend')
+    argParser.add_argument('--quota', type=int, default=None,
+            help='requests per minute of the http backend')
+    argParser.add_argument('--max-ticks', type=int, default=50)
+    argParser.add_argument('--people', type=int, default=6,
+            help='participants of each group')
+    argParser.add_argument('--fixtures',
+            default=os.path.join(here, '..', 'fixtures'))
+    args = argParser.parse_args()
+
+    people = ['p' + str(i) for i in range(args.people)]
+    peopleF = tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False)
+    peopleF.write('\n'.join(people) + '\n')
+    peopleF.close()
+
+    # People after the 8th take the columns after the doubles one
+    store = GridStore(0, max(26, 10 + args.people))
+    server = None
+    if args.backend == 'http':
+        server = SheetsServer(store, latency=args.latency,
+                quotaPerMinute=args.quota)
+        backend = HttpBackend(server.start())
+    else:
+        backend = MemoryBackend(store)
+
+    pages = readFixtures(args.fixtures)
+    daemons = createGroups(store, backend, args.groups, peopleF.name, pages)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            results = list(executor.map(
+                lambda i: runGroup(daemons[i],
+                    store.spreadsheet(daemons[i].name), people,
+                    args.max_ticks, i),
+                range(args.groups)))
+    elapsed = time.perf_counter() - start
+
+    if server:
+        server.shutdown()
+    os.remove(peopleF.name)
+
+    ticks = sum(result['ticks'] for result in results)
+    print(json.dumps({
+        'backend': args.backend,
+        'groups': args.groups,
+        'finished': sum(result['finished'] for result in results),
+        'ticks': ticks,
+        'errors': sum(result['errors'] for result in results),
+        'seconds': elapsed,
+        'ticksPerSecond': ticks / elapsed
+    }, indent=2, sort_keys=True))
@@ -0,0 +1,349 @@
+#!/usr/bin/python
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+import QuinielaParser
+import Utils_
+from DoubleChooser import DoubleChooser
+from BatchDoubleChooser import BatchDoubleChooser
+from DoublesOptimizer import DoublesOptimizer
+from QuinielaScraper import QuinielaScraper
+from SheetsOperator import SheetsOperator
+from daemon import QuinielaDaemon, State
+from SheetsBackend import MemoryBackend
+
+
+STATE_NAMES = {
+    State.NEW: 'NEW',
+    State.COMPLETED: 'COMPLETED',
+    State.FINISHED: 'FINISHED'
+}
+
+SIGNS = ['1', 'X', '2']
+SIGN_MODES = {'1': 1, 'X': 0, '2': 2}
+
+
+
+class FixtureTransport():
+
+    """Transport serving recorded pages instead of the AS site"""
+
+    def __init__(self, pages):
+        """
+        :pages: {footballDay: [html, ...]} pages served on each fetch, the
+                last one is repeated
+
+        """
+        self.pages = pages
+
+
+    def fetch(self, url, season, footballDay):
+        pages = self.pages[footballDay]
+        page = pages.pop(0) if len(pages) > 1 else pages[0]
+        return page, False
+
+
+    def markFinished(self, season, footballDay):
+        pass
+
+
+
+def readFixtures(fixtures):
+    """Reads the recorded pages
+
+    :fixtures: folder with the pages
+    :returns: {name: html}
+
+    """
+    pages = dict()
+    for name in sorted(os.listdir(fixtures)):
+        if name.endswith('.html'):
+            with open(os.path.join(fixtures, name), 'rb') as f:
+                pages[name] = f.read().decode('utf8')
+
+    return pages
+
+
+def benchParse(pages, repeat):
+    """Measures the parse time of each page with each parser backend
+
+    :pages: {name: html}
+    :repeat: number of parses of each page
+    :returns: {backend: {name: seconds_per_parse}}
+
+    """
+    results = dict()
+    for backend in sorted(QuinielaParser.PARSERS):
+        # The recorded pages are HTML
+        if backend == 'json':
+            continue
+        parser = QuinielaParser.getParser(backend)
+        results[backend] = dict()
+        for name, html in pages.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                parser.parse(html)
+            results[backend][name] = (time.perf_counter() - start) / repeat
+
+    return results
+
+
+def randomFreqs(rnd, participants):
+    """Generates the frequencies and modes of a random group
+
+    :rnd: random.Random instance
+    :participants: number of participants
+    :returns: freqs, modes
+
+    """
+    freqs = []
+    modes = []
+    for _ in range(14):
+        row = [0, 0, 0]
+        for _ in range(participants):
+            row[rnd.randint(0, 2)] += 1
+        freqs.append(row)
+        modes.append(SIGN_MODES[SIGNS[row.index(max(row))]])
+
+    return freqs, modes
+
+
+def benchDoubles(repeat, participants, numDoubles):
+    """Measures the throughput of `DoubleChooser.tellDoubles`
+
+    :repeat: number of random groups
+    :participants: participants of each group
+    :numDoubles: doubles of each group
+    :returns: {'groups': --, 'seconds': --, 'callsPerSecond': --}
+
+    """
+    rnd = random.Random(0)
+    random.seed(0)
+    groups = [randomFreqs(rnd, participants) for _ in range(repeat)]
+
+    start = time.perf_counter()
+    for freqs, modes in groups:
+        DoubleChooser(freqs, modes, participants, numDoubles).tellDoubles()
+    elapsed = time.perf_counter() - start
+
+    return {'groups': repeat, 'seconds': elapsed,
+            'callsPerSecond': repeat / elapsed}
+
+
+def benchBatchDoubles(repeat, participants, numDoubles):
+    """Measures the throughput of `BatchDoubleChooser.tellDoubles`
+
+    :repeat: number of random groups, chosen in a single call
+    :participants: participants of each group
+    :numDoubles: doubles of each group
+    :returns: {'groups': --, 'seconds': --, 'groupsPerSecond': --}
+
+    """
+    rnd = random.Random(0)
+    groups = [randomFreqs(rnd, participants) for _ in range(repeat)]
+    freqs = [freqs_ for freqs_, _ in groups]
+    modes = [modes_ for _, modes_ in groups]
+
+    start = time.perf_counter()
+    BatchDoubleChooser(numDoubles, seed=0).tellDoubles(freqs, modes)
+    elapsed = time.perf_counter() - start
+
+    return {'groups': repeat, 'seconds': elapsed,
+            'groupsPerSecond': repeat / elapsed}
+
+
+def benchOptimizer(repeat, participants, numDoubles):
+    """Measures the throughput of `DoublesOptimizer.tellDoubles`
+
+    :repeat: number of random groups, solved in a single call
+    :participants: participants of each group
+    :numDoubles: doubles of each group, the budget is 2^numDoubles
+    :returns: {'groups': --, 'seconds': --, 'groupsPerSecond': --}
+
+    """
+    rnd = random.Random(0)
+    groups = [randomFreqs(rnd, participants) for _ in range(repeat)]
+    freqs = [freqs_ for freqs_, _ in groups]
+    modes = [modes_ for _, modes_ in groups]
+
+    start = time.perf_counter()
+    DoublesOptimizer(2 ** numDoubles, seed=0).tellDoubles(freqs, modes)
+    elapsed = time.perf_counter() - start
+
+    return {'groups': repeat, 'seconds': elapsed,
+            'groupsPerSecond': repeat / elapsed}
+
+
+def fillBets(spreadsheet, sheetTitle, people, rnd):
+    """Simulates the participants filling their columns and the sheet
+    formulas computing modes and frequencies, the first 8 people take F:M
+    and the rest the columns after the doubles one (S onwards)
+
+    :spreadsheet: GridSpreadsheet
+    :sheetTitle: title of the football day sheet
+    :people: names of the participants
+    :rnd: random.Random instance
+    :returns: None
+
+    """
+    bets = [[rnd.choice(SIGNS) for _ in people] for _ in range(14)]
+    rows = [list(row) + ['1-1'] for row in zip(*bets)]
+    for i, person in enumerate(people):
+        col = Utils_.indexToCol(5 + i if i < 8 else 10 + i)
+        spreadsheet.writeRange(sheetTitle + '!' + col + '1:' + col + '16',
+                [[cell] for cell in rows[i] + [person]])
+
+    formulas = []
+    for row in bets:
+        freqs = [row.count(sign) for sign in SIGNS]
+        mode = SIGN_MODES[SIGNS[freqs.index(max(freqs))]]
+        formulas.append([mode] + freqs)
+    spreadsheet.writeRange(sheetTitle + '!N1:Q14', formulas)
+
+
+def statsDelta(before, after):
+    """Obtains the accounted calls between two stats
+
+    :before: MemorySheetsService.stats() before
+    :after: MemorySheetsService.stats() after
+    :returns: stats with the difference
+
+    """
+    calls = dict((method, count - before['calls'].get(method, 0))
+            for method, count in after['calls'].items()
+            if count != before['calls'].get(method, 0))
+
+    return {'calls': calls,
+            'totalCalls': sum(calls.values()),
+            'bytesSent': after['bytesSent'] - before['bytesSent'],
+            'bytesReceived': after['bytesReceived'] - before['bytesReceived']}
+
+
+def transition(fromSt, toSt, ticks, before, after):
+    """Builds the record of a state transition
+
+    :fromSt: (State) previous state, None for the initial discovery
+    :toSt: (State) new state
+    :ticks: ticks spent in the previous state
+    :before: MemorySheetsService.stats() when entering the previous state
+    :after: MemorySheetsService.stats() when entering the new state
+    :returns: {'from': --, 'to': --, 'ticks': --, ...stats}
+
+    """
+    record = statsDelta(before, after)
+    record['from'] = STATE_NAMES.get(fromSt)
+    record['to'] = STATE_NAMES[toSt]
+    record['ticks'] = ticks
+
+    return record
+
+
+def benchTransitions(pages, maxTicks):
+    """Drives the daemon through a full football day against the fake
+    service and accounts the Sheets calls of each state transition
+
+    :pages: {name: html}
+    :maxTicks: maximum ticks to run
+    :returns: list of {'from': --, 'to': --, 'ticks': --, ...stats}
+
+    """
+    rnd = random.Random(0)
+    random.seed(0)
+    people = ['p' + str(i) for i in range(6)]
+    peopleF = tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False)
+    peopleF.write('\n'.join(people) + '\n')
+    peopleF.close()
+
+    backend = MemoryBackend()
+    spreadsheet = backend.store.spreadsheet('bench')
+    spreadsheet.addSheet('plantilla', 0)
+    spreadsheet.addSheet('22')
+
+    sheetsOp = SheetsOperator(None, None, 'bench', 0, 'bench', peopleF.name,
+            backend)
+    sheetsOp.startService()
+    service = sheetsOp.service
+    transport = FixtureTransport({22: [pages['jornada_23.html'],
+        pages['jornada_23.html'], pages['jornada_22.html']]})
+    quiniScraper = QuinielaScraper('2016_2017', transport, 'fast')
+    periods = {'periodNew': 0, 'periodCompleted': 0, 'periodFinished': 0}
+    quiniDaemon = QuinielaDaemon(quiniScraper, sheetsOp, 7, periods)
+
+    transitions = []
+    before = service.stats()
+    quiniDaemon.start()
+    after = service.stats()
+    transitions.append(transition(None, quiniDaemon.currSt, 0, before,
+        after))
+
+    before, ticks, filled = after, 0, False
+    currSt = quiniDaemon.currSt
+    for _ in range(maxTicks):
+        quiniDaemon.tick()
+        ticks += 1
+
+        # Participants fill their columns once the sheet is set up
+        if quiniDaemon.currSt == State.NEW and not filled and\
+                not quiniDaemon.newInState:
+            fillBets(spreadsheet, quiniDaemon.sheetTitle, people, rnd)
+            filled = True
+
+        if quiniDaemon.currSt != currSt:
+            after = service.stats()
+            transitions.append(transition(currSt, quiniDaemon.currSt,
+                ticks, before, after))
+            before, ticks = after, 0
+            if quiniDaemon.currSt == State.FINISHED:
+                spreadsheet.addSheet('23')
+            elif quiniDaemon.currSt == State.NEW:
+                break
+            currSt = quiniDaemon.currSt
+
+    os.remove(peopleF.name)
+
+    return transitions
+
+
+
+if __name__ == '__main__':
+    here = os.path.dirname(os.path.abspath(__file__))
+    argParser = argparse.ArgumentParser(
+            description='Offline benchmarks of the quinielas daemon')
+    argParser.add_argument('--fixtures',
+            default=os.path.join(here, '..', 'fixtures'),
+            help='folder with the recorded quiniela pages')
+    argParser.add_argument('--repeat', type=int, default=50,
+            help='parses of each page')
+    argParser.add_argument('--groups', type=int, default=2000,
+            help='random groups for DoubleChooser')
+    argParser.add_argument('--output', default=None,
+            help='JSON file for the results, stdout if not given')
+    args = argParser.parse_args()
+
+    pages = readFixtures(args.fixtures)
+    results = {
+        'parse': benchParse(pages, args.repeat),
+        'doubleChooser': benchDoubles(args.groups, 8, 7),
+        'batchDoubleChooser': benchBatchDoubles(args.groups, 8, 7),
+        'doublesOptimizer': benchOptimizer(args.groups, 8, 7),
+    }
+    # Keep the daemon log out of the results
+    with contextlib.redirect_stdout(sys.stderr):
+        results['sheets'] = benchTransitions(pages, 50)
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
@@ -1,14 +1,69 @@
 #!/usr/bin/python
 
+import time
+importStart = time.perf_counter()
+
 from QuinielaScraper import QuinielaScraper
+from ResultSources import HedgedScraper, createSources
+from ResultEvents import ResultEvents
 from SheetsOperator import SheetsOperator
-from SheetsOperator import SheetsOperator
-from QuinielaScraper import QuinielaScraper
-import os
+from ScraperTransport import ScraperTransport
+from PollScheduler import PollScheduler
+from SheetsBackend import createBackend
+from DoubleChooser import getChooser
+from RateLimiter import createLimiter
+from Checkpoint import Checkpoint
+from RequestPlan import RequestPlan
+from ResultsStore import ResultsStore
+import Metrics
+import Tracing
+import argparse
+import contextlib
 import json
-import time
 import re
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+importEnd = time.perf_counter()
+
+
+
+
+class StartupProfile():
+
+    """Measures the time and the modules imported by each startup
+    phase"""
+
+    def __init__(self):
+        self.phases = []
+
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Measures the block of a with statement
+
+        :name: name of the phase
+        """
+        modules = len(sys.modules)
+        start = time.perf_counter()
+        yield
+        self.phases.append((name, time.perf_counter() - start,
+            len(sys.modules) - modules))
+
+
+    def report(self):
+        """Prints the phases to stderr
+        :returns: None
 
+        """
+        total = sum(seconds for _, seconds, _ in self.phases)
+        for name, seconds, modules in self.phases:
+            sys.stderr.write('{:<20}{:>9.1f} ms{:>6} modules\n'.format(
+                name, seconds * 1000, modules))
+        sys.stderr.write('{:<20}{:>9.1f} ms\n'.format('total',
+            total * 1000))
 
 
 
@@ -22,11 +77,26 @@ class QuinielaDaemon():
 
     """Class for quiniela's daemon"""
 
-    def __init__(self, quiniScraper, sheetsOp, numDoubles):
+    def __init__(self, quiniScraper, sheetsOp, numDoubles, periods,
+            scheduler=None, historyFile=None, metrics=None,
+            checkpoint=None, resultsStore=None):
         """
         :quiniScraper: scraper for quinielas instance
         :sheetsOp: sheets operator instance
         :self.numDoubles: number of doubles to bet
+        :periods: {'periodNew': --, 'periodCompleted': --,
+                   'periodFinished': --} seconds to wait in each state
+        :scheduler: PollScheduler adapting the periods, fixed periods are
+                    used if None
+        :historyFile: JSON lines file where the frequencies of each football
+                      day are appended for the StrategySimulator, None to
+                      not record them
+        :metrics: Metrics flushed after each tick, None if not used
+        :checkpoint: Checkpoint where the state is saved to resume from it
+                     after a restart, None to always discover the state
+        :resultsStore: ResultsStore where the results, the scores and the
+                       votes of each football day are kept, None to not
+                       score
         """
 
         self.quiniScraper = quiniScraper
@@ -36,7 +106,23 @@ class QuinielaDaemon():
         self.numDoubles = numDoubles
         self.newInState = False
         self.numFootballDay = None
-        
+        self.periods = periods
+        self.scheduler = scheduler
+        self.currSt = None
+        self.justEntered = True
+        self.firstWait = True
+        self.name = None
+        self.historyFile = historyFile
+        self.metrics = metrics
+        self.wakeEvent = threading.Event()
+        self.onWake = None
+        self.checkpoint = checkpoint
+        self.lastResults = None
+        self.saved = None
+        self.revision = None
+        self.resultsStore = resultsStore
+        self.scorer = None
+        self.sheetsOp.roster.subscribe(self.rosterChanged)
 
 
     def enterNew(self):
@@ -44,20 +130,42 @@ class QuinielaDaemon():
         :returns: None
 
         """
-        # Create new football day sheet
-        self.printLog(State.NEW, 'creating Jornada ' +
-                str(self.numFootballDay))
-        self.sheetsOp.deleteSheet(self.sheetId)
-        self.sheetId = self.sheetsOp.createFootballDay(self.numFootballDay)
-        self.sheetTitle = 'Jornada ' + str(self.numFootballDay)
-
-        # Set scraper for new day, and get matches
-        self.printLog(State.NEW, 'downloading matches for: ' + self.sheetTitle)
-        self.quiniScraper.getFootballDay(self.numFootballDay)
-        matches = self.quiniScraper.getMatches()
-
-        # Fill matches
-        self.sheetsOp.fillMatches(matches, self.sheetTitle)
+        trace = Tracing.current()
+        def fetchMatches():
+            Metrics.setState('NEW')
+            Tracing.attach(trace)
+            try:
+                return self.quiniScraper.fetchMatches(self.numFootballDay)
+            finally:
+                Tracing.attach(None)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Download the matches while the sheet is created
+            self.printLog(State.NEW, 'downloading matches for: Jornada ' +
+                    str(self.numFootballDay))
+            future = executor.submit(fetchMatches)
+
+            # Replace the new sheet by a copy of plantilla
+            self.printLog(State.NEW, 'creating Jornada ' +
+                    str(self.numFootballDay))
+            plan = RequestPlan()
+            sheetId, sheetTitle = self.sheetsOp.planFootballDay(plan,
+                    self.numFootballDay, self.sheetId)
+            if not future.done():
+                self.sheetsOp.sendPlan(plan)
+                self.sheetId, self.sheetTitle = sheetId, sheetTitle
+                plan = RequestPlan()
+
+            # Fill matches, with the sheet creation if it was not sent
+            matches = future.result()
+            self.sheetsOp.planMatches(plan, matches, sheetId, sheetTitle)
+            self.sheetsOp.sendPlan(plan)
+
+        self.sheetId, self.sheetTitle = sheetId, sheetTitle
+        self.lastResults = None
+        self.scorer = None
+        if self.scheduler:
+            self.scheduler.setMatches(matches)
 
 
     def getCurrState(self):
@@ -98,135 +206,508 @@ class QuinielaDaemon():
                 return State.FINISHED
 
         
-    def printLog(self, state, msg):
-        """Prints a msg in log format
+    def checkpointData(self):
+        """Obtains the data of the current state kept in the checkpoint
+        :returns: dict without the revision
 
-        :state: (State) current state
-        :msg: message to be printed
+        """
+        return {
+            'state': self.currSt,
+            'sheetId': self.sheetId,
+            'sheetTitle': self.sheetTitle,
+            'numFootballDay': self.numFootballDay,
+            'newInState': self.newInState,
+            'lastResults': self.lastResults
+        }
+
+
+    def saveCheckpoint(self):
+        """Saves the checkpoint if the state changed. The revision of the
+        sheets is only requested again when the sheet or the state changed
         :returns: None
 
         """
-        stateStr = ''
+        if not self.checkpoint:
+            return
+
+        data = self.checkpointData()
+        if data == self.saved:
+            return
+        if self.saved is None or self.revision is None or\
+                any(data[key] != self.saved[key] for key in
+                    ('state', 'sheetId', 'sheetTitle', 'numFootballDay')):
+            self.revision = self.sheetsOp.sheetsRevision()
+
+        self.checkpoint.save(dict(data, revision=self.revision))
+        self.saved = data
+
+
+    def resume(self):
+        """Resumes the state saved in the checkpoint, checking with a
+        single request that no sheet was created, deleted or renamed since
+        :returns: True if resumed, False if the state must be discovered
+
+        """
+        if not self.checkpoint:
+            return False
+
+        data = self.checkpoint.load()
+        if data is None or data.get('revision') !=\
+                self.sheetsOp.sheetsRevision():
+            return False
+
+        self.currSt = data['state']
+        self.sheetId = data['sheetId']
+        self.sheetTitle = data['sheetTitle']
+        self.numFootballDay = data['numFootballDay']
+        self.newInState = data['newInState']
+        self.lastResults = data['lastResults']
+        if self.lastResults is not None:
+            self.sheetsOp.setWritten(self.sheetTitle, 'E1:E15',
+                    [[result] for result in self.lastResults])
+
+        self.revision = data['revision']
+        self.saved = self.checkpointData()
+
+        return True
+
+
+    def recordScores(self, matches):
+        """Updates the scores with the latest results, only the matches
+        whose result changed are scored again
+
+        :matches: matches, see `QuinielaScraper.getMatches`
+        :returns: None
+
+        """
+        if self.resultsStore is None:
+            return
+
+        if self.scorer is None:
+            self.scorer = self.sheetsOp.getScorer(self.sheetTitle)
+        changed = self.scorer.update([match['result'] for match in matches])
+        if not len(changed):
+            return
+
+        pool = self.name or self.sheetsOp.spreadsheetId
+        season = self.quiniScraper.season
+        scores = self.scorer.scores()
+        scores[self.resultsStore.GROUP] = (self.scorer.groupScore(), False)
+        finished = all(match['result'] for match in matches)
+        self.resultsStore.saveFootballDay(season, self.numFootballDay,
+                matches, finished)
+        self.resultsStore.saveScores(pool, season, self.numFootballDay,
+                scores)
+
+
+    def rosterChanged(self, names):
+        """Wakes the daemon when the people change while waiting for the
+        columns to be filled
+
+        :names: new set of people names
+        :returns: None
+
+        """
+        if self.currSt == State.NEW:
+            self.printLog(self.currSt, 'people changed')
+            self.wake()
+
+
+    def wake(self):
+        """Ends the current wait so the next tick runs now
+        :returns: None
+
+        """
+        self.wakeEvent.set()
+        if self.onWake:
+            self.onWake()
+
+
+    def sleep(self, seconds):
+        """Waits before the next tick, unless the daemon is woken
+
+        :seconds: seconds to wait
+        :returns: None
+
+        """
+        with Tracing.span('sleep', daemon=self.name, wait=seconds):
+            self.wakeEvent.wait(seconds)
+        self.wakeEvent.clear()
+
+
+    def recordHistory(self, freqs, modes):
+        """Records the frequencies the doubles were chosen from in the
+        history file and in the results store
+
+        :freqs: frequencies of each match
+        :modes: modes of each match
+        :returns: None
+
+        """
+        season = self.quiniScraper.season
+        participants = len(self.sheetsOp.people)
+        if self.resultsStore is not None:
+            self.resultsStore.saveVotes(self.name or
+                    self.sheetsOp.spreadsheetId, season, self.numFootballDay,
+                    participants, freqs, modes)
+
+        if not self.historyFile:
+            return
+
+        record = {
+            'season': season,
+            'jornada': self.numFootballDay,
+            'participants': participants,
+            'freqs': freqs,
+            'modes': modes
+        }
+        with open(self.historyFile, 'a') as historyF:
+            historyF.write(json.dumps(record) + '\n')
+
+
+    def stateName(self, state):
+        """Obtains the name of a state for the logs
+
+        :state: (State) state
+        :returns: 'NEW', 'COMPLETED', 'FINISHED' or None
+
+        """
         if state == State.NEW:
-            stateStr = 'NEW'
+            return 'NEW'
         elif state == State.COMPLETED:
-            stateStr = 'COMPLETED'
+            return 'COMPLETED'
         elif state == State.FINISHED:
-            stateStr = 'FINISHED'
+            return 'FINISHED'
+        return None
+
 
-        print('[' + self.sheetTitle + '] - ' + stateStr + ' - ' + msg)
+    def printLog(self, state, msg):
+        """Writes a msg as a JSON log line with the daemon, sheet and state
+
+        :state: (State) current state
+        :msg: message to be logged
+        :returns: None
+
+        """
+        Tracing.log(msg, daemon=self.name, sheet=self.sheetTitle,
+                state=self.stateName(state))
+
+
+    def waitFor(self, key, answer, period, live=False):
+        """Obtains the seconds to wait after a check that didn't change
+        the state
+
+        :key: name of the check
+        :answer: value returned by the check
+        :period: name of the base period in `periods`
+        :live: True if kickoff times drive the waiting time
+        :returns: seconds
+
+        """
+        if not self.scheduler:
+            return self.periods[period]
+
+        self.scheduler.observe(key, answer)
+        return self.scheduler.nextWait(key, self.periods[period], live)
+
+
+    def start(self):
+        """Discovers the current state before running the ticks
+        :returns: None
+
+        """
+        Tracing.log('getting current state', daemon=self.name)
+        Metrics.setState('START')
+        if self.resume():
+            Tracing.log('resumed from checkpoint', daemon=self.name)
+        else:
+            self.currSt = self.getCurrState()
+        self.justEntered = True
+        self.firstWait = True
+        self.saveCheckpoint()
 
 
-    def loop(self):
+    def tick(self):
+        """Executes one step of the state machine, traced with the time of
+        each scrape, parse and Sheets call in it
+        :returns: seconds to wait before next tick
+
+        """
+        with Tracing.tick(daemon=self.name, sheet=self.sheetTitle,
+                state=self.stateName(self.currSt),
+                jornada=self.numFootballDay) as trace:
+            waitTime = self.step()
+            trace.set(nextState=self.stateName(self.currSt), wait=waitTime)
+
+        return waitTime
+
+
+    def step(self):
+        """Runs the current state of the state machine
+        :returns: seconds to wait before next tick
+
+        """
+        waitTime = 0
+        # Sheet values are fetched once per tick
+        self.sheetsOp.invalidate()
+
+        # NEW QUINIELA
+        if self.currSt == State.NEW:
+            Metrics.setState('NEW')
+            if self.justEntered:
+                self.printLog(self.currSt, 'just entered')
+                self.justEntered = False
+                self.firstWait = True
+            if self.newInState:
+                self.printLog(self.currSt, 'setting up')
+                self.enterNew()
+                self.newInState = False
+            elif self.sheetsOp.colsFilled(self.sheetTitle):
+                self.printLog(self.currSt, 'columns filled!')
+                self.currSt = State.COMPLETED
+                self.justEntered = True
+                self.newInState = True
+            else:
+                if self.firstWait:
+                    self.printLog(self.currSt, 'waiting cols to be filled')
+                    self.firstWait = False
+                waitTime = self.waitFor('colsFilled', False, 'periodNew')
+
+        # COMPLETED QUINIELA
+        if self.currSt == State.COMPLETED:
+            Metrics.setState('COMPLETED')
+            if self.justEntered:
+                self.printLog(self.currSt, 'just entered')
+                self.justEntered = False
+                self.firstWait = True
+            if self.newInState:
+                self.printLog(self.currSt, 'fill doubles')
+                freqs, modes = self.sheetsOp.fillDoubles(self.sheetTitle,
+                        self.numDoubles)
+                self.recordHistory(freqs, modes)
+                self.newInState = False
+            elif self.sheetsOp.footballDayFinished(self.sheetTitle):
+                self.printLog(self.currSt, 'football day finished')
+                self.currSt = State.FINISHED
+                self.justEntered = True
+                self.newInState = True
+            else:
+                # Get results
+                matches = self.quiniScraper.fetchMatches(self.numFootballDay)
+                self.sheetsOp.fillResults(matches, self.sheetTitle)
+                self.lastResults = [match['result'] for match in matches]
+                self.recordScores(matches)
+                if self.scheduler:
+                    self.scheduler.setMatches(matches)
+
+                if self.firstWait:
+                    self.printLog(self.currSt, 'waiting football day end')
+                    self.firstWait = False
+                waitTime = self.waitFor('results', self.lastResults,
+                        'periodCompleted', live=True)
+
+        # FINISHED QUINIELA
+        if self.currSt == State.FINISHED:
+            Metrics.setState('FINISHED')
+            if self.justEntered:
+                self.printLog(self.currSt, 'just entered')
+                self.justEntered = False
+                self.firstWait = True
+            self.numFootballDay, self.sheetId =\
+                self.sheetsOp.checkBornFootballDay()
+            if self.numFootballDay:
+                self.printLog(self.currSt, 'new football day detected!')
+                self.currSt = State.NEW
+                self.justEntered = False
+                self.newInState = True
+            else:
+                if self.firstWait:
+                    self.printLog(self.currSt, 'waiting for new sheet')
+                    self.firstWait = False
+                waitTime = self.waitFor('checkBornFootballDay', None,
+                        'periodFinished')
+
+        self.saveCheckpoint()
+        Metrics.setState(None)
+        if self.metrics:
+            self.metrics.flush()
+
+        return waitTime
+
+
+    def loop(self, started=False):
         """Executes the main loop of the daemon
+
+        :started: True if `start` was already called
         :returns: None
 
         """
-        print('Getting current state')
-        currSt = self.getCurrState()
-        justEntered = True
-        firstWait = True
+        errorWait = self.periods.get('errorWait',
+                self.periods['periodFinished'])
 
-        
         ###############
         ## MAIN LOOP ##
         ###############
         while True:
-            waitTime = 0
-
-            # NEW QUINIELA
-            if currSt == State.NEW:
-                if justEntered:
-                    self.printLog(currSt, 'just entered')
-                    justEntered = False
-                    firstWait = True
-                if self.newInState:
-                    self.printLog(currSt, 'setting up')
-                    self.enterNew()
-                    self.newInState = False
-                elif self.sheetsOp.colsFilled(self.sheetTitle):
-                    self.printLog(currSt, 'columns filled!')
-                    currSt = State.COMPLETED
-                    justEntered = True
-                    self.newInState = True
-                else:
-                    if firstWait:
-                        self.printLog(currSt, 'waiting cols to be filled')
-                        firstWait = False
-                    waitTime = config['periodNew']
-
-            # COMPLETED QUINIELA
-            if currSt == State.COMPLETED:
-                if justEntered:
-                    self.printLog(currSt, 'just entered')
-                    justEntered = False
-                    firstWait = True
-                if self.newInState:
-                    self.printLog(currSt, 'fill doubles')
-                    self.sheetsOp.fillDoubles(self.sheetTitle, self.numDoubles)
-                    self.newInState = False
-                elif self.sheetsOp.footballDayFinished(self.sheetTitle):
-                    self.printLog(currSt, 'football day finished')
-                    currSt = State.FINISHED
-                    justEntered = True
-                    self.newInState = True
-                else:
-                    # Get results
-                    self.quiniScraper.getFootballDay(self.numFootballDay)
-                    matches = self.quiniScraper.getMatches()
-                    self.sheetsOp.fillResults(matches, self.sheetTitle)
-
-                    if firstWait:
-                        self.printLog(currSt, 'waiting football day end')
-                        firstWait = False
-                    waitTime = config['periodCompleted']
-
-            # FINISHED QUINIELA
-            if currSt == State.FINISHED:
-                if justEntered:
-                    self.printLog(currSt, 'just entered')
-                    justEntered = False
-                    firstWait = True
-                self.numFootballDay, self.sheetId =\
-                    self.sheetsOp.checkBornFootballDay()
-                if self.numFootballDay:
-                    self.printLog(currSt, ' new football day detected!')
-                    currSt = State.NEW
-                    justEntered = False
-                    self.newInState = True
-                else:
-                    if firstWait:
-                        self.printLog(currSt, 'waiting for new sheet')
-                        firstWait = False
-                    waitTime = config['periodFinished']
+            try:
+                if not started:
+                    self.start()
+                    started = True
+                waitTime = self.tick()
+            except Exception:
+                # Errors left after the retries must not kill the daemon
+                Tracing.log('tick failed', daemon=self.name,
+                        sheet=self.sheetTitle,
+                        state=self.stateName(self.currSt),
+                        error=traceback.format_exc())
+                waitTime = errorWait
+            self.sleep(waitTime)
+
+
+
+def createSheetsOp(config, store=None, metrics=None, limiter=None):
+    """Creates and starts the sheets operator of a spreadsheet
+
+    :config: configuration with the spreadsheet keys
+    :store: GridStore shared by the spreadsheets of the memory backend
+    :metrics: Metrics recording the API requests
+    :limiter: RateLimiter shared by the operators, the one of the process
+              if None
+    :returns: SheetsOperator
+
+    """
+    sheetsOp = SheetsOperator(
+            config.get('secretFile'),
+            config.get('credentials'),
+            config['spreadSheetId'],
+            config['plantillaId'],
+            config.get('appName'),
+            config['people'],
+            createBackend(config, store),
+            getChooser(config.get('doublesStrategy', 'greedy')),
+            metrics,
+            limiter or createLimiter(config),
+            config.get('chunkColumns', 26),
+            config.get('reductionHits'),
+            config.get('reductionBudget'),
+            config.get('reductionStart', 'F18'),
+            config.get('reductionMaxColumns', 4096))
+    sheetsOp.startService()
+    sheetsOp.roster.watch(config.get('rosterInterval', 5))
+
+    return sheetsOp
+
+
+def createScraper(config, metrics=None):
+    """Creates the quiniela scraper, a HedgedScraper if several result
+    `sources` are configured
+
+    :config: configuration
+    :metrics: Metrics recording the requests to the results site
+    :returns: QuinielaScraper or HedgedScraper
+
+    """
+    events = None
+    if config.get('eventsFile'):
+        events = ResultEvents(config['eventsFile'],
+                config.get('matchLength', 7200))
+
+    if config.get('sources'):
+        return HedgedScraper(config.get('season', '2016_2017'),
+                createSources(config, metrics), config.get('hedgeDelay', 1),
+                events=events)
+
+    transport = ScraperTransport(
+            config.get('cacheDir', '.cache'),
+            config.get('cacheEntries', 200),
+            config.get('httpTimeout', 10),
+            metrics,
+            config.get('finishedTtl', 3600))
+
+    return QuinielaScraper(config.get('season', '2016_2017'), transport,
+            config.get('parser', 'fast'), events=events)
+
+
+def createCheckpoint(config):
+    """Creates the checkpoint of a spreadsheet
+
+    :config: configuration, with `checkpointFile`
+    :returns: Checkpoint, None if `checkpointFile` is not set
 
-            time.sleep(waitTime)
+    """
+    if not config.get('checkpointFile'):
+        return None
+
+    return Checkpoint(config['checkpointFile'])
+
+
+def createResultsStore(config):
+    """Creates the store of results and scores
+
+    :config: configuration, with `resultsDb`
+    :returns: ResultsStore, None if `resultsDb` is not set
+
+    """
+    if not config.get('resultsDb'):
+        return None
+
+    return ResultsStore(config['resultsDb'])
+
+
+def createScheduler(config):
+    """Creates the polling scheduler of a daemon. Backing off is opt-in:
+    without `backoffFactor` the periods stay fixed.
+
+    :config: configuration
+    :returns: PollScheduler
+
+    """
+    return PollScheduler(
+            config.get('periodLive', config['periodCompleted']),
+            config.get('matchLength', 7200),
+            config.get('backoffFactor', 1),
+            config.get('periodMax', config['periodCompleted']))
 
 
 
 if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description='Quinielas daemon')
+    argParser.add_argument('--startup-profile', action='store_true',
+            help='report the time of each startup phase until the first '
+            'tick')
+    args = argParser.parse_args()
+    profile = StartupProfile()
+    profile.phases.append(('imports', importEnd - importStart, 0))
+
     # Initialization
-    print('Reading config')
-    fConf = open('config.json', 'r')
-    config = json.load(fConf)
-    print ('Creating sheets operator')
-    sheetsOp = SheetsOperator(
-            config['secretFile'], 
-            config['credentials'],
-            config['spreadSheetId'],
-            config['plantillaId'],
-            config['appName'],
-            config['people'])
-    sheetsOp.startService()
+    with profile.phase('config'):
+        fConf = open('config.json', 'r')
+        config = json.load(fConf)
+        Tracing.configureFrom(config)
+        metrics = Metrics.createMetrics(config)
+    Tracing.log('creating sheets operator')
+    with profile.phase('sheets operator'):
+        sheetsOp = createSheetsOp(config, metrics=metrics)
     numDoubles = config['numDoubles']
-    print('Creating scraper')
-    quiniScraper = QuinielaScraper('2016_2017')
+    Tracing.log('creating scraper')
+    with profile.phase('scraper'):
+        quiniScraper = createScraper(config, metrics)
 
-    print('Creating daemon')
-    quiniDaemon = QuinielaDaemon(quiniScraper, sheetsOp, numDoubles)
+    Tracing.log('creating daemon')
+    with profile.phase('daemon'):
+        quiniDaemon = QuinielaDaemon(quiniScraper, sheetsOp, numDoubles,
+                config, createScheduler(config), config.get('historyFile'),
+                metrics, createCheckpoint(config), createResultsStore(config))
 
     # Enter main loop
-    print('Entering main loop')
-    quiniDaemon.loop()
-
-
+    Tracing.log('entering main loop')
+    if args.startup_profile:
+        with profile.phase('start'):
+            quiniDaemon.start()
+        with profile.phase('first tick'):
+            waitTime = quiniDaemon.tick()
+        profile.report()
+        quiniDaemon.sleep(waitTime)
+        quiniDaemon.loop(started=True)
+    else:
+        quiniDaemon.loop()
@@ -0,0 +1,137 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+import Utils_
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+        'fixtures')
+
+SIGNS = ['1', 'X', '2']
+SIGN_MODES = {'1': 1, 'X': 0, '2': 2}
+
+
+
+class FixtureTransport():
+
+    """Transport serving recorded pages instead of the AS site"""
+
+    def __init__(self, pages):
+        """
+        :pages: {footballDay: [html, ...]} pages served on each fetch, the
+                last one is repeated
+
+        """
+        self.pages = pages
+
+
+    def fetch(self, url, season, footballDay):
+        pages = self.pages[footballDay]
+        page = pages.pop(0) if len(pages) > 1 else pages[0]
+        return page, False
+
+
+    def markFinished(self, season, footballDay):
+        pass
+
+
+
+class PageServer():
+
+    """Local HTTP server of a single page with an ETag, it answers 304 to
+    conditional requests of the current version"""
+
+    def __init__(self, page, delay=0):
+        """
+        :page: text served
+        :delay: seconds to wait before answering each request
+
+        """
+        self.page = page
+        self.delay = delay
+        self.version = 1
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(time.monotonic())
+                time.sleep(server.delay)
+                etag = '"' + str(server.version) + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = server.page.encode('utf8')
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:' + str(self.httpd.server_address[1])
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+    def update(self, page):
+        self.page = page
+        self.version += 1
+
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+
+def readFixtures(fixtures=FIXTURES):
+    """Reads the recorded pages
+
+    :fixtures: folder with the pages
+    :returns: {name: html}
+
+    """
+    pages = dict()
+    for name in sorted(os.listdir(fixtures)):
+        if name.endswith('.html'):
+            with open(os.path.join(fixtures, name), 'rb') as f:
+                pages[name] = f.read().decode('utf8')
+
+    return pages
+
+
+def fillBets(spreadsheet, sheetTitle, people, rnd):
+    """Simulates the participants filling their columns and the sheet
+    formulas computing modes and frequencies, the first 8 people take F:M
+    and the rest the columns after the doubles one (S onwards)
+
+    :spreadsheet: GridSpreadsheet
+    :sheetTitle: title of the football day sheet
+    :people: names of the participants
+    :rnd: random.Random instance
+    :returns: None
+
+    """
+    bets = [[rnd.choice(SIGNS) for _ in people] for _ in range(14)]
+    rows = [list(row) + ['1-1'] for row in zip(*bets)]
+    for i, person in enumerate(people):
+        col = Utils_.indexToCol(5 + i if i < 8 else 10 + i)
+        spreadsheet.writeRange(sheetTitle + '!' + col + '1:' + col + '16',
+                [[cell] for cell in rows[i] + [person]])
+
+    formulas = []
+    for row in bets:
+        freqs = [row.count(sign) for sign in SIGNS]
+        mode = SIGN_MODES[SIGNS[freqs.index(max(freqs))]]
+        formulas.append([mode] + freqs)
+    spreadsheet.writeRange(sheetTitle + '!N1:Q14', formulas)
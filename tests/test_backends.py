@@ -0,0 +1,84 @@
+import os
+import socket
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+from Metrics import Metrics
+from SheetsBackend import HttpBackend, MemoryBackend, SheetsError
+from SheetsMemory import GridStore
+from SheetsServer import SheetsServer
+
+
+
+class BackendsTest(unittest.TestCase):
+
+    def testHttpTimeout(self):
+        # Connections are accepted by the kernel but never answered
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        url = 'http://127.0.0.1:' + str(server.getsockname()[1])
+        try:
+            service = HttpBackend(url, timeout=0.2).build()
+            start = time.monotonic()
+            with self.assertRaises(OSError):
+                service.spreadsheets().values().get(spreadsheetId='test',
+                        range='A1:B2').execute()
+            self.assertLess(time.monotonic() - start, 5)
+        finally:
+            server.close()
+
+
+    def testMemoryErrors(self):
+        service = MemoryBackend().build()
+        with self.assertRaises(SheetsError) as error:
+            service.spreadsheets().values().get(spreadsheetId='test',
+                    range='Missing!A1:B2').execute()
+        self.assertEqual(error.exception.resp.status, 400)
+
+
+    def assertCountsBytes(self, backend):
+        """Checks that the metrics take the response bytes counted by a
+        backend
+
+        :backend: backend over a store with the 'test' spreadsheet
+        :returns: None
+
+        """
+        metrics = Metrics()
+        request = backend.build().spreadsheets().values().get(
+                spreadsheetId='test', range='plantilla!A1:B2')
+        metrics.execute('values.get', request)
+
+        self.assertGreater(request.responseBytes, 0)
+        self.assertEqual(list(metrics.bytes.values()),
+                [request.responseBytes])
+
+
+    def createStore(self):
+        store = GridStore()
+        spreadsheet = store.spreadsheet('test')
+        spreadsheet.addSheet('plantilla', 0)
+        spreadsheet.writeRange('plantilla!A1:B2', [['a', 'b'], ['c', 'd']])
+        return store
+
+
+    def testMemoryResponseBytes(self):
+        self.assertCountsBytes(MemoryBackend(self.createStore()))
+
+
+    def testHttpResponseBytes(self):
+        server = SheetsServer(self.createStore())
+        try:
+            self.assertCountsBytes(HttpBackend(server.start()))
+        finally:
+            server.shutdown()
+
+
+
+if __name__ == '__main__':
+    unittest.main()
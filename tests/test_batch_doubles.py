@@ -0,0 +1,89 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+from BatchDoubleChooser import BatchDoubleChooser
+from DoubleChooser import DoubleChooser
+
+
+
+def randomGroup(rnd, participants):
+    """Generates the frequencies and modes of a random group
+
+    :rnd: random.Random instance
+    :participants: number of participants
+    :returns: freqs, modes with the sheet encoding
+
+    """
+    freqs = []
+    for _ in range(14):
+        row = [0, 0, 0]
+        for _ in range(participants):
+            row[rnd.randint(0, 2)] += 1
+        freqs.append(row)
+    modes = [[1, 0, 2][row.index(max(row))] for row in freqs]
+
+    return freqs, modes
+
+
+def tiedAtCut(freqs, numDoubles):
+    """Tells if the rows chosen by the difference between the two most
+    voted signs depend on a tie-break
+
+    :freqs: frequencies of each match
+    :numDoubles: number of doubles
+    :returns: True if the last row taken ties with the first one left
+
+    """
+    difs = sorted(sorted(row)[2] - sorted(row)[1] for row in freqs)
+    return difs[numDoubles - 1] == difs[numDoubles]
+
+
+
+class BatchDoubleChooserTest(unittest.TestCase):
+
+    def testSameDoublesWithoutTies(self):
+        rnd = random.Random(0)
+        for numDoubles in [1, 4, 7, 10]:
+            groups = [randomGroup(rnd, 30) for _ in range(200)]
+            groups = [(freqs, modes) for freqs, modes in groups
+                    if not tiedAtCut(freqs, numDoubles)]
+            self.assertGreater(len(groups), 10)
+
+            batch = BatchDoubleChooser(numDoubles, seed=0).tellDoubles(
+                    [freqs for freqs, _ in groups],
+                    [modes for _, modes in groups])
+            for (freqs, modes), doubleCol in zip(groups, batch.tolist()):
+                self.assertEqual(doubleCol, DoubleChooser(freqs, modes, 30,
+                    numDoubles).tellDoubles())
+
+
+    def testSecondSignTie(self):
+        # '1' is the mode and 'X' and '2' tie, both take the first one
+        freqs = [[6, 0, 0] for _ in range(13)] + [[4, 1, 1]]
+        modes = [1] * 14
+        doubleCol = DoubleChooser(freqs, modes, 6, 1).tellDoubles()
+        batch = BatchDoubleChooser(1, seed=0).tellDoubles([freqs], [modes])
+
+        self.assertEqual(doubleCol[13], 'X')
+        self.assertEqual(batch.tolist()[0], doubleCol)
+
+
+    def testTiedRowsCanAllBeChosen(self):
+        freqs = [[6, 0, 0] for _ in range(12)] + [[3, 3, 0], [0, 3, 3]]
+        modes = [1] * 12 + [1, 0]
+        batch = BatchDoubleChooser(1, seed=0).tellDoubles([freqs] * 20,
+                [modes] * 20)
+
+        chosen = set(row for doubleCol in batch.tolist()
+                for row in range(14) if doubleCol[row])
+        self.assertEqual(chosen, {12, 13})
+
+
+
+if __name__ == '__main__':
+    unittest.main()
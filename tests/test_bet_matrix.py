@@ -0,0 +1,49 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+from BetMatrix import BetMatrix
+
+
+
+def column(name, sign, first=None):
+    """Builds a participant column betting the same sign on every match
+
+    :name: name of the participant
+    :sign: sign of the matches
+    :first: sign of the first match, `sign` if None
+    :returns: list with the 16 cells
+
+    """
+    signs = [first or sign] + [sign] * 13
+    return signs + ['1-1', name]
+
+
+
+class BetMatrixTest(unittest.TestCase):
+
+    def testModes(self):
+        betMatrix = BetMatrix.fromColumns([column('a', 'X', '1'),
+            column('b', 'X'), column('c', '1', '1')])
+        self.assertEqual(betMatrix.modes().tolist(), [1] + [0] * 13)
+
+
+    def testTieGoesToFirstBet(self):
+        # MODE(F1:I1) of '2', 'X', '1', 'X' is 'X' in the sheet, and the
+        # one of '2', '1', '1', '2' is '2'
+        betMatrix = BetMatrix.fromColumns([column('a', '2'),
+            column('b', '1', 'X'), column('c', '1'), column('d', '2', 'X')])
+        self.assertEqual(betMatrix.modes().tolist(), [0] + [2] * 13)
+
+
+    def testModesWithoutBets(self):
+        betMatrix = BetMatrix.fromColumns([])
+        self.assertEqual(betMatrix.modes().tolist(), [1] * 14)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+from DoubleChooser import getChooser
+from SheetsBackend import MemoryBackend
+from SheetsOperator import SheetsOperator
+
+
+
+class DeltaUpdateTest(unittest.TestCase):
+
+    """Writes of the results skipping the cells that already hold them"""
+
+    def setUp(self):
+        backend = MemoryBackend()
+        self.spreadsheet = backend.store.spreadsheet('test')
+        self.spreadsheet.addSheet('plantilla', 0)
+        self.spreadsheet.addSheet('22')
+
+        peopleF = tempfile.NamedTemporaryFile('w', suffix='.txt',
+                delete=False)
+        peopleF.write('p0\n')
+        peopleF.close()
+        self.peopleFile = peopleF.name
+
+        self.sheetsOp = SheetsOperator(None, None, 'test', 0, 'test',
+                self.peopleFile, backend, getChooser('greedy'))
+        self.sheetsOp.startService()
+        self.matches = [{'result': result} for result in
+                ['1', 'X', '2'] * 4 + ['1', '2', '1-1']]
+
+
+    def tearDown(self):
+        os.remove(self.peopleFile)
+
+
+    def tick(self):
+        """Starts a tick, reading the snapshot of the sheet
+        :returns: None
+
+        """
+        self.sheetsOp.invalidate()
+        self.sheetsOp.getSnapshot('22')
+
+
+    def results(self):
+        return self.spreadsheet.readRange('22!E1:E15', 'COLUMNS')[0]
+
+
+    def testUnchangedResultsAreNotWritten(self):
+        self.tick()
+        self.sheetsOp.fillResults(self.matches, '22')
+        self.tick()
+        self.assertEqual(self.sheetsOp.valuesDeltaUpdate('22', 'E1:E15',
+            [[match['result']] for match in self.matches]), 0)
+
+
+    def testEditedCellsAreWrittenAgain(self):
+        self.tick()
+        self.sheetsOp.fillResults(self.matches, '22')
+
+        # Someone clears a result and changes another one by hand
+        self.spreadsheet.writeRange('22!E3:E4', [[''], ['2']])
+        self.tick()
+        self.assertEqual(self.sheetsOp.valuesDeltaUpdate('22', 'E1:E15',
+            [[match['result']] for match in self.matches]), 2)
+        self.assertEqual(self.results(),
+                [match['result'] for match in self.matches])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
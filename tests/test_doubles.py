@@ -0,0 +1,128 @@
+import copy
+import itertools
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+from DoubleChooser import DoubleChooser
+from DoublesOptimizer import DOUBLE, MODE_INDEX, SINGLE, TRIPLE,\
+        DoublesOptimizer
+
+
+
+def randomGroup(rnd, matches, participants):
+    """Generates the frequencies and modes of a random group
+
+    :rnd: random.Random instance
+    :matches: number of matches
+    :participants: number of participants
+    :returns: freqs, modes with the sheet encoding
+
+    """
+    freqs = []
+    for _ in range(matches):
+        row = [0, 0, 0]
+        for _ in range(participants):
+            row[rnd.randint(0, 2)] += 1
+        freqs.append(row)
+    modes = [[1, 0, 2][row.index(max(row))] for row in freqs]
+
+    return freqs, modes
+
+
+def coveredVotes(freqs, modes, bets):
+    """Obtains the votes covered by a group bet
+
+    :freqs: frequencies of each match
+    :modes: modes with the sheet encoding
+    :bets: SINGLE, DOUBLE or TRIPLE for each match
+    :returns: number of votes
+
+    """
+    votes = 0
+    for matchFreqs, mode, bet in zip(freqs, modes, bets):
+        modeFreq = matchFreqs[MODE_INDEX[mode]]
+        if bet == SINGLE:
+            votes += modeFreq
+        elif bet == DOUBLE:
+            others = list(matchFreqs)
+            others.remove(modeFreq)
+            votes += modeFreq + max(others)
+        else:
+            votes += sum(matchFreqs)
+
+    return votes
+
+
+def bruteForce(freqs, modes, budget):
+    """Obtains the most votes a group bet within the budget covers
+
+    :freqs: frequencies of each match
+    :modes: modes with the sheet encoding
+    :budget: maximum number of columns
+    :returns: number of votes
+
+    """
+    best = 0
+    for bets in itertools.product([SINGLE, DOUBLE, TRIPLE],
+            repeat=len(freqs)):
+        if 2 ** bets.count(DOUBLE) * 3 ** bets.count(TRIPLE) <= budget:
+            best = max(best, coveredVotes(freqs, modes, bets))
+
+    return best
+
+
+
+class DoublesOptimizerTest(unittest.TestCase):
+
+    def testMatchesBruteForce(self):
+        rnd = random.Random(0)
+        for budget in [1, 2, 3, 4, 6, 8, 9, 12, 18, 27, 36]:
+            groups = [randomGroup(rnd, 6, 5) for _ in range(20)]
+            freqs = [freqs_ for freqs_, _ in groups]
+            modes = [modes_ for _, modes_ in groups]
+            bets, _ = DoublesOptimizer(budget, seed=budget).solve(freqs,
+                    modes)
+
+            for (freqs_, modes_), groupBets in zip(groups, bets.tolist()):
+                cost = 2 ** groupBets.count(DOUBLE) *\
+                        3 ** groupBets.count(TRIPLE)
+                self.assertLessEqual(cost, budget)
+                self.assertEqual(coveredVotes(freqs_, modes_, groupBets),
+                        bruteForce(freqs_, modes_, budget))
+
+
+
+class DoubleChooserTest(unittest.TestCase):
+
+    def setUp(self):
+        # Rows 12 and 13 tie with the smallest difference between their
+        # two most voted signs
+        self.freqs = [[6, 0, 0] for _ in range(12)] + [[3, 3, 0], [0, 3, 3]]
+        self.modes = [1] * 12 + [1, 0]
+
+
+    def testTiedRowsCanAllBeChosen(self):
+        chosen = set()
+        for seed in range(20):
+            random.seed(seed)
+            doubleCol = DoubleChooser(self.freqs, self.modes, 6,
+                    1).tellDoubles()
+            chosen.update(row for row in range(14) if doubleCol[row])
+
+        self.assertEqual(chosen, {12, 13})
+
+
+    def testFreqsAreNotModified(self):
+        freqs = copy.deepcopy(self.freqs)
+        DoubleChooser(self.freqs, self.modes, 6, 2).tellDoubles()
+        self.assertEqual(self.freqs, freqs)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import os
+import random
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+import RateLimiter
+from RateLimiter import FileTokenBucket, RateLimiter as Limiter, TokenBucket
+from SheetsBackend import SheetsError
+
+
+
+class FakeClock():
+
+    """Clock that only moves when something sleeps"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+
+    def __call__(self):
+        return self.now
+
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+
+class Failing():
+
+    """Request failing with the given statuses before answering"""
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+
+    def __call__(self):
+        self.calls += 1
+        if self.statuses:
+            raise SheetsError(self.statuses.pop(0), 'failed')
+        return 'ok'
+
+
+
+class CountingFlight(RateLimiter.Flight):
+
+    """Flight counting the threads waiting for it"""
+
+    def __init__(self):
+        super().__init__()
+        self.waiting = 0
+        done = self.done
+
+        class Done():
+            def wait(event, timeout=None):
+                self.waiting += 1
+                return done.wait(timeout)
+
+            def set(event):
+                done.set()
+
+        self.done = Done()
+
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+
+    def testBurstThenPaced(self):
+        bucket = TokenBucket(60, 2, self.clock, self.clock.sleep)
+        self.assertEqual([bucket.acquire() for _ in range(4)], [0, 0, 1, 1])
+        self.assertEqual(self.clock.sleeps, [1, 1])
+
+
+    def testRefillIsCappedAtBurst(self):
+        bucket = TokenBucket(60, 2, self.clock, self.clock.sleep)
+        bucket.acquire()
+        bucket.acquire()
+        self.clock.now += 600
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0, 0, 1])
+
+
+    def testFileBucketSharesTokens(self):
+        path = os.path.join(tempfile.mkdtemp(), 'quota.json')
+        first = FileTokenBucket(path, 60, 2, self.clock, self.clock.sleep)
+        second = FileTokenBucket(path, 60, 2, self.clock, self.clock.sleep)
+        self.assertEqual([first.take(), second.take(), first.take(),
+            second.take()], [0, 0, 1, 2])
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(600, 100, self.clock, self.clock.sleep)
+
+
+    def createLimiter(self, retries=5):
+        return Limiter(retries=retries, baseDelay=1, maxDelay=4,
+                bucket=self.bucket, sleep=self.clock.sleep,
+                rand=random.Random(0))
+
+
+    def testRetriesQuotaAndServerErrors(self):
+        run = Failing([429, 503, 500, 429])
+        self.assertEqual(self.createLimiter().call(run), 'ok')
+        self.assertEqual(run.calls, 5)
+
+        # Full jitter up to baseDelay * 2 ** attempt, capped at maxDelay
+        self.assertEqual(len(self.clock.sleeps), 4)
+        for attempt, wait in enumerate(self.clock.sleeps):
+            self.assertGreaterEqual(wait, 0)
+            self.assertLessEqual(wait, min(4, 2 ** attempt))
+
+
+    def testGivesUpAfterRetries(self):
+        run = Failing([503] * 3)
+        with self.assertRaises(SheetsError):
+            self.createLimiter(retries=2).call(run)
+        self.assertEqual(run.calls, 3)
+
+
+    def testClientErrorsAreNotRetried(self):
+        run = Failing([400])
+        with self.assertRaises(SheetsError):
+            self.createLimiter().call(run)
+        self.assertEqual(run.calls, 1)
+        self.assertEqual(self.clock.sleeps, [])
+
+
+    def testConcurrentReadsShareOneRequest(self):
+        flight = RateLimiter.Flight
+        RateLimiter.Flight = CountingFlight
+        self.addCleanup(setattr, RateLimiter, 'Flight', flight)
+        limiter = Limiter(bucket=TokenBucket(600, 100))
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def run():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'values': [['1']]}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            leader = executor.submit(limiter.call, run, 'A1')
+            started.wait(5)
+            followers = [executor.submit(limiter.call, run, 'A1')
+                    for _ in range(3)]
+            # Followers wait for the flight of the leader
+            while limiter.flights['A1'].waiting < 3:
+                release.wait(0.01)
+            release.set()
+            results = [leader.result(5)] +\
+                    [follower.result(5) for follower in followers]
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, [{'values': [['1']]}] * 4)
+        # Every caller gets its own copy
+        results[0]['values'].append(['2'])
+        self.assertEqual(results[1], {'values': [['1']]})
+        self.assertEqual(limiter.flights, {})
+
+
+    def testOneLimiterPerProcess(self):
+        limiters = RateLimiter.limiters
+        RateLimiter.limiters = dict()
+        try:
+            first = RateLimiter.createLimiter({'quotaPerMinute': 60})
+            self.assertIs(RateLimiter.createLimiter({}), first)
+        finally:
+            RateLimiter.limiters = limiters
+
+
+
+if __name__ == '__main__':
+    unittest.main()
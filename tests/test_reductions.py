@@ -0,0 +1,109 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Reductions
+from helpers import fillBets
+from DoubleChooser import getChooser
+from SheetsBackend import MemoryBackend
+from SheetsOperator import SheetsOperator
+
+
+
+class GreedyCoverTest(unittest.TestCase):
+
+    def testCapOnNeighbours(self):
+        masks = Reductions.systemMasks([1] * 14, ['X'] * 10)
+        self.assertEqual(Reductions.systemSize(masks), 1024)
+
+        reachMax = Reductions.MAX_REACH
+        Reductions.MAX_REACH = 1024 * 28
+        try:
+            with self.assertRaises(ValueError):
+                Reductions.greedyCover(masks, hits=13)
+        finally:
+            Reductions.MAX_REACH = reachMax
+        self.assertGreater(len(Reductions.greedyCover(masks, hits=13)), 0)
+
+
+
+class ReductionRangeTest(unittest.TestCase):
+
+    """Reduced columns written together with the doubles"""
+
+    def setUp(self):
+        backend = MemoryBackend()
+        self.spreadsheet = backend.store.spreadsheet('test')
+        self.spreadsheet.addSheet('plantilla', 0)
+        self.spreadsheet.addSheet('22')
+
+        self.people = ['p' + str(i) for i in range(8)]
+        peopleF = tempfile.NamedTemporaryFile('w', suffix='.txt',
+                delete=False)
+        peopleF.write('\n'.join(self.people) + '\n')
+        peopleF.close()
+        self.peopleFile = peopleF.name
+        fillBets(self.spreadsheet, '22', self.people, random.Random(0))
+        self.backend = backend
+
+
+    def tearDown(self):
+        os.remove(self.peopleFile)
+
+
+    def fillDoubles(self, numDoubles=4, **kwargs):
+        """Fills the doubles and the reduced columns of the sheet
+
+        :numDoubles: number of doubles
+        :kwargs: reduction arguments of the SheetsOperator
+        :returns: None
+
+        """
+        random.seed(0)
+        sheetsOp = SheetsOperator(None, None, 'test', 0, 'test',
+                self.peopleFile, self.backend, getChooser('greedy'),
+                reductionHits=13, **kwargs)
+        sheetsOp.startService()
+        sheetsOp.fillDoubles('22', numDoubles)
+
+
+    def read(self, range_):
+        return self.spreadsheet.readRange('22!' + range_, 'ROWS')
+
+
+    def testConfigurableStart(self):
+        self.fillDoubles(reductionStart='F40')
+        self.assertEqual(self.read('F18:S30'), [])
+        self.assertEqual(len(self.read('F40:S60')[0]), 14)
+
+
+    def testOtherValuesAreKept(self):
+        self.spreadsheet.writeRange('22!H19', [['nota']])
+        self.fillDoubles()
+        self.assertEqual(self.read('F18:S30'), [[], ['', '', 'nota']])
+        # The doubles are written anyway
+        self.assertEqual(sum(1 for cell in self.read('R1:R14') if cell), 4)
+
+
+    def testSameColumnsAreWrittenAgain(self):
+        self.fillDoubles()
+        columns = self.read('F18:S40')
+        self.fillDoubles()
+        self.assertEqual(self.read('F18:S40'), columns)
+
+
+    def testBigSystemIsNotReduced(self):
+        self.fillDoubles(numDoubles=4, reductionMaxColumns=8)
+        self.assertEqual(self.read('F18:S40'), [])
+        self.assertEqual(sum(1 for cell in self.read('R1:R14') if cell), 4)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
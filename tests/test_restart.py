@@ -0,0 +1,177 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from helpers import FixtureTransport, fillBets, readFixtures
+from DoubleChooser import getChooser
+from QuinielaScraper import QuinielaScraper
+from SheetsBackend import MemoryBackend
+from SheetsOperator import SheetsOperator
+from daemon import QuinielaDaemon, State
+
+
+PERIODS = {'periodNew': 0, 'periodCompleted': 0, 'periodFinished': 0}
+
+
+
+class RestartTest(unittest.TestCase):
+
+    """Restarts of the daemon without checkpoint on a spreadsheet left by a
+    previous run"""
+
+    def setUp(self):
+        self.pages = readFixtures()
+        self.peopleFile = None
+        self.createSpreadsheet(8, 26)
+
+
+    def tearDown(self):
+        os.remove(self.peopleFile)
+
+
+    def createSpreadsheet(self, participants, columnCount):
+        """Creates the spreadsheet with a plantilla and a new football day,
+        and the people file
+
+        :participants: number of people
+        :columnCount: number of columns of the plantilla
+        :returns: None
+
+        """
+        self.backend = MemoryBackend()
+        self.spreadsheet = self.backend.store.spreadsheet('test')
+        self.spreadsheet.addSheet('plantilla', 0, columnCount)
+        self.spreadsheet.addSheet('22')
+
+        if self.peopleFile:
+            os.remove(self.peopleFile)
+        peopleF = tempfile.NamedTemporaryFile('w', suffix='.txt',
+                delete=False)
+        self.people = ['p' + str(i) for i in range(participants)]
+        peopleF.write('\n'.join(self.people) + '\n')
+        peopleF.close()
+        self.peopleFile = peopleF.name
+
+
+    def createDaemon(self, chooser, numDoubles):
+        """Creates a daemon on the spreadsheet, the results page of the
+        football day has no results so it never finishes
+
+        :chooser: name of the doubles strategy
+        :numDoubles: number of doubles
+        :returns: QuinielaDaemon
+
+        """
+        sheetsOp = SheetsOperator(None, None, 'test', 0, 'test',
+                self.peopleFile, self.backend, getChooser(chooser))
+        sheetsOp.startService()
+        transport = FixtureTransport({22: [self.pages['jornada_23.html']]})
+        quiniScraper = QuinielaScraper('2016_2017', transport, 'fast')
+
+        return QuinielaDaemon(quiniScraper, sheetsOp, numDoubles, PERIODS)
+
+
+    def fillDoubles(self, chooser, numDoubles, seed=0):
+        """Runs a daemon until it fills the doubles of the football day
+
+        :chooser: name of the doubles strategy
+        :numDoubles: number of doubles
+        :seed: seed of the bets of the participants
+        :returns: title of the football day sheet
+
+        """
+        random.seed(0)
+        quiniDaemon = self.createDaemon(chooser, numDoubles)
+        quiniDaemon.start()
+        filled = False
+        for _ in range(10):
+            quiniDaemon.tick()
+            if quiniDaemon.currSt == State.NEW and not filled and\
+                    not quiniDaemon.newInState:
+                fillBets(self.spreadsheet, quiniDaemon.sheetTitle,
+                        self.people, random.Random(seed))
+                filled = True
+            if quiniDaemon.currSt == State.COMPLETED and\
+                    not quiniDaemon.newInState:
+                return quiniDaemon.sheetTitle
+
+        self.fail('doubles not filled')
+
+
+    def doubleCol(self, sheetTitle):
+        return self.spreadsheet.readRange(sheetTitle + '!R1:R14', 'COLUMNS')
+
+
+    def assertResumesCompleted(self, chooser, numDoubles, seed=0):
+        """Checks that a restart keeps the doubles filled by a strategy,
+        which must fill fewer cells than `numDoubles`
+
+        :chooser: name of the doubles strategy
+        :numDoubles: number of doubles
+        :seed: seed of the bets of the participants
+        :returns: None
+
+        """
+        sheetTitle = self.fillDoubles(chooser, numDoubles, seed)
+        doubles = self.doubleCol(sheetTitle)
+        self.assertLess(sum(1 for cell in doubles[0] if cell), numDoubles)
+
+        # Another tie-break would choose other doubles if they were refilled
+        random.seed(1)
+        quiniDaemon = self.createDaemon(chooser, numDoubles)
+        quiniDaemon.start()
+        self.assertEqual(quiniDaemon.currSt, State.COMPLETED)
+        self.assertFalse(quiniDaemon.newInState)
+
+        quiniDaemon.tick()
+        self.assertEqual(self.doubleCol(sheetTitle), doubles)
+
+
+    def testTripleChooser(self):
+        self.assertResumesCompleted('triple', 7)
+
+
+    def testOptimalChooser(self):
+        # Bets where triples cover more votes than doubles
+        self.assertResumesCompleted('optimal', 7, seed=5)
+
+
+    def testPartialDoublesAreRefilled(self):
+        sheetTitle = self.fillDoubles('greedy', 7)
+        doubles = self.doubleCol(sheetTitle)
+        row = [cell != '' for cell in doubles[0]].index(True)
+        self.spreadsheet.writeRange(sheetTitle + '!R' + str(row + 1),
+                [['']])
+
+        random.seed(0)
+        quiniDaemon = self.createDaemon('greedy', 7)
+        quiniDaemon.start()
+        self.assertEqual(quiniDaemon.currSt, State.COMPLETED)
+        self.assertTrue(quiniDaemon.newInState)
+
+        quiniDaemon.tick()
+        self.assertEqual(sum(1 for cell in self.doubleCol(sheetTitle)[0]
+            if cell), 7)
+
+
+    def testWidePlantilla(self):
+        # People after the 8th take the columns from S on, up to AX
+        self.createSpreadsheet(40, 50)
+        sheetTitle = self.fillDoubles('greedy', 7)
+
+        quiniDaemon = self.createDaemon('greedy', 7)
+        quiniDaemon.start()
+        self.assertEqual(quiniDaemon.currSt, State.COMPLETED)
+        betMatrix = quiniDaemon.sheetsOp.getBetMatrix(sheetTitle)
+        self.assertEqual(betMatrix.participants(), 40)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
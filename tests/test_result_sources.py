@@ -0,0 +1,122 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from helpers import PageServer, readFixtures
+from QuinielaScraper import QuinielaScraper
+from ResultSources import HedgedScraper, SourcesError
+from ScraperTransport import ScraperTransport
+
+
+
+class HedgedScraperTest(unittest.TestCase):
+
+    """Hedged requests to local servers of the recorded pages"""
+
+    def setUp(self):
+        self.pages = readFixtures()
+        self.cacheDir = tempfile.mkdtemp()
+        self.servers = []
+
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+        shutil.rmtree(self.cacheDir)
+
+
+    def createSource(self, name, page, delay=0, timeout=5):
+        """Creates a source scraping a local server
+
+        :name: name of the source
+        :page: name of the fixture served, or the text served
+        :delay: seconds the server waits before answering
+        :timeout: seconds to wait for the source
+        :returns: PageServer, (name, scraper, timeout)
+
+        """
+        server = PageServer(self.pages.get(page, page), delay)
+        self.servers.append(server)
+        transport = ScraperTransport(os.path.join(self.cacheDir, name),
+                timeout=timeout, finishedTtl=0)
+        scraper = QuinielaScraper('2016_2017', transport, 'fast',
+                server.url + '/{season}/{footballDay}')
+
+        return server, (name, scraper, timeout)
+
+
+    def testFirstValidAnswerWins(self):
+        _, slowSource = self.createSource('slow', 'jornada_22.html', 1)
+        fast, fastSource = self.createSource('fast', 'jornada_22.html')
+        hedged = HedgedScraper('2016_2017', [slowSource, fastSource],
+                hedgeDelay=0.1)
+
+        start = time.monotonic()
+        matches = hedged.fetchMatches(22)
+        self.assertLess(time.monotonic() - start, 0.9)
+        self.assertEqual(hedged.winner, 'fast')
+        self.assertEqual(matches[0]['local'], 'R. Madrid')
+        # The fast source was only asked once the hedge delay passed
+        self.assertGreaterEqual(fast.requests[0] - start, 0.1)
+
+
+    def testNoHedgeBeforeDelay(self):
+        _, firstSource = self.createSource('first', 'jornada_22.html',
+                0.05)
+        second, secondSource = self.createSource('second',
+                'jornada_22.html')
+        hedged = HedgedScraper('2016_2017', [firstSource, secondSource],
+                hedgeDelay=2)
+
+        hedged.fetchMatches(22)
+        self.assertEqual(hedged.winner, 'first')
+        self.assertEqual(len(second.requests), 0)
+
+
+    def testInvalidAnswerAsksNextSource(self):
+        _, brokenSource = self.createSource('broken', '<html></html>')
+        _, goodSource = self.createSource('good', 'jornada_22.html')
+        hedged = HedgedScraper('2016_2017', [brokenSource, goodSource],
+                hedgeDelay=5)
+
+        start = time.monotonic()
+        hedged.fetchMatches(22)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(hedged.winner, 'good')
+
+
+    def testLaggingSourceIsNotTaken(self):
+        lagging, laggingSource = self.createSource('lagging',
+                'jornada_22.html')
+        _, currentSource = self.createSource('current', 'jornada_22.html',
+                0.2)
+        hedged = HedgedScraper('2016_2017', [laggingSource, currentSource],
+                hedgeDelay=0.05)
+        hedged.fetchMatches(22)
+        self.assertEqual(hedged.winner, 'lagging')
+
+        # The lagging source answers first but it lost some results
+        lagging.update(self.pages['jornada_23.html'])
+        matches = hedged.fetchMatches(22)
+        self.assertEqual(hedged.winner, 'current')
+        self.assertEqual(matches[14]['result'], '2--M')
+
+
+    def testNoValidSource(self):
+        _, brokenSource = self.createSource('broken', '<html></html>')
+        hedged = HedgedScraper('2016_2017', [brokenSource], hedgeDelay=0.1)
+
+        with self.assertRaises(SourcesError):
+            hedged.fetchMatches(22)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
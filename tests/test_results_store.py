@@ -0,0 +1,56 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+from ResultsStore import ResultsStore
+
+
+
+class ResultsStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ResultsStore(':memory:')
+
+
+    def tearDown(self):
+        self.store.close()
+
+
+    def testLeaderboardLeavesGroupOut(self):
+        self.store.saveScores('pool', '2016_2017', 22, {'ana': (9, False),
+            'luis': (11, True), ResultsStore.GROUP: (13, False)})
+        self.store.saveScores('pool', '2016_2017', 23, {'ana': (12, False),
+            ResultsStore.GROUP: (14, True)})
+
+        self.assertEqual(self.store.leaderboard('pool', '2016_2017'),
+                [('ana', 21, 0, 2), ('luis', 11, 1, 1)])
+        self.assertEqual(self.store.leaderboard('pool', '2016_2017', 22),
+                [('luis', 11, 1, 1), ('ana', 9, 0, 1)])
+
+
+    def testVotedDaysAreReplaced(self):
+        freqs = [[3, 1, 0]] * 14
+        self.store.saveVotes('pool', '2016_2017', 22, 4, freqs, [1] * 14)
+        self.store.saveVotes('pool', '2016_2017', 22, 5, freqs, [0] * 14)
+        self.store.saveVotes('other', '2016_2017', 23, 4, freqs, [1] * 14)
+
+        self.assertEqual(self.store.votedDays('pool'), [{'pool': 'pool',
+            'season': '2016_2017', 'jornada': 22, 'participants': 5,
+            'freqs': freqs, 'modes': [0] * 14}])
+        self.assertEqual([record['jornada'] for record in
+            self.store.votedDays(season='2016_2017')], [23, 22])
+
+
+    def testOnlyPrimaryKeyIndexes(self):
+        indexes = [row[0] for row in self.store.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND "
+            "tbl_name = 'matches'")]
+        self.assertEqual(indexes, ['sqlite_autoindex_matches_1'])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
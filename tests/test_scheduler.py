@@ -0,0 +1,47 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+from daemon import createScheduler
+
+
+CONFIG = {'periodNew': 60, 'periodCompleted': 300, 'periodFinished': 600}
+
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def waits(self, scheduler, period, checks=5):
+        """Waiting times after repeating the same answer of a check
+
+        :scheduler: PollScheduler
+        :period: base period
+        :checks: number of checks
+        :returns: list of seconds
+
+        """
+        waits = []
+        for _ in range(checks):
+            scheduler.observe('colsFilled', False)
+            waits.append(scheduler.nextWait('colsFilled', period))
+        return waits
+
+
+    def testFixedPeriodsWithoutBackoffKey(self):
+        scheduler = createScheduler(dict(CONFIG))
+        self.assertEqual(self.waits(scheduler, 60), [60] * 5)
+        self.assertEqual(scheduler.periodMax, 300)
+
+
+    def testBackoffWhenConfigured(self):
+        config = dict(CONFIG, backoffFactor=2, periodMax=400)
+        scheduler = createScheduler(config)
+        self.assertEqual(self.waits(scheduler, 60), [60, 120, 240, 400, 400])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from helpers import PageServer
+from ScraperTransport import ScraperTransport
+
+
+
+class ScraperTransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cacheDir = tempfile.mkdtemp()
+        self.server = PageServer('<p>1 X 2</p>')
+
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.cacheDir)
+
+
+    def fetch(self, transport):
+        return transport.fetch(self.server.url, '2016_2017', 22)
+
+
+    def testFinishedDayServedFromCacheWithinTtl(self):
+        transport = ScraperTransport(self.cacheDir, finishedTtl=3600)
+        self.assertEqual(self.fetch(transport), ('<p>1 X 2</p>', False))
+        transport.markFinished('2016_2017', 22)
+
+        self.assertEqual(self.fetch(transport), ('<p>1 X 2</p>', True))
+        self.assertEqual(len(self.server.requests), 1)
+
+
+    def testFinishedDayRevalidatedAfterTtl(self):
+        transport = ScraperTransport(self.cacheDir, finishedTtl=0)
+        self.fetch(transport)
+        transport.markFinished('2016_2017', 22)
+
+        # Same version, answered with 304 and kept as finished
+        self.assertEqual(self.fetch(transport), ('<p>1 X 2</p>', True))
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertTrue(transport.readCache('2016_2017', 22)[1]['finished'])
+
+        # A correction of the results is downloaded
+        self.server.update('<p>1 1 2</p>')
+        self.assertEqual(self.fetch(transport), ('<p>1 1 2</p>', False))
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertFalse(transport.readCache('2016_2017', 22)[1]['finished'])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
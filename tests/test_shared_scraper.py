@@ -0,0 +1,74 @@
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+from AsyncDaemon import SharedScraper
+
+
+
+class BlockingScraper():
+
+    """Scraper whose fetches of some football days wait for an event"""
+
+    def __init__(self, blocked):
+        """
+        :blocked: {footballDay: threading.Event} released by the test
+
+        """
+        self.season = '2016_2017'
+        self.blocked = blocked
+        self.fetches = []
+        self.lock = threading.Lock()
+
+
+    def fetchMatches(self, footballDay):
+        with self.lock:
+            self.fetches.append(footballDay)
+        if footballDay in self.blocked:
+            self.blocked[footballDay].wait(5)
+
+        return [{'local': 'L' + str(footballDay), 'visiting': 'V',
+            'result': ''}]
+
+
+
+class SharedScraperTest(unittest.TestCase):
+
+    def testOtherDaysAreNotBlocked(self):
+        release = threading.Event()
+        scraper = BlockingScraper({22: release})
+        shared = SharedScraper(scraper, 60)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            slow = executor.submit(shared.fetchMatches, 22)
+            # Day 23 answers while the fetch of day 22 is hung
+            matches = executor.submit(shared.fetchMatches, 23).result(2)
+            self.assertEqual(matches[0]['local'], 'L23')
+            self.assertFalse(slow.done())
+            release.set()
+            self.assertEqual(slow.result(2)[0]['local'], 'L22')
+
+
+    def testSameDayIsFetchedOnce(self):
+        release = threading.Event()
+        scraper = BlockingScraper({22: release})
+        shared = SharedScraper(scraper, 60)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(shared.fetchMatches, 22)
+                    for _ in range(4)]
+            release.set()
+            for future in futures:
+                self.assertEqual(future.result(2)[0]['local'], 'L22')
+
+        self.assertEqual(scraper.fetches, [22])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+import Utils_
+from SheetSnapshot import SheetSnapshot
+
+
+
+class SheetSnapshotTest(unittest.TestCase):
+
+    def columns(self, ranges):
+        """Obtains the column indexes of some ranges
+
+        :ranges: list of ranges without sheet name
+        :returns: list of column indexes
+
+        """
+        columns = []
+        for range_ in ranges:
+            col0, _, col1, _ = Utils_.parseA1(range_)
+            columns.extend(range(col0, col1 + 1))
+        return columns
+
+
+    def testFormulaAndDoubleColumnsAreSkipped(self):
+        ranges = SheetSnapshot.participantRanges(60, 7)
+        formulas = set(range(Utils_.colToIndex('N'),
+            Utils_.colToIndex('R') + 1))
+
+        self.assertFalse(formulas & set(self.columns(ranges)))
+        self.assertEqual(self.columns(ranges),
+                list(range(5, 13)) + list(range(18, 60)))
+
+
+    def testBoundedByPeople(self):
+        self.assertEqual(SheetSnapshot.participantRanges(60, 26, 6),
+                ['F1:M16'])
+        self.assertEqual(SheetSnapshot.participantRanges(60, 26, 12),
+                ['F1:M16', 'S1:V16'])
+        # The sheet may still lack the columns of new people
+        self.assertEqual(SheetSnapshot.participantRanges(20, 26, 12),
+                ['F1:M16', 'S1:T16'])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+
+class StartupTest(unittest.TestCase):
+
+    def importedModules(self, module, names):
+        """Imports a module in a new interpreter
+
+        :module: module to import
+        :names: modules to look for
+        :returns: list with the ones of `names` imported
+
+        """
+        code = ('import sys; import ' + module + '; print(",".join(name for '
+                'name in ' + repr(names) + ' if name in sys.modules))')
+        output = subprocess.check_output([sys.executable, '-c', code],
+                cwd=ROOT)
+
+        return [name for name in output.decode().strip().split(',') if name]
+
+
+    def testDaemonDefersNumpy(self):
+        self.assertEqual(self.importedModules('daemon', ['numpy', 'bs4',
+            'lxml', 'requests', 'SheetsMemory']), [])
+
+
+    def testAsyncDaemonDefersNumpy(self):
+        self.assertEqual(self.importedModules('AsyncDaemon', ['numpy',
+            'SheetsMemory']), [])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
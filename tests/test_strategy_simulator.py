@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+from ResultsStore import ResultsStore
+from StrategySimulator import StrategySimulator, countColumns
+
+
+
+class StrategySimulatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ResultsStore(':memory:')
+        # Every match is won by the least voted sign
+        freqs = [[4, 2, 0] for _ in range(14)]
+        self.store.saveVotes('pool', '2016_2017', 22, 6, freqs, [1] * 14)
+        self.store.saveFootballDay('2016_2017', 22, [{'local': 'A',
+            'visiting': 'B', 'result': '2'} for _ in range(15)], True)
+
+
+    def tearDown(self):
+        self.store.close()
+
+
+    def testCountColumns(self):
+        self.assertEqual(countColumns([''] * 14), 1)
+        self.assertEqual(countColumns(['X', '1X', 'X2'] + [''] * 11), 18)
+
+
+    def testReplaysStoredVotesPerColumn(self):
+        simulator = StrategySimulator(self.store, 4, 3, workers=1)
+        report = simulator.run(self.store.votedDays('pool'),
+                ['greedy', 'triple'])
+
+        self.assertEqual(report['days'], 1)
+        greedy = report['strategies']['greedy']
+        triple = report['strategies']['triple']
+        # Doubles never cover the 2, each triple covers one match
+        self.assertEqual((greedy['mean'], greedy['columns']), (0, 16))
+        self.assertEqual((triple['mean'], triple['columns']), (2, 9))
+        self.assertEqual(greedy['hitsPerColumn'], 0)
+        self.assertAlmostEqual(triple['hitsPerColumn'], 2 / 9)
+        self.assertEqual(triple['trials'], 3)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import io
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..'))
+
+import Tracing
+
+
+
+class SignalStream(io.StringIO):
+
+    """Stream raising a signal in the middle of the first write, while the
+    tracer holds its lock"""
+
+    def __init__(self, signum):
+        io.StringIO.__init__(self)
+        self.signum = signum
+        self.raised = False
+
+
+    def write(self, text):
+        if not self.raised:
+            self.raised = True
+            os.kill(os.getpid(), self.signum)
+        return io.StringIO.write(self, text)
+
+
+
+class Timeout(Exception):
+    pass
+
+
+
+def alarm(signum, frame):
+    raise Timeout()
+
+
+
+class TracingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracer = Tracing.tracer
+        self.handlers = dict((signum, signal.getsignal(signum))
+                for signum in (signal.SIGUSR1, signal.SIGALRM))
+
+
+    def tearDown(self):
+        Tracing.tracer = self.tracer
+        for signum, handler in self.handlers.items():
+            signal.signal(signum, handler)
+
+
+    def testDisabledSpansDoNothing(self):
+        Tracing.configure(False, stream=io.StringIO())
+        self.assertIs(Tracing.span('sheets'), Tracing.NOOP)
+        self.assertIs(Tracing.tick(daemon='d'), Tracing.NOOP)
+
+
+    def testTickBreakdown(self):
+        stream = io.StringIO()
+        Tracing.configure(True, ringSize=2, stream=stream)
+        for _ in range(3):
+            with Tracing.tick(daemon='d', state='NEW') as trace:
+                with Tracing.span('sheets', method='values.get'):
+                    time.sleep(0.01)
+                trace.set(nextState='COMPLETED')
+
+        record = json.loads(stream.getvalue().splitlines()[-1])
+        self.assertEqual(record['event'], 'tick')
+        self.assertEqual(record['nextState'], 'COMPLETED')
+        self.assertEqual(set(record['breakdown']), {'sheets', 'other'})
+        self.assertGreaterEqual(record['breakdown']['sheets'], 0.01)
+        self.assertEqual(len(Tracing.tracer.ring), 2)
+
+
+    def testSignalDuringWrite(self):
+        dumpF = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        dumpF.close()
+        os.remove(dumpF.name)
+        stream = SignalStream(signal.SIGUSR1)
+        Tracing.configure(True, stream=stream, dumpFile=dumpF.name,
+                dumpSignal=signal.SIGUSR1)
+
+        # A deadlock would block forever, the alarm breaks it
+        signal.signal(signal.SIGALRM, alarm)
+        signal.setitimer(signal.ITIMER_REAL, 5)
+        try:
+            with Tracing.tick(daemon='d'):
+                pass
+            deadline = time.monotonic() + 5
+            while not os.path.exists(dumpF.name) and\
+                    time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+        self.assertTrue(stream.raised)
+        with open(dumpF.name) as f:
+            self.assertEqual(json.loads(f.readline())['daemon'], 'd')
+        os.remove(dumpF.name)
+
+
+
+if __name__ == '__main__':
+    unittest.main()